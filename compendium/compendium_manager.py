@@ -2,6 +2,9 @@ import json
 import os
 import re
 from typing import Dict, List, Optional
+from .mention_matcher import MentionMatcher
+
+_matchers = {}  # compendium file path -> (modification time, MentionMatcher)
 
 class CompendiumManager:
     """Manages compendium data loading, retrieval, and reference parsing for a project."""
@@ -73,6 +76,41 @@ class CompendiumManager:
                         return e.get("content", f"[No content for {entry} in category {category}]")
         return f"[No content for {entry} in category {category}]"
 
+    def get_matcher(self) -> MentionMatcher:
+        """
+        Return a matcher for all entry names of the compendium.
+
+        The matcher is built once per version of the compendium file and shared
+        by every CompendiumManager of the project.
+
+        Returns:
+            MentionMatcher: The matcher; it knows no names if the compendium is missing or unreadable.
+        """
+        filename = self.get_filepath()
+        try:
+            mtime = os.path.getmtime(filename)
+        except OSError:
+            return MentionMatcher([])
+        cached = _matchers.get(filename)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        names = []
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                compendium = json.load(f)
+            cats = compendium.get("categories", [])
+            if isinstance(cats, dict):
+                names = list(cats.keys())
+            elif isinstance(cats, list):
+                for cat in cats:
+                    for entry in cat.get("entries", []):
+                        names.append(entry.get("name", ""))
+        except Exception as e:
+            print(f"Error parsing compendium references from {filename}: {e}")
+        matcher = MentionMatcher(names)
+        _matchers[filename] = (mtime, matcher)
+        return matcher
+
     def parse_references(self, message: str) -> List[str]:
         """
         Parse compendium references from a message by matching entry names.
@@ -83,23 +121,16 @@ class CompendiumManager:
         Returns:
             list: A list of entry names found in the message.
         """
-        filename = self.get_filepath()
-        refs = []
-        if os.path.exists(filename):
-            try:
-                with open(filename, "r", encoding="utf-8") as f:
-                    compendium = json.load(f)
-                names = []
-                cats = compendium.get("categories", [])
-                if isinstance(cats, dict):
-                    names = list(cats.keys())
-                elif isinstance(cats, list):
-                    for cat in cats:
-                        for entry in cat.get("entries", []):
-                            names.append(entry.get("name", ""))
-                for name in names:
-                    if name and re.search(r'\b' + re.escape(name) + r'\b', message, re.IGNORECASE):
-                        refs.append(name)
-            except Exception as e:
-                print(f"Error parsing compendium references from {filename}: {e}")
-        return refs
+        return self.get_matcher().names_in(message)
+
+    def count_mentions(self, text: str) -> Dict[str, int]:
+        """
+        Count how often each compendium entry is mentioned in a text.
+
+        Args:
+            text (str): The text to scan.
+
+        Returns:
+            dict: Entry names mapped to their number of mentions; unmentioned entries are left out.
+        """
+        return self.get_matcher().counts(text)
@@ -1,7 +1,8 @@
-from PyQt5.QtWidgets import QWidget, QHBoxLayout, QSplitter, QTreeWidget, QTreeWidgetItem, QTextEdit
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QSplitter, QTreeWidget, QTreeWidgetItem
 from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot
 from compendium.compendium_manager import CompendiumManager
 from settings.selection_manager import SelectionManager
+from settings.plain_text import html_to_plain_text
 
 class ContextPanel(QWidget):
     compendium_updated = pyqtSignal(str)  # str is the project_name
@@ -229,10 +230,9 @@ class ContextPanel(QWidget):
     def get_selected_story_text(self):
         """Collect selected text from the project panel, formatted with headers."""
         texts = []
-        temp_editor = QTextEdit()
         root = self.project_tree.invisibleRootItem()
         for i in range(root.childCount()):
-            self._traverse_project_item(root.child(i), texts, temp_editor)
+            self._traverse_project_item(root.child(i), texts)
         return "\n\n".join(texts) if texts else ""
 
     def _load_content(self, data_type, data, hierarchy):
@@ -242,10 +242,10 @@ class ContextPanel(QWidget):
             if uuid_val:
                 return self.controller.model.load_summary(uuid=uuid_val)
         elif data_type == "scene":
-            return self.controller.model.load_autosave(hierarchy) or data.get("content")
+            return self.controller.model.load_scene_content(hierarchy) or data.get("content")
         return None
 
-    def _traverse_project_item(self, item, texts, temp_editor):
+    def _traverse_project_item(self, item, texts):
         data = item.data(0, Qt.UserRole)
         hierarchy = self.controller.get_item_hierarchy(item)
         
@@ -254,15 +254,14 @@ class ContextPanel(QWidget):
             content = self._load_content(content_type, data.get("data"), hierarchy)
             
             if content:
-                temp_editor.setHtml(content)
-                content_text = temp_editor.toPlainText()
+                content_text = html_to_plain_text(content)
                 if content_type == "summary":
                     texts.append(f"[Summary - {item.parent().text(0)}]:\n{content_text}")
                 elif content_type == "scene":
                     texts.append(f"[Scene Content - {item.text(0)}]:\n{content_text}")
         
         for i in range(item.childCount()):
-            self._traverse_project_item(item.child(i), texts, temp_editor)
+            self._traverse_project_item(item.child(i), texts)
 
     def on_structure_changed(self, hierarchy, uuid):
         """Handle structure changes by updating the project tree."""
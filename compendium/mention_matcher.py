@@ -0,0 +1,107 @@
+import re
+from typing import Dict, Iterable, List, Tuple
+
+WORD_CHAR = re.compile(r"\w")
+
+class MentionMatcher:
+    """
+    Finds every compendium entry name in a text in a single pass.
+
+    The names are compiled into an Aho-Corasick automaton over their lower-cased
+    characters, so scanning a scene costs the same whether the compendium has
+    five entries or five hundred, and overlapping names ("New York" inside
+    "New York City") are all reported. Matching is case-insensitive and, by
+    default, limited to whole words.
+    """
+
+    def __init__(self, names: Iterable[str], whole_word: bool = True):
+        self.whole_word = whole_word
+        self.names = []
+        self._goto = [{}]  # state -> {character: next state}
+        self._fail = [0]
+        self._output = [[]]  # state -> [(name, length), ...] of the names ending there
+        seen = set()
+        for name in names:
+            if name and name not in seen:
+                seen.add(name)
+                self.names.append(name)
+                self._add(name)
+        self._link()
+
+    def _add(self, name: str):
+        state = 0
+        for char in self._lower(name):
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((name, len(name)))
+
+    def _link(self):
+        # Breadth-first, so the failure state of every node is final before its children need it
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    @staticmethod
+    def _lower(text: str) -> str:
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return lowered
+        # A few characters grow when lower-cased; keep those as they are so offsets stay valid
+        return "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+    def _is_whole_word(self, text: str, start: int, end: int) -> bool:
+        return ((start == 0 or not WORD_CHAR.match(text[start - 1])) and
+                (end == len(text) or not WORD_CHAR.match(text[end])))
+
+    def find(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Return every mention in the text.
+
+        Returns:
+            A list of (entry name, start, end) tuples ordered by where the mentions end.
+        """
+        mentions = []
+        if not text or not self.names:
+            return mentions
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for pos, char in enumerate(self._lower(text)):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for name, length in output[state]:
+                start = pos + 1 - length
+                if not self.whole_word or self._is_whole_word(text, start, pos + 1):
+                    mentions.append((name, start, pos + 1))
+        return mentions
+
+    def offsets(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """Return the (start, end) offsets of the mentions of each entry that occurs in the text."""
+        result = {}
+        for name, start, end in self.find(text):
+            result.setdefault(name, []).append((start, end))
+        return result
+
+    def counts(self, text: str) -> Dict[str, int]:
+        """Return the number of mentions of each entry that occurs in the text."""
+        result = {}
+        for name, _, _ in self.find(text):
+            result[name] = result.get(name, 0) + 1
+        return result
+
+    def names_in(self, text: str) -> List[str]:
+        """Return the entries mentioned in the text, in the order they were given to the matcher."""
+        found = self.counts(text)
+        return [name for name in self.names if name in found]
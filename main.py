@@ -1,9 +1,10 @@
 import sys
 import logging
-import whisper
-from settings.translation_manager import TranslationManager
 from settings.settings_manager import WWSettingsManager
 
+# Only cheap imports at module level: worker processes started with the "spawn" method
+# (see util/statistics_analysis.py) import this module again before running any task.
+
 def exception_hook(exctype, value, traceback):
     logging.error("Unhandled exception", exc_info=(exctype, value, traceback))
     sys.__excepthook__(exctype, value, traceback)
@@ -38,18 +39,8 @@ def check_dependencies():
             print("Please install them by running:\n\npip install " + " ".join(missing))
         sys.exit(1)
 
-# Initialize translations
-translation_manager = TranslationManager()
-translation_manager.set_language(WWSettingsManager.get_general_settings().get("language", "en"))
-
-# Run dependency check after gettext is set up
-check_dependencies()
-
-from PyQt5.QtWidgets import QApplication
-from workbench import WorkbenchWindow
-from settings.theme_manager import ThemeManager
-
 def writingway_preload_settings(app):
+    from settings.theme_manager import ThemeManager
     theme = WWSettingsManager.get_appearance_settings()["theme"]
     try:
         ThemeManager.apply_to_app(theme)
@@ -72,10 +63,25 @@ def on_theme_changed(theme_name):
     pass
 
 def main():
+    import whisper  # Loaded ahead of PyQt5, as it always has been
+
+    # Initialize translations
+    from settings.translation_manager import TranslationManager
+    translation_manager = TranslationManager()
+    translation_manager.set_language(WWSettingsManager.get_general_settings().get("language", "en"))
+
+    # Run dependency check after gettext is set up
+    check_dependencies()
+
+    from PyQt5.QtWidgets import QApplication
+    from workbench import WorkbenchWindow
+    from util.text_analysis_gui import preload_analysis_model
+
     app = QApplication(sys.argv)
     writingway_preload_settings(app)
     window = WorkbenchWindow(translation_manager)
     window.show()
+    preload_analysis_model()
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
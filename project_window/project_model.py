@@ -2,27 +2,48 @@
 import os
 import time
 import uuid
+from itertools import chain
 from typing import Optional
 from PyQt5.QtCore import pyqtSignal, QObject
 from . import project_settings_manager as psm
 from settings.settings_manager import WWSettingsManager
-from settings.autosave_manager import load_latest_autosave, save_scene, get_latest_autosave_path
+from settings.persistence_queue import WWPersistenceQueue
+from settings.autosave_manager import load_latest_autosave, save_scene, get_latest_autosave_path, get_project_folder
 from .tree_manager import load_structure, save_structure, update_structure_from_tree, get_structure_file_path
+from .scene_cache import SceneContentCache, DEFAULT_BUDGET_MB
+from .search_index import get_search_index
 
 class ProjectModel(QObject):
     """Manages project data and persistence."""
     structureChanged = pyqtSignal(list, str)
     errorOccurred = pyqtSignal(str)
+    saveFailed = pyqtSignal(str, str)  # path, error message of a background write that failed
 
     def __init__(self, project_name):
         super().__init__()
         self.project_name = project_name
         self.structure = load_structure(project_name)
         self.migrate_legacy_content()
+        self._rebuild_node_index()
         self.settings = self.load_settings()
         self.autosave_enabled = WWSettingsManager.get_setting("general", "enable_autosave", False)
         self.unsaved_changes = False
         self.last_saved_hierarchy = None
+        cache_mb = WWSettingsManager.get_setting("general", "scene_cache_mb", DEFAULT_BUDGET_MB)
+        self._scene_cache = SceneContentCache(int(cache_mb) * 1024 * 1024)
+        self.search_index = get_search_index(project_name)
+        self._project_folders = {os.path.normcase(os.path.abspath(folder)) for folder in
+                                 (get_project_folder(project_name), os.path.dirname(get_structure_file_path(project_name)))}
+        WWPersistenceQueue.add_error_listener(self._on_write_failed)
+
+    def _on_write_failed(self, path, error):
+        # Called on the persistence queue's thread; the signal is delivered on the GUI thread
+        if path and os.path.normcase(os.path.dirname(os.path.abspath(path))) in self._project_folders:
+            self.saveFailed.emit(path, error)
+
+    def close(self):
+        """Stop listening for failed writes once the project window is closed."""
+        WWPersistenceQueue.remove_error_listener(self._on_write_failed)
 
     def load_settings(self):
         settings = psm.load_project_settings(self.project_name)
@@ -52,17 +73,20 @@ class ProjectModel(QObject):
                         merge_fields(old_child, new_child)
         for old_act, new_act in zip(old_structure.get("acts", []), self.structure.get("acts", [])):
             merge_fields(old_act, new_act)
+        self._rebuild_node_index()
         self.save_structure()
 
-    def save_structure(self):
-        save_structure(self.project_name, self.structure)
+    def save_structure(self, compact=False):
+        save_structure(self.project_name, self.structure, compact=compact)
 
     def load_autosave(self, hierarchy, node: Optional[dict]=None):
         return load_latest_autosave(self.project_name, hierarchy, node)
 
     def migrate_legacy_content(self):
+        migrated = []
         def traverse_and_migrate(node, hierarchy):
             if "content" in node:
+                migrated.append(hierarchy)
                 uuid_val = node.setdefault("uuid", str(uuid.uuid4()))
                 latest_autosave_path = get_latest_autosave_path(self.project_name, hierarchy)
                 if not latest_autosave_path:
@@ -80,23 +104,31 @@ class ProjectModel(QObject):
             if "scenes" in node:
                 for i, scene in enumerate(node["scenes"]):
                     traverse_and_migrate(scene, hierarchy + [scene["name"]])
+        acts = self.structure.get("acts", [])
+        for act in acts:
+            traverse_and_migrate(act, [act["name"]])
+        if not migrated:
+            # Unchanged structures are not rewritten; the journal skips saves without changes
+            self.save_structure()
+            return
+        # Keep the pre-migration structure file as a backup before writing the migrated one
+        WWPersistenceQueue.flush()
         file_path = get_structure_file_path(self.project_name)
         backup_path = file_path + ".backup"
         if os.path.exists(backup_path):
             os.remove(backup_path)
         if os.path.exists(file_path):
             os.rename(file_path, backup_path)
-        acts = self.structure.get("acts", [])
-        for act in acts:
-            traverse_and_migrate(act, [act["name"]])
-        if os.path.exists(backup_path):
-            self.save_structure()
+            self.save_structure(compact=True)
 
     def load_scene_content(self, hierarchy) -> Optional[str]:
         node = self._get_node_by_hierarchy(hierarchy)
         if not node:
             return None
         uuid_val = node.setdefault("uuid", str(uuid.uuid4()))
+        content = self._scene_cache.get(uuid_val, node.get("latest_file"))
+        if content is not None:
+            return content
         content = load_latest_autosave(self.project_name, hierarchy, node)
         if content is None and "content" in node:
             content = node["content"]
@@ -113,21 +145,53 @@ class ProjectModel(QObject):
                 self.save_structure()
         if content and content.startswith("<!-- UUID:"):
             content = "\n".join(content.split("\n")[1:])
+        if content is not None and node.get("latest_file"):
+            self._scene_cache.put(uuid_val, node["latest_file"], content)
         return content
 
-    def save_scene(self, hierarchy, content, expected_project_name: Optional[str]=None):
-        node = self._get_node_by_hierarchy(hierarchy)
-        if not node:
-            return None
+    def _store_scene(self, node, hierarchy, content, expected_project_name: Optional[str]=None):
         uuid_val = node.setdefault("uuid", str(uuid.uuid4()))
         filepath = save_scene(self.project_name, hierarchy, uuid_val, content, expected_project_name=expected_project_name)
         if filepath:
             if "content" in node:
                 del node["content"]
             node["latest_file"] = filepath
+            self._scene_cache.put(uuid_val, filepath, content)
+            self.search_index.update(uuid_val, filepath, content)
+        return filepath
+
+    def save_scene(self, hierarchy, content, expected_project_name: Optional[str]=None):
+        node = self._get_node_by_hierarchy(hierarchy)
+        if not node:
+            return None
+        filepath = self._store_scene(node, hierarchy, content, expected_project_name)
+        if filepath:
             self.save_structure()
-            self.structureChanged.emit(hierarchy, uuid_val)
+            self.structureChanged.emit(hierarchy, node["uuid"])
         return filepath
+
+    def save_scenes(self, updates):
+        """
+        Save several scenes at once, e.g. after a project-wide replace. The structure is saved only once.
+
+        Args:
+            updates (list): (hierarchy, content) tuples.
+
+        Returns:
+            dict: The saved revision filepath by hierarchy tuple, for the scenes that changed.
+        """
+        saved = {}
+        for hierarchy, content in updates:
+            node = self._get_node_by_hierarchy(hierarchy)
+            if node:
+                filepath = self._store_scene(node, hierarchy, content)
+                if filepath:
+                    saved[tuple(hierarchy)] = filepath
+        if saved:
+            self.save_structure()
+            for hierarchy in saved:
+                self.structureChanged.emit(list(hierarchy), self._get_node_by_hierarchy(hierarchy)["uuid"])
+        return saved
     
     def save_summary(self, hierarchy, summary_text):
         node = self._get_node_by_hierarchy(hierarchy)
@@ -240,14 +304,70 @@ class ProjectModel(QObject):
         return None
 
     
+    def _rebuild_node_index(self):
+        """
+        Index every node by UUID and by hierarchy so lookups don't walk the structure.
+        Each indexed node also records its parent's child list and its position in it.
+        """
+        self._nodes_by_uuid = {}
+        self._nodes_by_hierarchy = {}
+        self._positions = {}  # hierarchy tuple -> (sibling list, index)
+        acts = self.structure.get("acts", [])
+        self._child_lists = {(): acts}
+        for index, act in enumerate(acts):
+            self._index_subtree(act, (act.get("name"),), acts, index)
+
+    def _index_subtree(self, node, key, siblings, index):
+        # The first node with a given name wins, as in a linear walk
+        if self._nodes_by_hierarchy.setdefault(key, node) is node:
+            self._positions[key] = (siblings, index)
+        if node.get("uuid"):
+            self._nodes_by_uuid.setdefault(node["uuid"], node)
+        child_key = "chapters" if len(key) == 1 else "scenes"
+        if child_key in node:
+            children = node[child_key]
+            self._child_lists[key] = children
+            for child_index, child in enumerate(children):
+                self._index_subtree(child, key + (child.get("name"),), children, child_index)
+
+    def _reindex_positions(self, parent_key, siblings, start):
+        """Record the new positions of the siblings from start on, after a node before them was removed."""
+        for index in range(start, len(siblings)):
+            key = parent_key + (siblings[index].get("name"),)
+            if self._nodes_by_hierarchy.get(key) is siblings[index]:
+                self._positions[key] = (siblings, index)
+
+    def _unindex_subtree(self, node, key):
+        if self._nodes_by_hierarchy.get(key) is node:
+            del self._nodes_by_hierarchy[key]
+            self._positions.pop(key, None)
+        if self._nodes_by_uuid.get(node.get("uuid")) is node:
+            del self._nodes_by_uuid[node["uuid"]]
+        child_key = "chapters" if len(key) == 1 else "scenes"
+        self._child_lists.pop(key, None)
+        for child in node.get(child_key, []):
+            self._unindex_subtree(child, key + (child.get("name"),))
+
+    def _walk_hierarchy(self, hierarchy):
+        current = self.structure.get("acts", [])
+        for level, name in enumerate(hierarchy):
+            item = next((item for item in current if item.get("name") == name), None)
+            if item is None or level == len(hierarchy) - 1:
+                return item
+            current = item.get("chapters" if level == 0 else "scenes", [])
+        return None
+
     def _find_node_by_uuid(self, nodes, target_uuid):
+        if nodes is self.structure.get("acts"):
+            node = self._nodes_by_uuid.get(target_uuid)
+            if node is not None and node.get("uuid") == target_uuid:
+                return node
         for node in nodes:
             if node.get("uuid") == target_uuid:
                 return node
-            for child in node.get("chapters", []) + node.get("scenes", []):
-                result = self._find_node_by_uuid([child], target_uuid)
-                if result:
-                    return result
+            result = self._find_node_by_uuid(chain(node.get("chapters", []), node.get("scenes", [])), target_uuid)
+            if result:
+                return result
         return None
     
     def _check_duplicate_name(self, nodes, name, exclude_uuid=None):
@@ -268,44 +388,47 @@ class ProjectModel(QObject):
             "chapters": []
         }
         self.structure.setdefault("acts", []).append(new_act)
+        self._child_lists[()] = self.structure["acts"]
+        self._index_subtree(new_act, (act_name,), self.structure["acts"], len(self.structure["acts"]) - 1)
         self.save_structure()
         self.structureChanged.emit([act_name], new_act["uuid"])
 
     def add_chapter(self, act_name, chapter_name):
-        for act in self.structure.get("acts", []):
-            if act.get("name") == act_name:
-                if self._check_duplicate_name(act.get("chapters", []), chapter_name):
-                    self.errorOccurred.emit(_("A Chapter named '{}' already exists in Act '{}'. Please choose a unique name.").format(chapter_name, act_name))
-                    return
-                new_chapter = {
-                    "uuid": str(uuid.uuid4()),
-                    "name": chapter_name,
-                    "summary": _("This is the summary for {}.").format(chapter_name),
-                    "has_summary": False,
-                    "scenes": []
-                }
-                act.setdefault("chapters", []).append(new_chapter)
-                self.save_structure()
-                self.structureChanged.emit([act_name, chapter_name], new_chapter["uuid"])
-                break
+        act = self._get_node_by_hierarchy([act_name])
+        if act is None:
+            return
+        if self._check_duplicate_name(act.get("chapters", []), chapter_name):
+            self.errorOccurred.emit(_("A Chapter named '{}' already exists in Act '{}'. Please choose a unique name.").format(chapter_name, act_name))
+            return
+        new_chapter = {
+            "uuid": str(uuid.uuid4()),
+            "name": chapter_name,
+            "summary": _("This is the summary for {}.").format(chapter_name),
+            "has_summary": False,
+            "scenes": []
+        }
+        act.setdefault("chapters", []).append(new_chapter)
+        self._child_lists[(act_name,)] = act["chapters"]
+        self._index_subtree(new_chapter, (act_name, chapter_name), act["chapters"], len(act["chapters"]) - 1)
+        self.save_structure()
+        self.structureChanged.emit([act_name, chapter_name], new_chapter["uuid"])
 
     def add_scene(self, act_name, chapter_name, scene_name):
-        for act in self.structure.get("acts", []):
-            if act.get("name") == act_name:
-                for chapter in act.get("chapters", []):
-                    if chapter.get("name") == chapter_name:
-                        if self._check_duplicate_name(chapter.get("scenes", []), scene_name):
-                            self.errorOccurred.emit(_("A Scene named '{}' already exists in Chapter '{}' of Act '{}'. Please choose a unique name.").format(scene_name, chapter_name, act_name))
-                            return
-                        new_scene = {
-                            "uuid": str(uuid.uuid4()),
-                            "name": scene_name
-                        }
-                        chapter.setdefault("scenes", []).append(new_scene)
-                        self.save_structure()
-                        self.structureChanged.emit([act_name, chapter_name, scene_name], new_scene["uuid"])
-                        break
-                break
+        chapter = self._get_node_by_hierarchy([act_name, chapter_name])
+        if chapter is None:
+            return
+        if self._check_duplicate_name(chapter.get("scenes", []), scene_name):
+            self.errorOccurred.emit(_("A Scene named '{}' already exists in Chapter '{}' of Act '{}'. Please choose a unique name.").format(scene_name, chapter_name, act_name))
+            return
+        new_scene = {
+            "uuid": str(uuid.uuid4()),
+            "name": scene_name
+        }
+        chapter.setdefault("scenes", []).append(new_scene)
+        self._child_lists[(act_name, chapter_name)] = chapter["scenes"]
+        self._index_subtree(new_scene, (act_name, chapter_name, scene_name), chapter["scenes"], len(chapter["scenes"]) - 1)
+        self.save_structure()
+        self.structureChanged.emit([act_name, chapter_name, scene_name], new_scene["uuid"])
 
     def rename_node(self, hierarchy, new_name):
         node = self._get_node_by_hierarchy(hierarchy)
@@ -319,7 +442,10 @@ class ProjectModel(QObject):
             self.errorOccurred.emit(_("A {} named '{}' already exists {}. Please choose a unique name.").format(level_name, new_name, parent_context))
             return
         old_hierarchy = hierarchy.copy()
+        siblings, index = self._get_parent_and_index(old_hierarchy)
+        self._unindex_subtree(node, tuple(old_hierarchy))
         node["name"] = new_name
+        self._index_subtree(node, tuple(old_hierarchy[:-1]) + (new_name,), siblings, index)
         self.save_structure()
         new_hierarchy = old_hierarchy[:-1] + [new_name]
         self.structureChanged.emit(new_hierarchy, uuid_val)
@@ -327,13 +453,11 @@ class ProjectModel(QObject):
     def _get_parent_nodes(self, hierarchy):
         if not hierarchy:
             return []
-        current = self.structure.get("acts", [])
-        for level, name in enumerate(hierarchy[:-1]):
-            for item in current:
-                if item.get("name") == name:
-                    current = item.get("chapters" if level == 0 else "scenes", [])
-                    break
-        return current
+        siblings = self._child_lists.get(tuple(hierarchy[:-1]))
+        if siblings is not None:
+            return siblings
+        parent = self._get_node_by_hierarchy(hierarchy[:-1])
+        return parent.get("chapters" if len(hierarchy) == 2 else "scenes", []) if parent else []
     
     def delete_node(self, hierarchy):
         node = self._get_node_by_hierarchy(hierarchy)
@@ -341,28 +465,32 @@ class ProjectModel(QObject):
         parent, index = self._get_parent_and_index(hierarchy)
         if parent and index is not None:
             parent.pop(index)
+            self._unindex_subtree(node, tuple(hierarchy))
+            self._reindex_positions(tuple(hierarchy[:-1]), parent, index)
             self.save_structure()
             self.structureChanged.emit(hierarchy, uuid_val)
 
     def _get_node_by_hierarchy(self, hierarchy):
-        current = self.structure.get("acts", [])
-        for level, name in enumerate(hierarchy):
-            for item in current:
-                if item.get("name") == name:
-                    if level == len(hierarchy) - 1:
-                        return item
-                    current = item.get("chapters" if level == 0 else "scenes", [])
-                    break
-        return None
+        if not hierarchy:
+            return None
+        node = self._nodes_by_hierarchy.get(tuple(hierarchy))
+        if node is not None and node.get("name") == hierarchy[-1]:
+            return node
+        # The structure may have been changed without going through the model
+        node = self._walk_hierarchy(hierarchy)
+        if node is not None:
+            self._rebuild_node_index()
+        return node
 
     def _get_parent_and_index(self, hierarchy):
-        current = self.structure.get("acts", [])
-        for level, name in enumerate(hierarchy[:-1]):
-            for item in current:
-                if item.get("name") == name:
-                    current = item.get("chapters" if level == 0 else "scenes", [])
-                    break
-        for i, item in enumerate(current):
-            if item.get("name") == hierarchy[-1]:
-                return current, i
-        return None, None
\ No newline at end of file
+        node = self._get_node_by_hierarchy(hierarchy)
+        if node is None:
+            return None, None
+        siblings, index = self._positions.get(tuple(hierarchy), (None, None))
+        if siblings is None or index >= len(siblings) or siblings[index] is not node:
+            # The structure was changed without going through the model
+            self._rebuild_node_index()
+            siblings, index = self._positions.get(tuple(hierarchy), (None, None))
+            if siblings is None or siblings[index] is not node:
+                return None, None
+        return siblings, index
@@ -25,9 +25,11 @@ from .embedded_prompts_panel import EmbeddedPromptsPanel
 from compendium.compendium_panel import CompendiumPanel
 from util.tts_manager import WW_TTSManager
 from settings.backup_manager import show_backup_dialog
+from settings.autosave_manager import read_autosave
 from settings.llm_api_aggregator import WWApiAggregator
 from settings.llm_worker import LLMWorker
 from settings.settings_manager import WWSettingsManager
+from settings.persistence_queue import WWPersistenceQueue
 from settings.theme_manager import ThemeManager
 from workshop.workshop import WorkshopWindow
 from util.text_analysis_gui import TextAnalysisApp
@@ -265,6 +267,7 @@ class ProjectWindow(QMainWindow):
         self.focus_mode_shortcut = QShortcut(QKeySequence("F11"), self)
         self.focus_mode_shortcut.activated.connect(self.open_focus_mode)
         self.bottom_stack.summary_controller.progress_updated.connect(self.bottom_stack._update_progress)
+        self.model.saveFailed.connect(self.on_save_failed)
 
     def handle_pov_character_change(self, index=0):
         value = self.bottom_stack.pov_character_combo.currentText()
@@ -410,6 +413,10 @@ class ProjectWindow(QMainWindow):
             return
         if hasattr(self, 'autosave_timer') and self.autosave_timer.isActive():
             self.autosave_timer.stop()
+        self.search_panel.cancel_search()
+        # Make sure queued scene and structure writes reach the disk before the window goes away
+        WWPersistenceQueue.flush()
+        self.model.close()
         self.write_settings()
         a0.accept()
 
@@ -533,6 +540,11 @@ class ProjectWindow(QMainWindow):
         self.last_save_label.setText(_("Last Saved: {}").format(now))
         self.statusBar().showMessage(message, 3000)
 
+    def on_save_failed(self, path, error):
+        # Let the next autosave or scene switch write the editor content again
+        self.model.unsaved_changes = True
+        QMessageBox.warning(self, _("Save Error"), _("Could not save {}:\n{}").format(path, error))
+
     def autosave_preview(self):
         pass
 
@@ -544,6 +556,7 @@ class ProjectWindow(QMainWindow):
         level = self.project_tree.get_item_level(current_item)
         hierarchy = self.get_item_hierarchy(current_item)
         is_scene = level >= 2
+        WWPersistenceQueue.flush()  # The dialog lists backups straight from the project folder
         backup_file_path = show_backup_dialog(
             self,
             self.model.project_name,
@@ -552,8 +565,7 @@ class ProjectWindow(QMainWindow):
             is_scene
         )
         if backup_file_path:
-            with open(backup_file_path, "r", encoding="utf-8") as f:
-                content = f.read()
+            content = read_autosave(backup_file_path)
             editor = self.scene_editor.editor
             if backup_file_path.endswith(".html"):
                 editor.setHtml(content)
@@ -0,0 +1,167 @@
+from PyQt5.QtGui import QTextDocument, QTextCursor
+
+PUNCTUATION = ",.!?;"
+
+# Unicode ranges for CJK characters
+CJK_RANGES = [
+    (0x4E00, 0x9FFF),  # CJK Unified Ideographs
+    (0xAC00, 0xD7AF),  # Hangul Syllables
+    (0x3040, 0x309F),  # Hiragana
+    (0x30A0, 0x30FF),  # Katakana
+    (0xFF00, 0xFFEF),  # Full-width forms (includes CJK punctuation)
+]
+
+def is_cjk_char(char):
+    """Check if a character is in CJK Unicode ranges."""
+    if not char:
+        return False
+    codepoint = ord(char)
+    return any(start <= codepoint <= end for start, end in CJK_RANGES)
+
+def is_cjk_text(text):
+    """Check if the text contains CJK characters (at least 50% of characters)."""
+    if not text:
+        return False
+    cjk_count = sum(1 for char in text if is_cjk_char(char))
+    return cjk_count / len(text) >= 0.5
+
+def is_sentence_start(plain_content, position):
+    """Check if the position is at the start of a sentence (after a period, possibly with spaces)."""
+    if position == 0:
+        return False
+    # Look backward for the first non-space character
+    i = position - 1
+    while i >= 0 and plain_content[i].isspace():
+        i -= 1
+    return i >= 0 and plain_content[i] == "."
+
+def find_next_non_space_char(plain_content, position):
+    """Find the position of the next non-space character starting from position."""
+    i = position
+    while i < len(plain_content) and plain_content[i].isspace():
+        i += 1
+    return i if i < len(plain_content) else -1
+
+def plan_replacement(plain_content, pos, match_text, replace_text):
+    """
+    Work out the text edits that replace one match, in the coordinates of the unmodified text.
+
+    Removing a match (an empty replacement outside CJK text) also removes a space so no
+    double space or space before punctuation is left behind; at the start of a sentence a
+    following punctuation mark is dropped and the next word is capitalized.
+
+    Returns:
+        A list of (start, end, text) edits in ascending order.
+    """
+    end = pos + len(match_text)
+    if replace_text or is_cjk_text(match_text):
+        return [(pos, end, replace_text)]
+    before_char = plain_content[pos - 1] if pos > 0 else ""
+    after_char = plain_content[end] if end < len(plain_content) else ""
+    start = pos
+    if before_char.isspace() and after_char.isspace():
+        end += 1  # Remove one space to avoid double spaces
+    elif after_char and after_char in PUNCTUATION and before_char.isspace():
+        start -= 1  # Remove the space before punctuation
+    edits = []
+    if is_sentence_start(plain_content, pos):
+        if after_char and after_char in PUNCTUATION and end == pos + len(match_text):
+            end += 1  # Drop punctuation left dangling at the start of the sentence
+        next_char_pos = find_next_non_space_char(plain_content, end)
+        if next_char_pos != -1 and plain_content[next_char_pos].isalpha():
+            capitalized = plain_content[next_char_pos].upper()
+            if capitalized != plain_content[next_char_pos]:
+                edits.append((next_char_pos, next_char_pos + 1, capitalized))
+    return [(start, end, "")] + edits
+
+def replace_in_scene(content, matches, replace_text):
+    """
+    Apply every replacement in one scene in a single pass over one QTextDocument.
+
+    Parameters:
+        content (str): The scene HTML.
+        matches (list): (position, match_text) tuples in plain-text coordinates.
+        replace_text (str): The replacement.
+
+    Returns:
+        A tuple (new HTML, new plain text, {old position: new position}) for the matches
+        that were replaced; matches that no longer fit the text or overlap an earlier one
+        are skipped.
+    """
+    doc = QTextDocument()
+    doc.setHtml(content)
+    plain_content = doc.toPlainText()
+
+    edits = []
+    planned = []  # (old position, index of the match's first edit)
+    last_end = -1
+    for pos, match_text in sorted(matches):
+        if plain_content[pos:pos + len(match_text)] != match_text or not match_text:
+            continue
+        match_edits = plan_replacement(plain_content, pos, match_text, replace_text)
+        if match_edits[0][0] < last_end:
+            if pos < last_end:
+                continue  # Overlaps the previous match
+            match_edits = [(pos, pos + len(match_text), replace_text)]  # Its space went with the previous match
+        planned.append((pos, len(edits)))
+        edits.extend(match_edits)
+        last_end = match_edits[-1][1]
+
+    # Apply from the end so earlier positions stay valid, as one undoable edit block
+    cursor = QTextCursor(doc)
+    cursor.beginEditBlock()
+    for start, end, text in reversed(edits):
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.insertText(text)  # Inherits the formatting of the replaced text
+    cursor.endEditBlock()
+
+    # New positions follow from the size change of all the edits before each match
+    new_positions = {}
+    shift = 0
+    applied = 0
+    for pos, first_edit in planned:
+        while applied < first_edit:
+            start, end, text = edits[applied]
+            shift += len(text) - (end - start)
+            applied += 1
+        new_positions[pos] = edits[first_edit][0] + shift
+    return doc.toHtml(), doc.toPlainText(), new_positions
+
+class ReplaceTransaction:
+    """
+    Project-wide record of one Replace All, undone as a whole.
+
+    Keeps the content every scene had before the replacement and the revision
+    the replacement wrote. Undo restores a scene only if that revision is still
+    its latest one, so later edits are never overwritten.
+    """
+
+    def __init__(self, search_text, replace_text):
+        self.search_text = search_text
+        self.replace_text = replace_text
+        self.scenes = []  # (hierarchy, content before, revision written by the replacement)
+
+    def record(self, hierarchy, content_before, filepath):
+        self.scenes.append((hierarchy, content_before, filepath))
+
+    def __len__(self):
+        return len(self.scenes)
+
+    def undo(self, model):
+        """
+        Restore the scenes through the model, writing each of them once.
+
+        Returns:
+            A tuple (hierarchies restored, number of scenes skipped because they changed since).
+        """
+        updates = []
+        skipped = 0
+        for hierarchy, content_before, filepath in self.scenes:
+            node = model._get_node_by_hierarchy(hierarchy)
+            if node is None or node.get("latest_file") != filepath:
+                skipped += 1
+                continue
+            updates.append((hierarchy, content_before))
+        saved = model.save_scenes(updates)
+        return [hierarchy for hierarchy, _ in updates if tuple(hierarchy) in saved], skipped
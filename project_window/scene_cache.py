@@ -0,0 +1,88 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+from settings.persistence_queue import WWPersistenceQueue
+
+DEFAULT_BUDGET_MB = 64
+
+class _CachedScene:
+    __slots__ = ("path", "mtime", "content", "size")
+
+    def __init__(self, path: str, mtime: Optional[float], content: str):
+        self.path = path
+        self.mtime = mtime  # None while the file is still waiting in the persistence queue
+        self.content = content
+        self.size = len(content) * 2  # Rough in-memory size; most scene text fits two bytes per character
+
+class SceneContentCache:
+    """
+    In-memory cache of scene contents keyed by scene UUID.
+
+    Each entry remembers the autosave file it was read from and that file's
+    modification time, so a file changed behind the model's back (a restored
+    backup, another instance) is read again. The least recently used scenes are
+    evicted once the cached text exceeds the memory budget.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_MB * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # uuid -> _CachedScene
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def get(self, uuid_val: str, path: Optional[str]) -> Optional[str]:
+        """Return the cached content of a scene if it was read from path and the file hasn't changed since."""
+        with self._lock:
+            entry = self._entries.get(uuid_val)
+            if entry is None:
+                return None
+            if path != entry.path:
+                self._discard(uuid_val)
+                return None
+            if WWPersistenceQueue.read(path) is None:
+                mtime = self._mtime(path)
+                if mtime is None:
+                    self._discard(uuid_val)
+                    return None
+                if entry.mtime is None:
+                    entry.mtime = mtime  # Our own queued write has reached the disk
+                elif entry.mtime != mtime:
+                    self._discard(uuid_val)
+                    return None
+            self._entries.move_to_end(uuid_val)
+            return entry.content
+
+    def put(self, uuid_val: str, path: str, content: str) -> None:
+        """Cache the content of a scene as stored in path."""
+        mtime = None if WWPersistenceQueue.read(path) is not None else self._mtime(path)
+        entry = _CachedScene(path, mtime, content)
+        with self._lock:
+            self._discard(uuid_val)
+            if entry.size > self.budget_bytes:
+                return
+            self._entries[uuid_val] = entry
+            self._total += entry.size
+            while self._total > self.budget_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, uuid_val: str) -> None:
+        with self._lock:
+            self._discard(uuid_val)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+    def _discard(self, uuid_val: str) -> None:
+        entry = self._entries.pop(uuid_val, None)
+        if entry is not None:
+            self._total -= entry.size
@@ -9,10 +9,11 @@ from PyQt5.QtWidgets import (
     QFontComboBox, QComboBox, QLabel, QMessageBox, QTextEdit, QStyle, QShortcut
 )
 from PyQt5.QtCore import Qt, QTimer
+from PyQt5 import sip
 from PyQt5.QtGui import QFont, QTextCursor, QColor, QTextCharFormat, QPen, QKeySequence, QIcon, QPixmap
 
 from .focus_mode import PlainTextEdit
-from spylls.hunspell import Dictionary
+from .spellcheck_service import get_spellcheck_service, start_spellcheck_worker, SpellcheckBlockData
 from util.find_dialog import FindDialog
 from settings.theme_manager import ThemeManager
 from util.color_manager import ColorManager
@@ -32,8 +33,9 @@ class SceneEditor(QWidget):
         self.dict_dir = os.path.join(project_dir, "assets", "dictionaries")
 
         self.languages = {}
-        self.dictionary = None
+        self.dictionary = None  # SpellcheckService of the selected language
         self.extra_selections = []
+        self.spellcheck_worker = None  # Background lookups of words not seen before
         self.settings_file = os.path.join(self.dict_dir, "editor_settings.json")
         self.saved_language = "Off"
         
@@ -147,6 +149,7 @@ class SceneEditor(QWidget):
         e.customContextMenuRequested.connect(self.show_context_menu)
         e.textChanged.connect(self.controller.on_editor_text_changed)
         e.textChanged.connect(self.start_spellcheck_timer)
+        e.document().contentsChange.connect(self.mark_spellcheck_dirty)
         e.cursorPositionChanged.connect(self.update_toolbar_state)
         e.selectionChanged.connect(self.update_toolbar_state)
 
@@ -245,8 +248,9 @@ class SceneEditor(QWidget):
         dict_base = os.path.join(self.dict_dir, lang)
         try:
             # Load the dictionary from "<dict_base>.aff" and "<dict_base>.dic"
-            self.dictionary = Dictionary.from_files(dict_base)
+            self.dictionary = get_spellcheck_service(dict_base)
             # Run spell‑check immediately
+            self.reset_spellcheck()
             self.check_spelling()
             # Remember selection
             self.save_language_preference(lang)
@@ -286,7 +290,8 @@ class SceneEditor(QWidget):
         dict_base = os.path.join(self.dict_dir, self.saved_language)
         try:
             # Load the dictionary from "<dict_base>.aff" and "<dict_base>.dic"
-            self.dictionary = Dictionary.from_files(dict_base)
+            self.dictionary = get_spellcheck_service(dict_base)
+            self.reset_spellcheck()
             # If there's already text in the editor, highlight misspellings right away
             if self.editor.toPlainText():
                 self.check_spelling()
@@ -301,14 +306,29 @@ class SceneEditor(QWidget):
         if self.dictionary:
             self.spellcheck_timer.start()
 
-    def check_spelling(self):
-        """Check spelling and highlight misspelled words with improved visibility."""
-        if not self.dictionary:
-            return
-        text = self.editor.toPlainText()
-        self.extra_selections = []
-        
-        # Create enhanced format for spelling errors
+    def mark_spellcheck_dirty(self, position, removed, added):
+        """Flag the paragraphs touched by an edit, so the next check looks at them again."""
+        document = self.editor.document()
+        block = document.findBlock(position)
+        last = document.findBlock(position + added)
+        while block.isValid():
+            data = block.userData()
+            if isinstance(data, SpellcheckBlockData):
+                data.dirty = True
+            if block == last:
+                break
+            block = block.next()
+
+    def reset_spellcheck(self):
+        """Have the next check look at every paragraph again, e.g. after the dictionary changed."""
+        block = self.editor.document().begin()
+        while block.isValid():
+            data = block.userData()
+            if isinstance(data, SpellcheckBlockData):
+                data.dirty = True
+            block = block.next()
+
+    def spelling_error_format(self):
         fmt = QTextCharFormat()
         fmt.setUnderlineStyle(QTextCharFormat.WaveUnderline)
         fmt.setUnderlineColor(QColor(255, 0, 0))  # Bright red
@@ -317,22 +337,67 @@ class SceneEditor(QWidget):
         pen = QPen(QColor(255, 0, 0))
         pen.setWidth(2)  # Thicker underline
         fmt.setUnderlineColor(pen.color())
-        
-        # Use improved regex for word detection that can handle apostrophes and hyphens
-        # This matches words and contractions better than the simple \w+ pattern
-        word_pattern = r'\b[a-zA-Z]+[\'-]?[a-zA-Z]*\b'
-        
-        for m in re.finditer(word_pattern, text):
-            w = m.group()
-            if not self.dictionary.lookup(w):
-                cur = QTextCursor(self.editor.document())
-                cur.setPosition(m.start())
-                cur.setPosition(m.end(), QTextCursor.KeepAnchor)
-                sel = QTextEdit.ExtraSelection()
-                sel.cursor = cur
-                sel.format = fmt
-                self.extra_selections.append(sel)
-        self.editor.setExtraSelections(self.extra_selections)
+        return fmt
+
+    def check_spelling(self):
+        """
+        Check the spelling of the paragraphs changed since the last check and underline misspelled words.
+        Words that were never looked up are looked up in the background first; the check runs again when they are done.
+        """
+        if not self.dictionary:
+            return
+        if self.spellcheck_worker is not None:
+            return  # The check runs again when the lookups are done
+        document = self.editor.document()
+        changed = []  # (block, words) of the paragraphs to check
+        unknown = set()
+        block = document.begin()
+        while block.isValid():
+            data = block.userData()
+            if not isinstance(data, SpellcheckBlockData) or data.dirty:
+                words = self.dictionary.words_in(block.text())
+                changed.append((block, words))
+                unknown.update(word for _, _, word in words if self.dictionary.cached(word) is None)
+            block = block.next()
+        if unknown:
+            self.spellcheck_worker = start_spellcheck_worker(self.dictionary, sorted(unknown), self.on_spellcheck_lookups_done)
+            return
+
+        fmt = self.spelling_error_format()
+        for block, words in changed:
+            selections = []
+            for start, end, word in words:
+                if not self.dictionary.is_correct(word):
+                    cur = QTextCursor(document)
+                    cur.setPosition(block.position() + start)
+                    cur.setPosition(block.position() + end, QTextCursor.KeepAnchor)
+                    sel = QTextEdit.ExtraSelection()
+                    sel.cursor = cur
+                    sel.format = fmt
+                    selections.append(sel)
+            block.setUserData(SpellcheckBlockData(selections))
+        if changed:
+            self.apply_spellcheck_selections()
+
+    def on_spellcheck_lookups_done(self):
+        if sip.isdeleted(self):
+            return  # The editor was closed while its lookups ran; the worker outlives it
+        self.spellcheck_worker = None
+        self.check_spelling()
+
+    def apply_spellcheck_selections(self):
+        """Show the stored selections of every paragraph; their cursors have followed the edits since."""
+        self.extra_selections = []
+        block = self.editor.document().begin()
+        while block.isValid():
+            data = block.userData()
+            if isinstance(data, SpellcheckBlockData):
+                self.extra_selections.extend(data.selections)
+            block = block.next()
+        if self.find_dialog is not None and self.find_dialog.isVisible():
+            self.find_dialog.apply_highlights()  # Shows the spelling errors under its own highlights
+        else:
+            self.editor.setExtraSelections(self.extra_selections)
 
     def show_context_menu(self, pos):
         menu = self.editor.createStandardContextMenu(pos)
@@ -341,10 +406,18 @@ class SceneEditor(QWidget):
             act = menu.addAction(_("Rewrite"))
             act.triggered.connect(self.controller.rewrite_selected_text)
         if self.dictionary:
+            # Select the word as the spellchecker splits it, not as Qt does
             wc = self.editor.cursorForPosition(pos)
-            wc.select(QTextCursor.WordUnderCursor)
-            w = wc.selectedText()
-            if w and not self.dictionary.lookup(w):
+            block = wc.block()
+            offset = wc.position() - block.position()
+            w = ""
+            for start, end, word in self.dictionary.words_in(block.text()):
+                if start <= offset <= end:
+                    wc.setPosition(block.position() + start)
+                    wc.setPosition(block.position() + end, QTextCursor.KeepAnchor)
+                    w = word
+                    break
+            if w and not self.dictionary.is_correct(w):
                 sugs = self.dictionary.suggest(w)
                 if sugs:
                     sm = menu.addMenu(_("Suggestions"))
@@ -465,7 +538,7 @@ class SceneEditor(QWidget):
             
     def open_find_dialog(self):
         if self.find_dialog is None:
-            self.find_dialog = FindDialog(self.editor, self)
+            self.find_dialog = FindDialog(self.editor, self, base_selections=lambda: self.extra_selections)
         self.find_dialog.show()
         self.find_dialog.raise_()
         self.find_dialog.search_field.setFocus()
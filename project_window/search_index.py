@@ -0,0 +1,205 @@
+import os
+import re
+import json
+import threading
+from typing import Optional
+from settings.persistence_queue import WWPersistenceQueue
+from settings.autosave_manager import get_project_folder
+from settings.plain_text import WWPlainText
+
+INDEX_FILENAME = "search_index.json"
+INDEX_VERSION = 2
+TOKEN_PATTERN = re.compile(r"\w+")
+
+class _SceneEntry:
+    __slots__ = ("file", "digest", "text", "html", "lowered", "tokens")
+
+    def __init__(self, file: Optional[str], digest: Optional[str] = None, html: Optional[str] = None):
+        self.file = file  # The autosave revision the text was taken from
+        self.digest = digest  # Content digest; the plain text itself is kept by the shared plain-text cache
+        self.text = None
+        self.html = html  # Content saved since the last search, converted on first use
+        self.lowered = None
+        self.tokens = None  # token -> list of start positions
+
+class SearchIndex:
+    """
+    Persistent full-text index of the scenes in one project.
+
+    For every scene UUID the index records its latest revision file and the
+    digest of its content. The plain text itself is owned by the shared
+    plain-text cache, which keeps one file per digest in the project folder,
+    so searches neither read nor parse any HTML once a scene has been indexed.
+    A token inverted index (lower-cased word -> scene -> positions) is built in
+    memory from the text and answers whole-word searches directly.
+    ProjectModel.save_scene hands new content to update(); it is only
+    converted to plain text when next searched.
+    """
+
+    def __init__(self, project_folder: str):
+        self.project_folder = project_folder
+        self.index_path = os.path.join(project_folder, INDEX_FILENAME)
+        self._scenes = None  # uuid -> _SceneEntry
+        self._postings = {}  # token -> {uuid: [positions]}
+        self._lock = threading.RLock()
+        self._dirty = False
+
+    def _ensure_loaded(self):
+        if self._scenes is not None:
+            return
+        self._scenes = {}
+        raw = WWPersistenceQueue.read(self.index_path)
+        try:
+            if raw is None and os.path.exists(self.index_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    raw = f.read()
+            data = json.loads(raw) if raw else {}
+        except (OSError, ValueError) as e:
+            print(f"Error loading search index {self.index_path}: {e}")
+            data = {}
+        if data.get("version") != INDEX_VERSION:
+            return
+        for uuid_val, scene in data.get("scenes", {}).items():
+            if scene.get("digest"):
+                self._scenes[uuid_val] = _SceneEntry(scene.get("file"), scene["digest"])
+
+    def save(self):
+        """Queue the index file to be rewritten if anything changed since it was last saved."""
+        with self._lock:
+            if not self._dirty:
+                return
+            scenes = {uuid_val: {"file": entry.file, "digest": entry.digest}
+                      for uuid_val, entry in self._scenes.items() if entry.digest is not None}
+            data = json.dumps({"version": INDEX_VERSION, "scenes": scenes}, ensure_ascii=False)
+            self._dirty = False
+        WWPersistenceQueue.write(self.index_path, data)
+
+    def _add_postings(self, uuid_val: str, entry: _SceneEntry):
+        entry.lowered = entry.text.lower()
+        entry.tokens = {}
+        for match in TOKEN_PATTERN.finditer(entry.lowered):
+            entry.tokens.setdefault(match.group(), []).append(match.start())
+        for token, positions in entry.tokens.items():
+            self._postings.setdefault(token, {})[uuid_val] = positions
+
+    def _remove_postings(self, uuid_val: str, entry: _SceneEntry):
+        for token in entry.tokens or ():
+            scenes = self._postings.get(token)
+            if scenes is not None:
+                scenes.pop(uuid_val, None)
+                if not scenes:
+                    del self._postings[token]
+        entry.tokens = None
+        entry.lowered = None
+
+    def update(self, uuid_val: str, filepath: str, content: str) -> None:
+        """Record newly saved scene content. The plain text is derived lazily on the next search."""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._scenes.get(uuid_val)
+            if entry is not None:
+                self._remove_postings(uuid_val, entry)
+            self._scenes[uuid_val] = _SceneEntry(filepath, html=content)
+
+    def remove(self, uuid_val: str) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._scenes.pop(uuid_val, None)
+            if entry is not None:
+                self._remove_postings(uuid_val, entry)
+                self._dirty = True
+
+    def is_current(self, uuid_val: str, filepath: Optional[str]) -> bool:
+        """Return whether the index holds the text of the given revision of a scene."""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entry(uuid_val)
+            return entry is not None and filepath is not None and entry.file == filepath
+
+    def _entry(self, uuid_val: str) -> Optional[_SceneEntry]:
+        """Return the entry of a scene with its text loaded, or None if the scene has to be indexed again."""
+        entry = self._scenes.get(uuid_val)
+        if entry is None or entry.text is not None:
+            return entry
+        if entry.html is not None:
+            entry.digest, entry.text = WWPlainText.get_with_digest(entry.html, self.project_folder)
+            entry.html = None
+            self._dirty = True
+        else:
+            entry.text = WWPlainText.lookup(self.project_folder, entry.digest)
+            if entry.text is None:
+                # The cached text is gone; the revision is read again
+                self.remove(uuid_val)
+                return None
+        self._add_postings(uuid_val, entry)
+        return entry
+
+    def text(self, uuid_val: str) -> Optional[str]:
+        """Return the indexed plain text of a scene."""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entry(uuid_val)
+            return entry.text if entry is not None else None
+
+    def retain(self, uuid_vals) -> None:
+        """Drop the scenes that are no longer part of the project."""
+        with self._lock:
+            self._ensure_loaded()
+            for uuid_val in set(self._scenes) - set(uuid_vals):
+                self.remove(uuid_val)
+
+    def find(self, uuid_val: str, needle: str, whole_word: bool = False) -> list:
+        """
+        Return the case-insensitive matches of a literal string in one scene.
+
+        Returns:
+            A list of (position, matched text) tuples in document order.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entry(uuid_val)
+            if entry is None or not needle:
+                return []
+            text, lowered = entry.text, entry.lowered
+            needle_lower = needle.lower()
+            needle_tokens = TOKEN_PATTERN.findall(needle_lower)
+            same_length = len(lowered) == len(text) and len(needle_lower) == len(needle)
+            if whole_word and same_length and needle_tokens and needle_tokens[0] == needle_lower:
+                # A single word is answered straight from the postings
+                return [(pos, text[pos:pos + len(needle)]) for pos in entry.tokens.get(needle_lower, [])]
+            # Every complete word inside the needle must occur in the scene
+            for token in needle_tokens[1:-1]:
+                if token not in entry.tokens:
+                    return []
+            if not same_length:
+                # Lower-casing changed string lengths; fall back to a regex to keep positions right
+                pattern = re.compile(re.escape(needle), re.IGNORECASE)
+                matches = [(m.start(), m.group()) for m in pattern.finditer(text)]
+            else:
+                matches = []
+                start = lowered.find(needle_lower)
+                while start != -1:
+                    matches.append((start, text[start:start + len(needle)]))
+                    start = lowered.find(needle_lower, start + 1)
+            if whole_word:
+                matches = [(pos, match) for pos, match in matches if self._is_whole_word(text, pos, len(match))]
+            return matches
+
+    @staticmethod
+    def _is_whole_word(text: str, pos: int, length: int) -> bool:
+        before = text[pos - 1] if pos > 0 else ""
+        after = text[pos + length] if pos + length < len(text) else ""
+        return not TOKEN_PATTERN.match(before) and not TOKEN_PATTERN.match(after)
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_search_index(project_name: str) -> SearchIndex:
+    """Return the shared search index of the given project."""
+    project_folder = get_project_folder(project_name)
+    key = os.path.normcase(os.path.abspath(project_folder))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = SearchIndex(project_folder)
+        return index
@@ -0,0 +1,288 @@
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QAbstractItemModel, QModelIndex, QRect, QEvent
+from PyQt5.QtGui import QBrush, QFont, QColor
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem, QToolTip
+from settings.autosave_manager import read_autosave
+from settings.theme_manager import ThemeManager
+
+MATCH_CONTEXT_LENGTH = 20  # Number of characters to show before and after the match
+BATCH_MATCHES = 200  # Matches collected before a batch of results is sent to the GUI thread
+CATEGORY_ROLE = Qt.UserRole + 1
+REPLACED_ROLE = Qt.UserRole + 2
+UNDO_ICON_SIZE = 16
+UNDO_ICON_MARGIN = 4
+
+def single_line_context(text, pos, match_length):
+    """Extract context around a match, stopping at newlines."""
+    # Find the start of the line (up to MATCH_CONTEXT_LENGTH characters before)
+    start_pos = max(0, pos - MATCH_CONTEXT_LENGTH)
+    prev_newline = text.rfind('\n', 0, pos)
+    if prev_newline != -1 and prev_newline >= start_pos:
+        start_pos = prev_newline + 1
+    # Find the end of the line (up to MATCH_CONTEXT_LENGTH characters after)
+    end_pos = min(len(text), pos + match_length + MATCH_CONTEXT_LENGTH)
+    next_newline = text.find('\n', pos + match_length)
+    if next_newline != -1 and next_newline <= end_pos:
+        end_pos = next_newline
+    # Extract context
+    context = text[start_pos:end_pos]
+    # Add ellipses if truncated
+    if start_pos > 0 and text[start_pos - 1] != '\n':
+        context = "..." + context
+    if end_pos < len(text) and text[end_pos] != '\n':
+        context += "..."
+    return context
+
+def search_scenes(index, scenes, search_text, pattern=None, whole_word=False, is_cancelled=None):
+    """
+    Match scenes against the search index, in project order.
+
+    Parameters:
+        index (SearchIndex): The project's search index.
+        scenes (list): (hierarchy, uuid, latest_file) tuples in project order.
+        search_text (str): The literal text to find, used when pattern is None.
+        pattern (re.Pattern, optional): Compiled regex to search for instead.
+        whole_word (bool): Only match literal text at word boundaries.
+        is_cancelled (callable, optional): Returns True once the remaining scenes should be skipped.
+
+    Yields:
+        (hierarchy, [(position, match_text, context), ...]) for every scene with matches.
+    """
+    for hierarchy, uuid_val, latest_file in scenes:
+        if is_cancelled and is_cancelled():
+            return
+        if latest_file and not index.is_current(uuid_val, latest_file):
+            # Not indexed yet, or changed outside the model
+            try:
+                content = read_autosave(latest_file)
+            except OSError as e:
+                print(f"Error reading {latest_file} for search: {e}")
+                continue
+            index.update(uuid_val, latest_file, content)
+        text = index.text(uuid_val)
+        if text is None:
+            continue
+        if pattern is not None:
+            matches = [(m.start(), m.group()) for m in pattern.finditer(text)]
+        else:
+            matches = index.find(uuid_val, search_text, whole_word=whole_word)
+        if matches:
+            yield hierarchy, [(pos, match, single_line_context(text, pos, len(match))) for pos, match in matches]
+
+class SearchWorker(QThread):
+    """Worker thread that matches scenes against the search index and streams the results in batches."""
+    results_signal = pyqtSignal(list)  # [(hierarchy, [(position, match_text, context), ...]), ...]
+    finished_signal = pyqtSignal(bool, int)  # completed, number of matches
+
+    def __init__(self, index, scenes, search_text, pattern=None, whole_word=False):
+        super().__init__()
+        self.index = index
+        self.scenes = scenes  # [(hierarchy, uuid, latest_file), ...] in project order
+        self.search_text = search_text
+        self.pattern = pattern  # Compiled regex, or None for a literal search
+        self.whole_word = whole_word
+        self.is_cancelled = False
+
+    def run(self):
+        batch = []
+        batch_matches = 0
+        total = 0
+        try:
+            for hierarchy, matches in search_scenes(self.index, self.scenes, self.search_text, self.pattern,
+                                                    self.whole_word, lambda: self.is_cancelled):
+                batch.append((hierarchy, matches))
+                batch_matches += len(matches)
+                total += len(matches)
+                if batch_matches >= BATCH_MATCHES:
+                    self.results_signal.emit(batch)
+                    batch = []
+                    batch_matches = 0
+            if self.is_cancelled:
+                self.finished_signal.emit(False, total)
+                return
+            if batch:
+                self.results_signal.emit(batch)
+            self.index.retain(uuid_val for _, uuid_val, _ in self.scenes)
+            self.index.save()
+            self.finished_signal.emit(True, total)
+        except Exception as e:
+            print(f"Search failed: {e}")
+            self.finished_signal.emit(False, total)
+
+    def cancel(self):
+        self.is_cancelled = True
+
+class SearchResult:
+    """A node of the results tree: an act, chapter or scene heading, or a single match."""
+    __slots__ = ("parent", "children", "row", "text", "payload", "replaced")
+
+    def __init__(self, parent, text, payload=None):
+        self.parent = parent
+        self.children = []
+        self.row = len(parent.children) if parent is not None else 0
+        self.text = text
+        self.payload = payload  # Match data (hierarchy, position, match_text, ...); None for headings
+        self.replaced = False
+
+class SearchResultsModel(QAbstractItemModel):
+    """
+    Item model for the search results tree.
+
+    Headings and matches are plain Python objects instead of one widget per
+    row, so tens of thousands of matches stay cheap to build and to scroll.
+    Results are appended scene by scene as the search worker streams them in.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = SearchResult(None, "")
+        self.category_background = ThemeManager.get_category_background_color()
+        self.bold_font = QFont()
+        self.bold_font.setBold(True)
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index_for(self, node):
+        if node is None or node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.node(parent)
+        if column != 0 or row < 0 or row >= len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.index_for(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section == 0:
+            return _("Search Results")
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        is_category = node.payload is None
+        if role == Qt.DisplayRole:
+            return node.text
+        if role == Qt.UserRole:
+            return node.payload
+        if role == CATEGORY_ROLE:
+            return "true" if is_category else None
+        if role == REPLACED_ROLE:
+            return node.replaced
+        if role == Qt.BackgroundRole and is_category:
+            return QBrush(self.category_background)
+        if role == Qt.FontRole and is_category:
+            return self.bold_font
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self.root = SearchResult(None, "")
+        self.endResetModel()
+
+    def _append(self, parent, text, payload=None):
+        first = len(parent.children)
+        self.beginInsertRows(self.index_for(parent), first, first)
+        node = SearchResult(parent, text, payload)
+        parent.children.append(node)
+        self.endInsertRows()
+        return node
+
+    def _heading(self, parent, name):
+        # Results arrive in project order, so a heading is either the last one added or a new one
+        if parent.children and parent.children[-1].text == name and parent.children[-1].payload is None:
+            return parent.children[-1]
+        return self._append(parent, name)
+
+    def add_scene_results(self, hierarchy, matches):
+        """
+        Add the matches of one scene under its act and chapter headings.
+
+        Parameters:
+            hierarchy (list): The [act, chapter, scene] names.
+            matches (list): (position, match_text, context) tuples.
+
+        Returns:
+            The match nodes that were added, in document order.
+        """
+        act_name, chapter_name, scene_name = hierarchy
+        chapter = self._heading(self._heading(self.root, act_name), chapter_name)
+        scene = self._append(chapter, scene_name)
+        self.beginInsertRows(self.index_for(scene), 0, len(matches) - 1)
+        for pos, match, context in matches:
+            scene.children.append(SearchResult(scene, context, {
+                "hierarchy": hierarchy,
+                "position": pos,
+                "match_text": match,
+                "original_match_text": match  # Store original for undo
+            }))
+        self.endInsertRows()
+        return scene.children
+
+    def update_match(self, node, context, payload, replaced):
+        """Change what a match row shows and the data it carries."""
+        node.text = context
+        node.payload = payload
+        node.replaced = replaced
+        index = self.index_for(node)
+        self.dataChanged.emit(index, index)
+
+    def set_category_background(self, color):
+        self.category_background = color
+        if self.root.children:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.root.children) - 1, 0), [Qt.BackgroundRole])
+
+class SearchResultDelegate(QStyledItemDelegate):
+    """Draws match rows, with an undo icon on the right of replaced matches."""
+    undo_requested = pyqtSignal(object)  # The SearchResult whose replacement should be undone
+
+    def __init__(self, tint_color=QColor("black"), parent=None):
+        super().__init__(parent)
+        self.set_tint(tint_color)
+
+    def set_tint(self, tint_color):
+        self.undo_icon = ThemeManager.get_tinted_icon("assets/icons/refresh-ccw.svg", tint_color)
+
+    @staticmethod
+    def _undo_rect(option):
+        rect = option.rect
+        return QRect(rect.right() - UNDO_ICON_SIZE - UNDO_ICON_MARGIN,
+                     rect.top() + (rect.height() - UNDO_ICON_SIZE) // 2,
+                     UNDO_ICON_SIZE, UNDO_ICON_SIZE)
+
+    def paint(self, painter, option, index):
+        if not index.data(REPLACED_ROLE):
+            super().paint(painter, option, index)
+            return
+        text_option = QStyleOptionViewItem(option)
+        text_option.rect = option.rect.adjusted(0, 0, -(UNDO_ICON_SIZE + 2 * UNDO_ICON_MARGIN), 0)
+        super().paint(painter, text_option, index)
+        self.undo_icon.paint(painter, self._undo_rect(option))
+
+    def editorEvent(self, event, model, option, index):
+        if (index.data(REPLACED_ROLE) and event.type() == QEvent.MouseButtonRelease
+                and self._undo_rect(option).contains(event.pos())):
+            self.undo_requested.emit(index.internalPointer())
+            return True  # Keeps the view from treating the click as a result selection
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if index.data(REPLACED_ROLE) and self._undo_rect(option).contains(event.pos()):
+            QToolTip.showText(event.globalPos(), _("Undo replacement"), view)
+            return True
+        return super().helpEvent(event, view, option, index)
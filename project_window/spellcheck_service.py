@@ -0,0 +1,137 @@
+import re
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtCore import QThread
+from PyQt5.QtGui import QTextBlockUserData
+from spylls.hunspell import Dictionary
+
+SPELLCHECK_CACHE_SIZE = 50000  # Looked-up words remembered per dictionary
+
+WORD_JOINERS = "'’-"  # Characters that may join the parts of one word ("don't", "well-known")
+
+def compile_word_pattern(word_chars=None):
+    """
+    Compile the tokenizer of a dictionary: runs of letters of any script (with combining
+    accents), joined by apostrophes, hyphens and the other punctuation the dictionary's
+    WORDCHARS declares part of a word.
+    """
+    joiners = sorted(set(char for char in WORD_JOINERS + (word_chars or "")
+                         if not char.isalnum() and not char.isspace() and char != "."))
+    letters = r"(?:[^\W\d_][\u0300-\u036f]*)+"
+    return re.compile(letters + "(?:[" + re.escape("".join(joiners)) + "]" + letters + ")*")
+
+def load_known_words(dictionary):
+    """
+    Return the stems of a Hunspell dictionary that are correct exactly as written, so most
+    words of a text are found with a set lookup instead of running the affix engine.
+    Stems with flags that change whether they stand on their own are left to the engine.
+    """
+    try:
+        aff = dictionary.aff
+        special = {flag for flag in (getattr(aff, "FORBIDDENWORD", None), getattr(aff, "NEEDAFFIX", None),
+                                     getattr(aff, "ONLYINCOMPOUND", None), getattr(aff, "KEEPCASE", None)) if flag}
+        return frozenset(word.stem for word in dictionary.dic.words if not special.intersection(word.flags))
+    except (AttributeError, TypeError) as e:
+        print(f"Error reading the word list of the dictionary: {e}")
+        return frozenset()
+
+class SpellcheckService:
+    """
+    A Hunspell dictionary with a memo of the words it has looked up.
+
+    Looking a word up in spylls is slow, while the same words come back over and
+    over in a manuscript. Words listed in the dictionary as they are written are
+    accepted from a set built when the dictionary is loaded; every other result is
+    remembered (up to SPELLCHECK_CACHE_SIZE words, least recently used first out).
+    Lookups may run on any thread.
+    """
+
+    def __init__(self, dictionary):
+        self.dictionary = dictionary
+        self.word_pattern = compile_word_pattern(getattr(getattr(dictionary, "aff", None), "WORDCHARS", None))
+        self.known_words = load_known_words(dictionary)
+        self._results = OrderedDict()  # word -> whether it is spelled correctly
+        self._lock = threading.Lock()
+
+    def words_in(self, text):
+        """Return the (start, end, word) of each word in the text."""
+        return [(match.start(), match.end(), match.group()) for match in self.word_pattern.finditer(text)]
+
+    def is_known(self, word):
+        """Return whether the word is a listed stem, as written or capitalized at the start of a sentence or in capitals."""
+        if word in self.known_words:
+            return True
+        lower = word.lower()
+        return (lower != word and (word.isupper() or word[1:] == lower[1:])
+                and lower in self.known_words)
+
+    def cached(self, word):
+        """Return whether the word is spelled correctly, or None if it hasn't been looked up yet."""
+        if self.is_known(word):
+            return True
+        with self._lock:
+            result = self._results.get(word)
+            if result is not None:
+                self._results.move_to_end(word)
+            return result
+
+    def is_correct(self, word):
+        result = self.cached(word)
+        if result is None:
+            try:
+                result = bool(self.dictionary.lookup(word))
+            except Exception as e:
+                print(f"Error looking up '{word}': {e}")
+                result = True  # Neither underlined nor looked up again
+            with self._lock:
+                self._results[word] = result
+                while len(self._results) > SPELLCHECK_CACHE_SIZE:
+                    self._results.popitem(last=False)
+        return result
+
+    def suggest(self, word):
+        return list(self.dictionary.suggest(word))
+
+_services = {}  # dictionary path without extension -> SpellcheckService
+
+def get_spellcheck_service(dict_base):
+    """
+    Return the spellcheck service of the dictionary in "<dict_base>.aff" and "<dict_base>.dic",
+    loading the dictionary the first time it is asked for. Editors share the service and its memo.
+    """
+    service = _services.get(dict_base)
+    if service is None:
+        service = SpellcheckService(Dictionary.from_files(dict_base))
+        _services[dict_base] = service
+    return service
+
+class SpellcheckBlockData(QTextBlockUserData):
+    """The misspelled-word selections of one paragraph, and whether its text changed since."""
+
+    def __init__(self, selections):
+        super().__init__()
+        self.selections = selections
+        self.dirty = False
+
+class SpellcheckWorker(QThread):
+    """Looks words up in the background so their results are cached for the next check."""
+
+    def __init__(self, service, words):
+        super().__init__()
+        self.service = service
+        self.words = words
+
+    def run(self):
+        for word in self.words:
+            self.service.is_correct(word)
+
+_running_workers = set()  # Kept alive until they finish, even if their editor is closed and deleted
+
+def start_spellcheck_worker(service, words, on_finished):
+    worker = SpellcheckWorker(service, words)
+    _running_workers.add(worker)
+    worker.finished.connect(lambda: _running_workers.discard(worker))
+    worker.finished.connect(on_finished)
+    worker.start()
+    return worker
@@ -0,0 +1,172 @@
+import os
+import copy
+import json
+import threading
+from settings.persistence_queue import WWPersistenceQueue
+
+JOURNAL_SUFFIX = ".journal"
+COMPACT_AFTER_RECORDS = 100  # Rewrite the full structure file after this many journal records
+ROOT_KEY = ""  # Stands for the structure dict itself in journal records
+CHILD_KEYS = ("acts", "chapters", "scenes")
+GENERATION_KEY = "journal_generation"  # Stored in the structure file; counts its full rewrites
+
+def _snapshot(structure):
+    """
+    Flatten a structure into per-node fields and per-parent child lists keyed by UUID.
+    Returns None if the structure cannot be journaled because a node lacks a unique UUID.
+    """
+    fields = {}
+    children = {}
+
+    def visit(key, node):
+        if key in fields:
+            return False
+        fields[key] = copy.deepcopy({k: v for k, v in node.items() if k not in CHILD_KEYS})
+        for child_key in CHILD_KEYS:
+            if child_key not in node:
+                continue
+            child_ids = []
+            for child in node[child_key]:
+                child_id = child.get("uuid") if isinstance(child, dict) else None
+                if not child_id or not visit(child_id, child):
+                    return False
+                child_ids.append(child_id)
+            children[key] = [child_key, child_ids]
+        return True
+
+    if not visit(ROOT_KEY, structure):
+        return None
+    return fields, children
+
+class StructureJournal:
+    """
+    Incremental persistence for a project structure file.
+
+    Instead of rewriting the whole structure JSON on every edit, only the nodes
+    and child lists that changed since the last save are appended to a journal
+    next to it, one JSON record per line. Saving an unchanged structure writes
+    nothing at all. The journal is folded back into the structure file after
+    COMPACT_AFTER_RECORDS records or once it outgrows the structure file.
+
+    Every full rewrite of the structure file bumps a generation number that is
+    stored in the file, and every journal record carries the generation it was
+    written against. A journal left behind by a crash between a rewrite and the
+    removal of the journal only holds records of an older generation, which
+    the new structure file already contains, so replay skips them.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.journal_path = file_path + JOURNAL_SUFFIX
+        self._lock = threading.Lock()
+        self._persisted = None  # Snapshot of the state on disk (structure file + journal)
+        self._records = 0
+        self._journal_bytes = 0
+        self._base_bytes = 0
+        self._generation = 0
+
+    def replay(self, structure):
+        """
+        Apply the journal on disk to a structure freshly loaded from the structure file.
+        The generation number is taken out of the structure.
+        """
+        generation = structure.pop(GENERATION_KEY, 0)
+        records = 0
+        journal_bytes = 0
+        if os.path.exists(self.journal_path):
+            nodes = {}
+
+            def index(key, node):
+                nodes[key] = node
+                for child_key in CHILD_KEYS:
+                    for child in node.get(child_key, []):
+                        if isinstance(child, dict) and child.get("uuid"):
+                            index(child["uuid"], child)
+            index(ROOT_KEY, structure)
+
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A record cut short by a crash ends the usable part of the journal
+                        print(f"Ignoring truncated record in {self.journal_path}")
+                        break
+                    records += 1
+                    journal_bytes += len(line)
+                    if record.get("generation", 0) < generation:
+                        continue  # Already part of the structure file
+                    for key, node_fields in record.get("nodes", {}).items():
+                        node = nodes.setdefault(key, {})
+                        kept_children = {k: node[k] for k in CHILD_KEYS if k in node}
+                        node.clear()
+                        node.update(node_fields)
+                        node.update(kept_children)
+                    for key, (child_key, child_ids) in record.get("children", {}).items():
+                        if key in nodes:
+                            nodes[key][child_key] = [nodes[child_id] for child_id in child_ids if child_id in nodes]
+        with self._lock:
+            self._generation = generation
+            self._records = records
+            self._journal_bytes = journal_bytes
+        return structure
+
+    def mark_persisted(self, structure):
+        """Remember the given structure as the state currently stored on disk."""
+        try:
+            base_bytes = os.path.getsize(self.file_path)
+        except OSError:
+            base_bytes = 0
+        with self._lock:
+            self._persisted = _snapshot(structure)
+            self._base_bytes = base_bytes
+
+    def save(self, structure, compact=False):
+        """Persist the changes made to the structure since the last save, if there are any."""
+        with self._lock:
+            snapshot = _snapshot(structure)
+            if compact or snapshot is None or self._persisted is None:
+                self._compact(structure, snapshot)
+                return
+            old_fields, old_children = self._persisted
+            new_fields, new_children = snapshot
+            record = {}
+            changed_nodes = {key: value for key, value in new_fields.items() if old_fields.get(key) != value}
+            if changed_nodes:
+                record["nodes"] = changed_nodes
+            changed_children = {key: value for key, value in new_children.items() if old_children.get(key) != value}
+            if changed_children:
+                record["children"] = changed_children
+            if not record:
+                return  # Nothing changed since the last save
+            record["generation"] = self._generation
+            line = json.dumps(record, separators=(",", ":")) + "\n"
+            WWPersistenceQueue.append(self.journal_path, line)
+            self._persisted = snapshot
+            self._records += 1
+            self._journal_bytes += len(line)
+            if self._records >= COMPACT_AFTER_RECORDS or self._journal_bytes > self._base_bytes:
+                self._compact(structure, snapshot)
+
+    def _compact(self, structure, snapshot):
+        self._generation += 1
+        data = json.dumps(dict(structure, **{GENERATION_KEY: self._generation}), indent=4)
+        # The full file is written before the journal it supersedes is removed
+        WWPersistenceQueue.write(self.file_path, data)
+        WWPersistenceQueue.remove(self.journal_path)
+        self._persisted = snapshot
+        self._records = 0
+        self._journal_bytes = 0
+        self._base_bytes = len(data)
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+def get_structure_journal(file_path):
+    """Return the shared journal for a structure file."""
+    key = os.path.normcase(os.path.abspath(file_path))
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = _journals[key] = StructureJournal(file_path)
+        return journal
@@ -1,6 +1,7 @@
 import re
 import tiktoken
 from PyQt5.QtCore import Qt
+from settings.plain_text import html_to_plain_text
 
 class SummaryModel:
     def __init__(self, project_name, max_tokens=16000, encoding_name="cl100k_base"):
@@ -11,10 +12,7 @@ class SummaryModel:
 
     def optimize_text(self, html_content, max_tokens=None):
         """Convert HTML to optimized plain text for LLM, handling token limits."""
-        from PyQt5.QtWidgets import QTextEdit
-        temp_editor = QTextEdit()
-        temp_editor.setHtml(html_content)
-        text = temp_editor.toPlainText()
+        text = html_to_plain_text(html_content)
 
         # Minimal whitespace normalization
         text = re.sub(r'\n+', '\n', text.strip())
@@ -74,7 +72,10 @@ class SummaryModel:
             data = item.data(0, Qt.UserRole)
             if len(hierarchy) < 2:  # Only gather content for scenes
                 return scene_data
-            text = load_latest_autosave(self.project_name, hierarchy) or data.get("content", "")
+            if project_model:
+                text = project_model.load_scene_content(hierarchy) or data.get("content", "")
+            else:
+                text = load_latest_autosave(self.project_name, hierarchy) or data.get("content", "")
             if text.strip():
                 scene_data.append({
                     "name": item.text(0).strip(),
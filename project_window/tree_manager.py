@@ -5,6 +5,8 @@ import uuid
 from PyQt5.QtWidgets import QTreeWidgetItem
 from PyQt5.QtCore import Qt
 from settings.settings_manager import WWSettingsManager
+from settings.persistence_queue import WWPersistenceQueue
+from .structure_journal import get_structure_journal
 
 def get_structure_file_path(project_name, backward_compat=False):
     """Return the path to the project-specific structure file."""
@@ -49,10 +51,14 @@ def load_structure(project_name):
          ]
         }
     ]}
+    WWPersistenceQueue.flush()  # Structure writes and journal records still in flight
     file_path = get_structure_file_path(project_name, True)
     if os.path.exists(file_path):
         with open(file_path, "r", encoding="utf-8") as f:
             structure = json.load(f)
+        journal = get_structure_journal(file_path)
+        journal.replay(structure)
+        journal.mark_persisted(structure)
         
         # Add UUIDs and has_summary to existing nodes
         def add_fields(node):
@@ -64,17 +70,19 @@ def load_structure(project_name):
                 add_fields(child)
         for act in structure.get("acts", []):
             add_fields(act)
+        # Only writes anything if fields were added above
         save_structure(project_name, structure)
     return structure
 
-def save_structure(project_name, structure):
-    """Save the given project structure to the file."""
+def save_structure(project_name, structure, compact=False):
+    """
+    Persist the changes made to the project structure in the background.
+    Only the changed nodes are appended to the structure journal unless compact is set,
+    in which case the full structure file is rewritten.
+    """
     file_path = get_structure_file_path(project_name)
     try:
-        if not os.path.exists(os.path.dirname(file_path)):
-            os.makedirs(os.path.dirname(file_path))
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(structure, f, indent=4)
+        get_structure_journal(file_path).save(structure, compact=compact)
     except Exception as e:
         print("Error saving project structure:", e)
 
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import threading
+from typing import Optional
+from .persistence_queue import WWPersistenceQueue, write_file_atomic
+from .revision_store import RevisionPack
+
+INDEX_FILENAME = "autosave_index.json"
+INDEX_VERSION = 1
+UUID_HEADER = "<!-- UUID:"
+PROTECTED_HEADER = "<!-- PROTECTED -->"
+LEGACY_KEY = ""  # Revisions written before UUIDs were embedded in the files
+
+# Scene revisions are named <project>-<act>-<chapter>-<scene>_<timestamp>.html (or .txt for legacy files).
+# Chapter summaries share the shape but end in -Summary_<timestamp>.html and are not scene revisions.
+REVISION_PATTERN = re.compile(
+    r'^(?P<identifier>[^-]+-[^-]+-[^-]+-(?!Summary_\d+\.html$)[^-]+)_(?P<timestamp>\d+)\.(?:txt|html)$')
+
+def content_digest(content: str) -> str:
+    """Return the digest used to tell whether scene content has changed."""
+    return hashlib.sha1(content.strip().encode("utf-8")).hexdigest()
+
+def split_revision_header(raw: str) -> tuple:
+    """
+    Split the UUID and PROTECTED comment lines off a stored revision.
+
+    Returns:
+        A tuple (uuid or None, protected flag, content without the header lines).
+    """
+    uuid_val = None
+    protected = False
+    lines = raw.split("\n")
+    while lines and (lines[0].startswith(UUID_HEADER) or lines[0] == PROTECTED_HEADER):
+        line = lines.pop(0)
+        if line == PROTECTED_HEADER:
+            protected = True
+        else:
+            uuid_val = line.split(UUID_HEADER)[1].split("-->")[0].strip()
+    return uuid_val, protected, "\n".join(lines)
+
+class AutosaveIndex:
+    """
+    Persistent catalog of the autosave revisions in one project folder.
+
+    Revisions are grouped by node UUID and ordered oldest to newest, so the
+    latest revision of a scene is found without globbing the folder or opening
+    any of the files. The catalog is rebuilt from the folder contents whenever
+    the index file is missing or unreadable.
+
+    Older revisions may be moved into the project's revision pack, in which
+    case their entry carries the blob location under "pack" and the file no
+    longer exists on disk. The index is written to disk before a file is
+    removed for the pack; if the pack and the index still disagree after a
+    crash, reading a packed revision rebuilds the index from the pack.
+    """
+
+    def __init__(self, project_folder: str):
+        self.project_folder = project_folder
+        self.index_path = os.path.join(project_folder, INDEX_FILENAME)
+        self.pack = RevisionPack(project_folder)
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()  # Keeps writes of the index file in the order their data was taken
+        self._by_uuid = None
+        self._by_identifier = {}
+        self._by_file = {}
+        self._digest_counts = {}  # content digest -> number of indexed revisions with it
+
+    def path_for(self, revision: dict) -> str:
+        """Return the path of the file holding the given revision."""
+        return os.path.join(self.project_folder, revision["file"])
+
+    def _ensure_loaded(self) -> None:
+        if self._by_uuid is not None:
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                raise ValueError("Unsupported autosave index version")
+            self._set_revisions(
+                revision for revisions in data.get("scenes", {}).values() for revision in revisions
+            )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self.rebuild()
+
+    def _set_revisions(self, revisions) -> None:
+        self._by_uuid = {}
+        self._by_identifier = {}
+        self._by_file = {}
+        self._digest_counts = {}
+        for revision in sorted(revisions, key=lambda r: r["timestamp"]):
+            self._insert(revision)
+
+    def _insert(self, revision: dict) -> None:
+        self._by_uuid.setdefault(revision["uuid"] or LEGACY_KEY, []).append(revision)
+        self._by_identifier.setdefault(revision["identifier"], []).append(revision)
+        self._by_file[revision["file"]] = revision
+        digest = revision.get("hash")
+        self._digest_counts[digest] = self._digest_counts.get(digest, 0) + 1
+
+    def _discard(self, revision: dict) -> None:
+        for mapping, key in ((self._by_uuid, revision["uuid"] or LEGACY_KEY),
+                             (self._by_identifier, revision["identifier"])):
+            revisions = mapping.get(key, [])
+            if revision in revisions:
+                revisions.remove(revision)
+            if not revisions:
+                mapping.pop(key, None)
+        if self._by_file.get(revision["file"]) is revision:
+            del self._by_file[revision["file"]]
+            digest = revision.get("hash")
+            count = self._digest_counts.get(digest, 0) - 1
+            if count > 0:
+                self._digest_counts[digest] = count
+            else:
+                self._digest_counts.pop(digest, None)
+
+    def rebuild(self) -> None:
+        """Re-scan the project folder and rewrite the index from scratch."""
+        with self._lock:
+            revisions = []
+            if os.path.isdir(self.project_folder):
+                for entry in os.scandir(self.project_folder):
+                    match = REVISION_PATTERN.match(entry.name)
+                    if not match or not entry.is_file():
+                        continue
+                    try:
+                        with open(entry.path, "r", encoding="utf-8") as f:
+                            uuid_val, protected, content = split_revision_header(f.read())
+                        timestamp = entry.stat().st_mtime
+                    except (OSError, UnicodeDecodeError) as e:
+                        print(f"Error indexing autosave file {entry.path}: {e}")
+                        continue
+                    revisions.append({
+                        "file": entry.name,
+                        "identifier": match.group("identifier"),
+                        "uuid": uuid_val,
+                        "timestamp": timestamp,
+                        "protected": protected,
+                        "hash": content_digest(content)
+                    })
+            # Packed revisions only survive in the pack; files on disk take precedence over blobs
+            on_disk = {revision["file"] for revision in revisions}
+            packed = {}
+            for offset, length, filename, timestamp, pack_protected, raw in self.pack.scan():
+                match = REVISION_PATTERN.match(filename)
+                if not match or filename in on_disk:
+                    continue
+                uuid_val, protected, content = split_revision_header(raw)
+                protected = protected or pack_protected
+                packed[filename] = {
+                    "file": filename,
+                    "identifier": match.group("identifier"),
+                    "uuid": uuid_val,
+                    "timestamp": timestamp,
+                    "protected": protected,
+                    "hash": content_digest(content),
+                    "pack": [offset, length]
+                }
+            self._set_revisions(revisions + list(packed.values()))
+            self.save()
+
+    def save(self) -> None:
+        """
+        Queue a write of the index next to the revisions it describes.
+        Saves requested before the write starts are coalesced into it, and the
+        index is only serialized on the persistence queue's thread.
+        """
+        WWPersistenceQueue.call(f"autosave-index:{self.index_path}", self.write)
+
+    def write(self, durable: bool = False) -> None:
+        """Atomically write the current state of the index to disk."""
+        with self._write_lock:
+            with self._lock:
+                if self._by_uuid is None:
+                    return
+                data = json.dumps({"version": INDEX_VERSION, "scenes": self._by_uuid}, separators=(",", ":"))
+            write_file_atomic(self.index_path, data, durable=durable)
+
+    def add(self, filepath: str, identifier: str, uuid: Optional[str], content_hash: str,
+            protected: bool = False, timestamp: Optional[float] = None) -> dict:
+        """Record a newly written revision as the latest one of its scene."""
+        with self._lock:
+            self._ensure_loaded()
+            filename = os.path.basename(filepath)
+            existing = self._by_file.get(filename)
+            if existing:
+                # Two saves within the same second share a file name
+                self._discard(existing)
+            revision = {
+                "file": filename,
+                "identifier": identifier,
+                "uuid": uuid,
+                "timestamp": timestamp if timestamp is not None else time.time(),
+                "protected": protected,
+                "hash": content_hash
+            }
+            self._insert(revision)
+            self.save()
+            return revision
+
+    def remove(self, filepath: str, persist: bool = True) -> None:
+        """Forget the revision stored in the given file."""
+        with self._lock:
+            self._ensure_loaded()
+            revision = self._by_file.get(os.path.basename(filepath))
+            if revision:
+                self._discard(revision)
+                if persist:
+                    self.save()
+
+    def set_protected(self, filepath: str, protected: bool) -> None:
+        """
+        Update the protected flag of the revision stored in the given file.
+        A packed revision is appended to the pack again with the new flag, in the background.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            revision = self._by_file.get(os.path.basename(filepath))
+            if revision and revision["protected"] != protected:
+                revision["protected"] = protected
+                self.save()
+                if "pack" in revision:
+                    WWPersistenceQueue.call(f"protect:{self.path_for(revision)}", lambda: self._repack(revision))
+
+    def _repack(self, revision: dict) -> None:
+        with self._lock:
+            if self._by_file.get(revision["file"]) is not revision or "pack" not in revision:
+                return
+            location = tuple(revision["pack"])
+        try:
+            raw = self.pack.read(*location, filename=revision["file"])
+            new_location = self.pack.append(revision["file"], revision["timestamp"], raw, revision["protected"])
+        except (OSError, zlib.error, ValueError, UnicodeDecodeError) as e:
+            print(f"Error updating packed autosave {revision['file']}: {e}")
+            return
+        with self._lock:
+            if self._by_file.get(revision["file"]) is not revision or tuple(revision["pack"]) != location:
+                return  # Deleted or moved by a compaction meanwhile; the new blob is dead
+            revision["pack"] = list(new_location)
+        self.write(durable=True)
+
+    def has_digest(self, content_hash: str) -> bool:
+        """Return whether any indexed revision has the given content digest."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._digest_counts.get(content_hash, 0) > 0
+
+    def all_revisions(self) -> list:
+        """Return every indexed revision of the project, oldest first."""
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._by_file.values(), key=lambda r: r["timestamp"])
+
+    def get(self, filepath: str) -> Optional[dict]:
+        """Return the revision stored in the given file, if it is indexed."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._by_file.get(os.path.basename(filepath))
+
+    def rename_prefix(self, old_prefix: str, new_prefix: str) -> None:
+        """
+        Rename the files and identifiers of all revisions after the project itself was renamed.
+        The file names stored with packed revisions are renamed too, so a rebuild finds them under the new names.
+        """
+        def rename(name):
+            return new_prefix + name[len(old_prefix):] if name.startswith(old_prefix) else name
+
+        with self._lock:
+            self._ensure_loaded()
+            revisions = list(self._by_file.values())
+            for revision in revisions:
+                for key in ("file", "identifier"):
+                    revision[key] = rename(revision[key])
+            packed = [revision for revision in revisions if "pack" in revision]
+            if packed:
+                try:
+                    locations = self.pack.compact([tuple(revision["pack"]) for revision in packed], rename=rename)
+                except (OSError, zlib.error, ValueError) as e:
+                    print("Error renaming revisions in the revision pack:", e)
+                else:
+                    for revision, location in zip(packed, locations):
+                        revision["pack"] = list(location)
+            self._set_revisions(revisions)
+            self.save()
+
+    def revisions(self, identifier: str) -> list:
+        """Return the revisions saved under a scene identifier, oldest first."""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._by_identifier.get(identifier, []))
+
+    def latest(self, identifier: str, uuid: Optional[str] = None) -> Optional[dict]:
+        """
+        Return the newest revision saved under a scene identifier that is suitable for the UUID.
+        A revision is suitable if no UUID is given, if the revision predates UUIDs, or if the UUIDs match.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            for revision in reversed(self._by_identifier.get(identifier, [])):
+                if uuid is None or revision["uuid"] is None or revision["uuid"] == uuid:
+                    if self._exists(revision):
+                        return revision
+            return None
+
+    def latest_for_uuid(self, uuid: str) -> Optional[dict]:
+        """Return the newest revision of a node regardless of the name it was saved under."""
+        with self._lock:
+            self._ensure_loaded()
+            for revision in reversed(self._by_uuid.get(uuid, [])):
+                if self._exists(revision):
+                    return revision
+            return None
+
+    def _exists(self, revision: dict) -> bool:
+        # Files deleted behind our back are dropped from the index on first sight
+        if "pack" in revision or WWPersistenceQueue.exists(self.path_for(revision)):
+            return True
+        self._discard(revision)
+        self.save()
+        return False
+
+    def exists(self, filepath: str) -> bool:
+        """Return whether a revision is available, either as a file or in the pack."""
+        if WWPersistenceQueue.exists(filepath):
+            return True
+        with self._lock:
+            self._ensure_loaded()
+            revision = self._by_file.get(os.path.basename(filepath))
+            return revision is not None and "pack" in revision
+
+    def read_raw(self, filepath: str) -> str:
+        """Return the stored text of a revision, header lines included, wherever it is kept."""
+        with self._lock:
+            raw = WWPersistenceQueue.read(filepath)
+            if raw is not None:
+                return raw
+            if os.path.exists(filepath):
+                with open(filepath, "r", encoding="utf-8") as f:
+                    return f.read()
+            self._ensure_loaded()
+            filename = os.path.basename(filepath)
+            revision = self._by_file.get(filename)
+            if revision is None or "pack" not in revision:
+                raise FileNotFoundError(filepath)
+            try:
+                return self.pack.read(*revision["pack"], filename=filename)
+            except (zlib.error, ValueError, UnicodeDecodeError) as e:
+                # The pack was rewritten but the index with the new locations never reached the disk
+                print(f"Revision pack out of step with the autosave index ({e}); rebuilding the index")
+            self.rebuild()
+            revision = self._by_file.get(filename)
+            if revision is None or "pack" not in revision:
+                raise FileNotFoundError(filepath)
+            return self.pack.read(*revision["pack"], filename=filename)
+
+    def pack_older_revisions(self, identifier: str) -> None:
+        """
+        Move every revision of a scene except the latest one into the revision pack.
+        Meant to run on the persistence queue's thread.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            candidates = [revision for revision in self._by_identifier.get(identifier, [])[:-1]
+                          if "pack" not in revision]
+        packed = []
+        for revision in candidates:
+            path = self.path_for(revision)
+            if WWPersistenceQueue.read(path) is not None:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    raw = f.read()
+                location = self.pack.append(revision["file"], revision["timestamp"], raw, revision["protected"])
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error packing autosave file {path}: {e}")
+                continue
+            with self._lock:
+                # The revision may have been deleted or rewritten while it was being packed
+                if self._by_file.get(revision["file"]) is not revision or WWPersistenceQueue.read(path) is not None:
+                    continue
+                revision["pack"] = list(location)
+            packed.append(revision)
+        if not packed:
+            return
+        # The packed locations reach the disk before the files they replace are removed
+        self.write(durable=True)
+        for revision in packed:
+            path = self.path_for(revision)
+            with self._lock:
+                if self._by_file.get(revision["file"]) is not revision and WWPersistenceQueue.read(path) is not None:
+                    continue  # The file name was reused by a newer save
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error removing packed autosave file {path}: {e}")
+        self.compact_pack()
+
+    def compact_pack(self, force: bool = False) -> None:
+        """
+        Rewrite the revision pack without the blobs of deleted revisions once they dominate it.
+        The index with the new locations is written to disk right after the pack.
+        """
+        with self._lock:
+            if self._by_uuid is None:
+                return
+            packed = [revision for revision in self._by_file.values() if "pack" in revision]
+            live_bytes = sum(revision["pack"][1] for revision in packed)
+            if not force and not self.pack.needs_compaction(live_bytes):
+                return
+            try:
+                locations = self.pack.compact([tuple(revision["pack"]) for revision in packed])
+            except OSError as e:
+                print("Error compacting revision pack:", e)
+                return
+            for revision, location in zip(packed, locations):
+                revision["pack"] = list(location)
+        self.write(durable=True)
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def drop_autosave_index(project_folder: str) -> None:
+    """Forget the cached index of a project folder that has been moved or deleted."""
+    key = os.path.normcase(os.path.abspath(project_folder))
+    with _indexes_lock:
+        _indexes.pop(key, None)
+
+def get_autosave_index(project_folder: str) -> AutosaveIndex:
+    """Return the shared autosave index for a project folder."""
+    key = os.path.normcase(os.path.abspath(project_folder))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = AutosaveIndex(project_folder)
+        return index
@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 import os
 import time
-import glob
+import shutil
 import re
 from typing import Optional
+from .autosave_index import (AutosaveIndex, get_autosave_index, drop_autosave_index, split_revision_header,
+                             content_digest, PROTECTED_HEADER, UUID_HEADER)
+from .persistence_queue import WWPersistenceQueue
+from .plain_text import WWPlainText
+from .word_count_history import record_word_count
+from .settings_manager import WWSettingsManager
 
 NEW_FILE_EXTENSION = ".html"  # Use HTML for new files
 
@@ -33,13 +39,74 @@ def get_project_folder(project_name: str) -> str:
 
 def is_protected_backup(filepath: str) -> bool:
     """Check if a backup file is marked as protected."""
+    index = get_autosave_index(os.path.dirname(filepath))
+    revision = index.get(filepath)
+    if revision is not None:
+        return revision["protected"]
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.read()
-            return "<!-- PROTECTED -->" in content.split("\n")[:2]  # Check first two lines
+        return PROTECTED_HEADER in index.read_raw(filepath).split("\n")[:2]  # Check first two lines
     except Exception:
         return False
 
+def get_project_index(project_name: str) -> AutosaveIndex:
+    """Return the autosave index of the given project."""
+    return get_autosave_index(get_project_folder(project_name))
+
+def read_autosave(filepath: str) -> str:
+    """
+    Read an autosave file and return its content without the UUID and PROTECTED comments.
+    Revisions that have been moved into the project's revision pack are read from there.
+    """
+    raw = get_autosave_index(os.path.dirname(filepath)).read_raw(filepath)
+    return split_revision_header(raw)[2]
+
+def autosave_exists(filepath: str) -> bool:
+    """Return whether an autosave revision is available, on disk or in the revision pack."""
+    return get_autosave_index(os.path.dirname(filepath)).exists(filepath)
+
+def list_autosaves(project_name: str, hierarchy: list) -> list:
+    """
+    Return the paths of all autosave revisions of a scene, newest first.
+    Packed revisions are included; use read_autosave to load any of them.
+    """
+    scene_identifier = build_scene_identifier(project_name, hierarchy)
+    index = get_project_index(project_name)
+    return [index.path_for(revision) for revision in reversed(index.revisions(scene_identifier))]
+
+def set_autosave_protected(filepath: str, protected: bool) -> None:
+    """
+    Mark an autosave or summary file as protected from automatic cleanup, or clear the mark.
+    Raises OSError if the file cannot be read.
+    """
+    index = get_autosave_index(os.path.dirname(filepath))
+    revision = index.get(filepath)
+    if revision is None or "pack" not in revision:
+        lines = index.read_raw(filepath).split("\n")
+        is_protected = PROTECTED_HEADER in lines[:2]
+        if protected and not is_protected:
+            # Keep the PROTECTED comment right after the UUID comment
+            lines.insert(1 if lines and lines[0].startswith(UUID_HEADER) else 0, PROTECTED_HEADER)
+            WWPersistenceQueue.write(filepath, "\n".join(lines))
+        elif is_protected and not protected:
+            lines = [line for line in lines if line != PROTECTED_HEADER]
+            WWPersistenceQueue.write(filepath, "\n".join(lines))
+    # For packed revisions the index alone records the protected status
+    index.set_protected(filepath, protected)
+
+def delete_autosave(filepath: str) -> None:
+    """Delete an autosave or summary file, or drop it from the revision pack. Raises OSError on failure."""
+    index = get_autosave_index(os.path.dirname(filepath))
+    revision = index.get(filepath)
+    if revision is None or "pack" not in revision:
+        WWPersistenceQueue.flush()
+        os.remove(filepath)
+        index.remove(filepath)
+    else:
+        index.remove(filepath)
+        WWPersistenceQueue.call(f"compact:{index.project_folder}", index.compact_pack)
+    if revision and revision.get("hash") and not index.has_digest(revision["hash"]):
+        WWPlainText.discard(index.project_folder, revision["hash"])
+
 def get_latest_autosave_path(project_name: str, hierarchy: list, uuid: Optional[str] = None) -> str | None:
     """
     Return the path to the most recent autosave file for a given scene that is suitable for the provided UUID.
@@ -58,34 +125,10 @@ def get_latest_autosave_path(project_name: str, hierarchy: list, uuid: Optional[
     Returns:
         The path to the most recent suitable autosave file, or None if none exists.
     """
-    def get_uuid_from_file(filepath):
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                first_line = f.readline().strip()
-                if first_line.startswith("<!-- UUID:"):
-                    return first_line.split("<!-- UUID:")[1].split("-->")[0].strip()
-                return None
-        except Exception:
-            return None
-
     scene_identifier = build_scene_identifier(project_name, hierarchy)
-    project_folder = get_project_folder(project_name)
-    pattern_txt = os.path.join(project_folder, f"{scene_identifier}_*.txt")
-    pattern_html = os.path.join(project_folder, f"{scene_identifier}_*{NEW_FILE_EXTENSION}")
-    autosave_files = sorted(glob.glob(pattern_txt) + glob.glob(pattern_html), key=os.path.getmtime, reverse=True)
-    
-    if not autosave_files:
-        return None
-    
-    # Filter files based on UUID compatibility
-    suitable_files = []
-    for filepath in autosave_files:
-        file_uuid = get_uuid_from_file(filepath)
-        if uuid is None or file_uuid is None or file_uuid == uuid:
-            suitable_files.append(filepath)
-    
-    # Return the most recent suitable file, if any
-    return suitable_files[0] if suitable_files else None
+    index = get_project_index(project_name)
+    revision = index.latest(scene_identifier, uuid)
+    return index.path_for(revision) if revision else None
 
 def load_latest_autosave(project_name: str, hierarchy: list, node: Optional[dict] = None) -> str | None:
     """
@@ -100,28 +143,10 @@ def load_latest_autosave(project_name: str, hierarchy: list, node: Optional[dict
     """
     uuid_val = node.get("uuid") if node else None
 
-    # Helper function to extract UUID from file content
-    def get_uuid_from_file(filepath):
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                first_line = f.readline().strip()
-                if first_line.startswith("<!-- UUID:"):
-                    return first_line.split("<!-- UUID:")[1].split("-->")[0].strip()
-                return None
-        except Exception:
-            return None
-
     # Try loading from node's latest_file if provided
-    if node and "latest_file" in node and os.path.exists(node["latest_file"]):
-        filepath = node["latest_file"]
+    if node and "latest_file" in node and autosave_exists(node["latest_file"]):
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                content = f.read()
-                # Strip UUID and PROTECTED comments
-                lines = content.split("\n")
-                while lines and (lines[0].startswith("<!-- UUID:") or lines[0] == "<!-- PROTECTED -->"):
-                    lines.pop(0)
-                return "\n".join(lines)
+            return read_autosave(node["latest_file"])
         except Exception as e:
             print(f"Error loading latest file {node['latest_file']}: {e}")
 
@@ -129,64 +154,84 @@ def load_latest_autosave(project_name: str, hierarchy: list, node: Optional[dict
     latest_file = get_latest_autosave_path(project_name, hierarchy, uuid=uuid_val)
     if latest_file:
         try:
-            with open(latest_file, "r", encoding="utf-8") as f:
-                content = f.read()
-                # Strip UUID and PROTECTED comments
-                lines = content.split("\n")
-                while lines and (lines[0].startswith("<!-- UUID:") or lines[0] == "<!-- PROTECTED -->"):
-                    lines.pop(0)
-                return "\n".join(lines)
+            return read_autosave(latest_file)
         except Exception as e:
             print(f"Error loading autosave file {latest_file}: {e}")
 
-    # If UUID is available but no match found, scan project folder as a last resort
+    # If UUID is available but no match found, the node may have been saved under a previous name
     if uuid_val:
-        project_folder = get_project_folder(project_name)
-        pattern = os.path.join(project_folder, f"*{NEW_FILE_EXTENSION}")
-        autosave_files = glob.glob(pattern)
-        for filepath in sorted(autosave_files, key=os.path.getmtime, reverse=True):
-            file_uuid = get_uuid_from_file(filepath)
-            if file_uuid == uuid_val:
-                try:
-                    with open(filepath, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        # Strip UUID and PROTECTED comments
-                        lines = content.split("\n")
-                        while lines and (lines[0].startswith("<!-- UUID:") or lines[0] == "<!-- PROTECTED -->"):
-                            lines.pop(0)
-                        return "\n".join(lines)
-                except Exception as e:
-                    print(f"Error loading autosave file {filepath}: {e}")
-                # Update node's latest_file if found
-                if node and "latest_file" in node:
-                    node["latest_file"] = filepath
+        index = get_project_index(project_name)
+        revision = index.latest_for_uuid(uuid_val)
+        if revision:
+            filepath = index.path_for(revision)
+            try:
+                return read_autosave(filepath)
+            except Exception as e:
+                print(f"Error loading autosave file {filepath}: {e}")
     return None
 
 def cleanup_old_autosaves(project_folder: str, scene_identifier: str, max_files: int = 6) -> None:
     """
     Remove the oldest unprotected autosave files if the number of unprotected autosaves exceeds max_files.
     """
-    pattern_txt = os.path.join(project_folder, f"{scene_identifier}_*.txt")
-    pattern_html = os.path.join(project_folder, f"{scene_identifier}_*{NEW_FILE_EXTENSION}")
-    autosave_files = sorted(glob.glob(pattern_txt) + glob.glob(pattern_html), key=os.path.getmtime)
-    
-    # Separate protected and unprotected files
-    unprotected_files = [f for f in autosave_files if not is_protected_backup(f)]
-    protected_files = [f for f in autosave_files if is_protected_backup(f)]
+    index = get_autosave_index(project_folder)
+    unprotected = [revision for revision in index.revisions(scene_identifier) if not revision["protected"]]
     
     # Remove oldest unprotected files if exceeding max_files
-    while len(unprotected_files) > max_files:
-        oldest = unprotected_files.pop(0)
-        try:
-            os.remove(oldest)
-            print("Removed old autosave file:", oldest)
-        except Exception as e:
-            print("Error removing old autosave file:", e)
+    removed = False
+    removed_packed = False
+    while len(unprotected) > max_files:
+        revision = unprotected.pop(0)
+        oldest = index.path_for(revision)
+        if "pack" in revision:
+            removed_packed = True
+        else:
+            WWPersistenceQueue.remove(oldest)
+        print("Removed old autosave file:", oldest)
+        index.remove(oldest, persist=False)
+        if revision.get("hash") and not index.has_digest(revision["hash"]):
+            WWPlainText.discard(project_folder, revision["hash"])
+        removed = True
+    if removed:
+        index.save()
+    if removed_packed:
+        WWPersistenceQueue.call(f"compact:{project_folder}", index.compact_pack)
+
+def rename_project_autosaves(old_folder: str, new_folder: str, old_prefix: str, new_prefix: str) -> None:
+    """
+    Update the autosave index copied into a renamed project folder so that it
+    refers to the renamed files instead of the old ones.
+    """
+    drop_autosave_index(old_folder)
+    get_autosave_index(new_folder).rename_prefix(old_prefix, new_prefix)
+    WWPersistenceQueue.flush()
+
+def rename_project_folder(old_folder: str, new_folder: str, old_prefix: str, new_prefix: str) -> None:
+    """
+    Copy a project folder to its new name, renaming the files that start with
+    the old project prefix, then remove the old folder and update the autosave
+    index. Subfolders such as compendium images are copied whole.
+    """
+    WWPersistenceQueue.flush()  # Pending background writes still target the old folder
+    os.mkdir(new_folder)
+    for filename in os.listdir(old_folder):
+        old_path = os.path.join(old_folder, filename)
+        if filename.startswith(old_prefix):
+            new_path = os.path.join(new_folder, new_prefix + filename[len(old_prefix):])
+        else:
+            new_path = os.path.join(new_folder, filename)
+        if os.path.isdir(old_path):
+            shutil.copytree(old_path, new_path)
+        else:
+            shutil.copy2(old_path, new_path)
+    shutil.rmtree(old_folder)
+    rename_project_autosaves(old_folder, new_folder, old_prefix, new_prefix)
 
 def save_scene(project_name: str, hierarchy: list, uuid: str, content: str, expected_project_name: Optional[str] = None) -> Optional[str]:
     """
     Save the scene content if it has changed since the last autosave.
     Uses the UUID and name for identification and file naming.
+    The file itself is written by the background persistence queue.
 
     Parameters:
         project_name (str): The name of the project.
@@ -197,16 +242,20 @@ def save_scene(project_name: str, hierarchy: list, uuid: str, content: str, expe
     
     Returns:
         The filepath of the new autosave file if saved, or None if no changes were detected.
+        If the background write fails later, the revision is dropped from the autosave index
+        and the failure is reported through WWPersistenceQueue's error listeners.
     """
     scene_identifier = build_scene_identifier(project_name, hierarchy)
+    project_folder = get_project_folder(project_name)
+    index = get_autosave_index(project_folder)
+    latest_revision = index.latest(scene_identifier)
 
-    # Check if the scene content has changed.
-    last_content = load_latest_autosave(project_name, hierarchy)
-    if last_content is not None and last_content.strip() == content.strip():
+    # Check if the scene content has changed by comparing against the digest of the latest revision.
+    digest = content_digest(content)
+    if latest_revision is not None and latest_revision["hash"] == digest:
         print("No changes detected since the last autosave. Skipping autosave.")
         return None
 
-    project_folder = get_project_folder(project_name)
     timestamp = time.strftime("%Y%m%d%H%M%S")
     filename = f"{scene_identifier}_{timestamp}{NEW_FILE_EXTENSION}"
     filepath = os.path.join(project_folder, filename)
@@ -217,23 +266,33 @@ def save_scene(project_name: str, hierarchy: list, uuid: str, content: str, expe
         print(error_msg)
         return None  # Prevent saving to the wrong project
 
-    # Check if the latest autosave was protected
-    latest_file = get_latest_autosave_path(project_name, hierarchy)
-    is_protected = is_protected_backup(latest_file) if latest_file else False
+    # Carry over the protected status of the latest autosave
+    is_protected = latest_revision["protected"] if latest_revision else False
     
     # Embed UUID and protected status in the HTML content
     content_with_uuid = f"<!-- UUID: {uuid} -->"
     if is_protected:
-        content_with_uuid += "\n<!-- PROTECTED -->"
+        content_with_uuid += f"\n{PROTECTED_HEADER}"
     content_with_uuid += f"\n{content}"
 
-    try:
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(content_with_uuid)
-        print("Autosaved scene to", filepath)
-    except Exception as e:
-        print("Error during autosave:", e)
-        return None
+    def write_failed(error):
+        # The revision never reached the disk; the previous one is the latest again
+        index.remove(filepath)
+
+    # The file is written in the background; a newer save of the same scene replaces a pending one.
+    # A failed write is reported to the queue's error listeners.
+    superseded = WWPersistenceQueue.write(filepath, content_with_uuid, key=os.path.join(project_folder, scene_identifier),
+                                          on_error=write_failed)
+    if superseded:
+        index.remove(superseded, persist=False)
+    print("Autosaved scene to", filepath)
 
+    saved_at = time.time()
+    index.add(filepath, scene_identifier, uuid, digest, protected=is_protected, timestamp=saved_at)
+    record_word_count(project_folder, uuid, content, saved_at)
     cleanup_old_autosaves(project_folder, scene_identifier)
+    if WWSettingsManager.get_setting("general", "compress_backups", False):
+        # Keep only the latest revision as a plain file; older ones go into the revision pack
+        WWPersistenceQueue.call(f"pack:{project_folder}:{scene_identifier}",
+                                lambda: index.pack_older_revisions(scene_identifier))
     return filepath
\ No newline at end of file
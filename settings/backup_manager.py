@@ -6,10 +6,12 @@ from PyQt5.QtWidgets import (
     QTextEdit, QHBoxLayout, QMessageBox, QSplitter, QStyle, QMenu, QAction
 )
 from PyQt5.QtCore import Qt, QSettings
-from PyQt5.QtGui import QTextDocument, QIcon, QFont
+from PyQt5.QtGui import QIcon, QFont
 from difflib import Differ
 from .settings_manager import WWSettingsManager
-from .autosave_manager import build_scene_identifier
+from .autosave_manager import (build_scene_identifier, is_protected_backup, list_autosaves, read_autosave,
+                               set_autosave_protected, delete_autosave)
+from .plain_text import html_to_plain_text
 from .theme_manager import ThemeManager
 
 class BackupDialog(QDialog):
@@ -168,12 +170,7 @@ class BackupDialog(QDialog):
 
     def is_protected_backup(self, filepath: str) -> bool:
         """Check if a backup file is marked as protected."""
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                content = f.read()
-                return "<!-- PROTECTED -->" in content.split("\n")[:2]
-        except Exception:
-            return False
+        return is_protected_backup(filepath)
 
     def populate_backup_files(self):
         """Populate the list widget with backup files sorted by creation time."""
@@ -187,11 +184,17 @@ class BackupDialog(QDialog):
         self.backup_files = []
         rexpat = summary_pattern if not self.is_scene else scene_pattern
         
-        if os.path.exists(backup_dir):
-            for filename in os.listdir(backup_dir):
-                creation_time = re.match(rexpat, filename)
-                if creation_time:
-                    self.backup_files.append((filename, creation_time.group(1)))
+        if self.is_scene:
+            # Scene revisions come from the autosave index, including those kept in the revision pack
+            filenames = [os.path.basename(path) for path in list_autosaves(self.project_name, self.hierarchy)]
+        elif os.path.exists(backup_dir):
+            filenames = os.listdir(backup_dir)
+        else:
+            filenames = []
+        for filename in filenames:
+            creation_time = re.match(rexpat, filename)
+            if creation_time:
+                self.backup_files.append((filename, creation_time.group(1)))
         
         # Sort by creation time, newest first
         self.backup_files.sort(key=lambda x: x[1], reverse=True)
@@ -227,19 +230,14 @@ class BackupDialog(QDialog):
             return ""
         
         if self.is_scene:
-            # Convert scene editor's HTML content to plain text
-            doc = QTextDocument()
-            doc.setHtml(parent.scene_editor.editor.toHtml())
-            return doc.toPlainText()
+            return parent.scene_editor.editor.toPlainText()
         else:
             # Convert summary content to plain text if it's HTML
             content = parent.model.load_summary(self.hierarchy)
             if content and isinstance(content, str):
                 # Convert summary content to plain text if it's HTML
                 if content.lstrip().startswith("<"):
-                    doc = QTextDocument()
-                    doc.setHtml(content)
-                    return doc.toPlainText()
+                    return html_to_plain_text(content)
             return content if content else ""
 
     def update_diff_view(self, current, previous):
@@ -255,20 +253,13 @@ class BackupDialog(QDialog):
         backup_path = os.path.join(backup_dir, backup_filename)
         
         try:
-            with open(backup_path, "r", encoding="utf-8") as f:
-                backup_content = f.read()
-                # Strip UUID and PROTECTED comments if present
-                lines = backup_content.split("\n")
-                while lines and (lines[0].startswith("<!-- UUID:") or lines[0] == "<!-- PROTECTED -->"):
-                    lines.pop(0)
-                backup_content = "\n".join(lines)
-                
-                # Convert backup content to plain text if it's HTML
-                if backup_filename.endswith(".html"):
-                    doc = QTextDocument()
-                    doc.setHtml(backup_content)
-                    backup_content = doc.toPlainText()
-                
+            # Strips UUID and PROTECTED comments and reads packed revisions transparently
+            backup_content = read_autosave(backup_path)
+            
+            # Convert backup content to plain text if it's HTML
+            if backup_filename.endswith(".html"):
+                backup_content = html_to_plain_text(backup_content, backup_dir)
+            
             current_content = self.get_current_content()
             
             # Split content into lines to preserve paragraphs
@@ -357,23 +348,8 @@ class BackupDialog(QDialog):
         backup_path = os.path.join(os.getcwd(), "Projects", WWSettingsManager.sanitize(self.project_name), backup_filename)
         
         try:
-            with open(backup_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            lines = content.split("\n")
-            is_protected = "<!-- PROTECTED -->" in lines[:2]
-            
-            if is_protected:
-                # Remove PROTECTED comment
-                lines = [line for line in lines if line != "<!-- PROTECTED -->"]
-            else:
-                # Add PROTECTED comment after UUID
-                if lines and lines[0].startswith("<!-- UUID:"):
-                    lines.insert(1, "<!-- PROTECTED -->")
-                else:
-                    lines.insert(0, "<!-- PROTECTED -->")
-            
-            with open(backup_path, "w", encoding="utf-8") as f:
-                f.write("\n".join(lines))
+            is_protected = self.is_protected_backup(backup_path)
+            set_autosave_protected(backup_path, not is_protected)
             
             self.update_lock_button_state()
             self.populate_backup_files()  # Refresh list to update icons
@@ -419,15 +395,7 @@ class BackupDialog(QDialog):
             backup_path = os.path.join(backup_dir, backup_filename)
             if not self.is_protected_backup(backup_path):
                 try:
-                    with open(backup_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                    lines = content.split("\n")
-                    if lines and lines[0].startswith("<!-- UUID:"):
-                        lines.insert(1, "<!-- PROTECTED -->")
-                    else:
-                        lines.insert(0, "<!-- PROTECTED -->")
-                    with open(backup_path, "w", encoding="utf-8") as f:
-                        f.write("\n".join(lines))
+                    set_autosave_protected(backup_path, True)
                     modified_files.append(backup_filename)
                 except Exception as e:
                     QMessageBox.warning(self, _("Error"), _("Failed to lock '{}': {}").format(backup_filename, str(e)))
@@ -451,12 +419,7 @@ class BackupDialog(QDialog):
             backup_path = os.path.join(backup_dir, backup_filename)
             if self.is_protected_backup(backup_path):
                 try:
-                    with open(backup_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                    lines = content.split("\n")
-                    lines = [line for line in lines if line != "<!-- PROTECTED -->"]
-                    with open(backup_path, "w", encoding="utf-8") as f:
-                        f.write("\n".join(lines))
+                    set_autosave_protected(backup_path, False)
                     modified_files.append(backup_filename)
                 except Exception as e:
                     QMessageBox.warning(self, _("Error"), _("Failed to unlock '{}': {}").format(backup_filename, str(e)))
@@ -505,7 +468,7 @@ class BackupDialog(QDialog):
                 backup_filename = item.data(Qt.UserRole)
                 backup_path = os.path.join(backup_dir, backup_filename)
                 try:
-                    os.remove(backup_path)
+                    delete_autosave(backup_path)
                     deleted_files.append(backup_filename)
                 except Exception as e:
                     QMessageBox.warning(self, _("Delete Error"), _("Failed to delete '{}': {}").format(backup_filename, str(e)))
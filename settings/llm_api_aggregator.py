@@ -1,4 +1,6 @@
 import requests
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any, Type, Union
 from abc import ABC, abstractmethod
 from pydantic import ValidationError
@@ -13,12 +15,30 @@ from langchain_ollama import ChatOllama
 from langchain_together import ChatTogether
 from .settings_manager import WWSettingsManager
 import logging
+import threading
 import time  # Added for cache expiration
 
 # Configuration constants
 DEFAULT_MAX_TOKENS = 1024
 DEFAULT_TEMPERATURE = 0.7
 MODEL_CACHE_TTL = 3600  # Cache TTL in seconds (1 hour)
+LLM_CLIENT_CACHE_SIZE = 16  # Configured LLM clients kept for reuse
+HTTP_POOL_SIZE = 10  # Keep-alive connections kept per host
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session() -> requests.Session:
+    """Return the HTTP session shared by all providers, so connections to a host are kept alive and reused."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+        return _http_session
 
 class LLMProviderBase(ABC):
     """Base class for all LLM providers."""
@@ -68,7 +88,39 @@ class LLMProviderBase(ABC):
     def _do_models_request(self, url: str, headers: Dict[str, str] = None) -> List[str]:
         """Send a request to the provider to fetch available models."""
         headers = headers or {'Authorization': f'Bearer {self.get_api_key()}'}
-        return requests.get(url, headers=headers)
+        return get_http_session().get(url, headers=headers)
+
+    def resolve_overrides(self, overrides) -> Dict[str, Any]:
+        """Returns the settings an LLM instance is built with: the overrides, completed from the configuration."""
+        return {
+            "endpoint": overrides.get("endpoint", self.get_base_url()),
+            "api_key": overrides.get("api_key", self.get_api_key()),
+            "model": overrides.get("model", self.get_current_model()),
+            "temperature": overrides.get("temperature", self.config.get("temperature", DEFAULT_TEMPERATURE)),
+            "max_tokens": overrides.get("max_tokens", self.config.get("max_tokens", DEFAULT_MAX_TOKENS)),
+            "timeout": self.get_timeout(overrides)
+        }
+
+    def get_llm_cache_key(self, overrides) -> tuple:
+        """Returns the settings that tell the LLM instances of this provider apart."""
+        # The same resolved settings get_llm_instance uses, so a changed configuration never hits an old client
+        return (self.provider_name,) + tuple(self.resolve_overrides(overrides).items())
+
+    def get_cached_llm_instance(self, overrides) -> Union[LLM, BaseChatModel]:
+        """Returns a configured LLM instance, reusing the one created earlier for the same settings."""
+        if not self.aggregator:
+            return self.get_llm_instance(overrides)
+        try:
+            key = self.get_llm_cache_key(overrides)
+            hash(key)
+        except TypeError:
+            return self.get_llm_instance(overrides)
+        llm = self.aggregator.get_cached_llm(key)
+        if llm is None:
+            llm = self.get_llm_instance(overrides)
+            if llm:
+                llm = self.aggregator.cache_llm(key, llm)
+        return llm
     
     def get_available_models(self, do_refresh: bool = False) -> List[str]:
         """Returns a list of available model IDs from the provider."""
@@ -180,13 +232,14 @@ class OpenAIProvider(LLMProviderBase):
         return True
     
     def get_llm_instance(self, overrides) -> BaseChatModel:
+        settings = self.resolve_overrides(overrides)
         return ChatOpenAI(
-            openai_api_key=overrides.get("api_key", self.get_api_key()),
-            openai_api_base=overrides.get("endpoint", self.get_base_url()),
-            model=overrides.get("model", self.get_current_model()),
-            temperature=overrides.get("temperature", self.config.get("temperature", DEFAULT_TEMPERATURE)),
-            max_tokens=overrides.get("max_tokens", self.config.get("max_tokens", DEFAULT_MAX_TOKENS)),
-            request_timeout=self.get_timeout(overrides)
+            openai_api_key=settings["api_key"],
+            openai_api_base=settings["endpoint"],
+            model=settings["model"],
+            temperature=settings["temperature"],
+            max_tokens=settings["max_tokens"],
+            request_timeout=settings["timeout"]
         )
 
     def get_model_details(self, do_refresh: bool = False) -> List[Dict[str, Any]]:
@@ -251,14 +304,21 @@ class AnthropicProvider(LLMProviderBase):
     def use_reverse_sort(self) -> bool:
         return True
 
+    def resolve_overrides(self, overrides) -> Dict[str, Any]:
+        settings = super().resolve_overrides(overrides)
+        settings["endpoint"] = overrides.get("endpoint", None)  # The client knows its own default endpoint
+        settings["model"] = overrides.get("model", self.get_current_model() or "claude-3-haiku-20240307")
+        return settings
+
     def get_llm_instance(self, overrides) -> BaseChatModel:
+        settings = self.resolve_overrides(overrides)
         return ChatAnthropic(
-            anthropic_api_key=overrides.get("api_key", self.get_api_key()),
-            base_url=overrides.get("endpoint", None),
-            model=overrides.get("model", self.get_current_model() or "claude-3-haiku-20240307"),
-            temperature=overrides.get("temperature", self.config.get("temperature", DEFAULT_TEMPERATURE)),
-            max_tokens=overrides.get("max_tokens", self.config.get("max_tokens", DEFAULT_MAX_TOKENS)),
-            timeout=self.get_timeout(overrides)
+            anthropic_api_key=settings["api_key"],
+            base_url=settings["endpoint"],
+            model=settings["model"],
+            temperature=settings["temperature"],
+            max_tokens=settings["max_tokens"],
+            timeout=settings["timeout"]
         )
     
     def _do_models_request(self, url: str, headers: Dict[str, str] = None) -> List[str]:
@@ -269,7 +329,7 @@ class AnthropicProvider(LLMProviderBase):
         }
         if headers:
             default_headers.update(headers)
-        return requests.get(url, headers=default_headers)
+        return get_http_session().get(url, headers=default_headers)
 
 class GeminiProvider(LLMProviderBase):
     """Google Gemini provider implementation."""
@@ -298,13 +358,19 @@ class GeminiProvider(LLMProviderBase):
     def use_reverse_sort(self) -> bool:
         return True
     
+    def resolve_overrides(self, overrides) -> Dict[str, Any]:
+        settings = super().resolve_overrides(overrides)
+        settings["model"] = overrides.get("model", self.get_current_model() or "gemini-2.0-flash")
+        return settings
+
     def get_llm_instance(self, overrides) -> BaseChatModel:
+        settings = self.resolve_overrides(overrides)
         return ChatGoogleGenerativeAI(
-            google_api_key=overrides.get("api_key", self.get_api_key()),
-            model=overrides.get("model", self.get_current_model() or "gemini-2.0-flash"),
-            temperature=overrides.get("temperature", self.config.get("temperature", DEFAULT_TEMPERATURE)),
-            max_output_tokens=overrides.get("max_tokens", self.config.get("max_tokens", DEFAULT_MAX_TOKENS)),
-            timeout=self.get_timeout(overrides)
+            google_api_key=settings["api_key"],
+            model=settings["model"],
+            temperature=settings["temperature"],
+            max_output_tokens=settings["max_tokens"],
+            timeout=settings["timeout"]
         )
 
     def _do_models_request(self, url: str, headers: Dict[str, str] = None) -> List[str]:
@@ -313,7 +379,7 @@ class GeminiProvider(LLMProviderBase):
         if not api_key:
             raise ValueError(f"API key required for {self.provider_name}")
         url += f"?key={api_key}"
-        return requests.get(url, headers=headers)
+        return get_http_session().get(url, headers=headers)
 
     def get_model_details(self, do_refresh: bool = False) -> List[Dict[str, Any]]:
         """Returns detailed information about available Gemini models."""
@@ -375,14 +441,18 @@ class OllamaProvider(LLMProviderBase):
     def default_endpoint(self) -> str:
         return "http://localhost:11434/v1/"
     
+    def resolve_overrides(self, overrides) -> Dict[str, Any]:
+        settings = super().resolve_overrides(overrides)
+        if settings["model"][0:5] in ["", "Local"]:
+            settings["model"] = self.get_current_model()
+        return settings
+
     def get_llm_instance(self, overrides):
-        mymodel = overrides.get("model", self.get_current_model())
-        if mymodel[0:5] in ["", "Local"]:
-            mymodel = self.get_current_model()
+        settings = self.resolve_overrides(overrides)
         return ChatOllama(
-            model=mymodel,
-            temperature=overrides.get("temperature", self.config.get("temperature", DEFAULT_TEMPERATURE)),
-            timeout=self.get_timeout(overrides)
+            model=settings["model"],
+            temperature=settings["temperature"],
+            timeout=settings["timeout"]
         )
 
     def get_model_details(self, do_refresh: bool = False) -> List[Dict[str, Any]]:
@@ -439,13 +509,14 @@ class OpenRouterProvider(LLMProviderBase):
         return True
     
     def get_llm_instance(self, overrides) -> BaseChatModel:
+        settings = self.resolve_overrides(overrides)
         return ChatOpenAI(
-            openai_api_key=overrides.get("api_key", self.get_api_key()),
-            base_url=overrides.get("endpoint", self.get_base_url()),
-            model=overrides.get("model", self.get_current_model()),
-            temperature=overrides.get("temperature", self.config.get("temperature", DEFAULT_TEMPERATURE)),
-            max_tokens=overrides.get("max_tokens", self.config.get("max_tokens", DEFAULT_MAX_TOKENS)),
-            request_timeout=self.get_timeout(overrides)
+            openai_api_key=settings["api_key"],
+            base_url=settings["endpoint"],
+            model=settings["model"],
+            temperature=settings["temperature"],
+            max_tokens=settings["max_tokens"],
+            request_timeout=settings["timeout"]
         )
 
     def get_model_details(self, do_refresh: bool = False) -> List[Dict[str, Any]]:
@@ -507,12 +578,13 @@ class TogetherAIProvider(LLMProviderBase):
         return True
     
     def get_llm_instance(self, overrides) -> BaseChatModel:
+        settings = self.resolve_overrides(overrides)
         return ChatTogether(
-            together_api_key=overrides.get("api_key", self.get_api_key()),
-            base_url=overrides.get("endpoint", self.get_base_url()),
-            model=overrides.get("model", self.get_current_model()),
-            temperature=overrides.get("temperature", self.config.get("temperature", DEFAULT_TEMPERATURE)),
-            max_tokens=overrides.get("max_tokens", self.config.get("max_tokens", DEFAULT_MAX_TOKENS)),
+            together_api_key=settings["api_key"],
+            base_url=settings["endpoint"],
+            model=settings["model"],
+            temperature=settings["temperature"],
+            max_tokens=settings["max_tokens"],
         )
 
     def get_available_models(self, do_refresh: bool = False) -> List[str]:
@@ -586,14 +658,21 @@ class LMStudioProvider(LLMProviderBase):
     def default_endpoint(self) -> str:
         return "http://localhost:1234/v1"
 
+    def resolve_overrides(self, overrides) -> Dict[str, Any]:
+        settings = super().resolve_overrides(overrides)
+        settings["api_key"] = "not-needed"
+        settings["model"] = overrides.get("model", self.get_current_model() or "local-model")
+        return settings
+
     def get_llm_instance(self, overrides) -> BaseChatModel:
+        settings = self.resolve_overrides(overrides)
         return ChatOpenAI(
-            api_key="not-needed",
-            base_url=overrides.get("endpoint", self.get_base_url()),
-            model_name=overrides.get("model", self.get_current_model() or "local-model"),
-            temperature=overrides.get("temperature", self.config.get("temperature", DEFAULT_TEMPERATURE)),
-            max_tokens=overrides.get("max_tokens", self.config.get("max_tokens", DEFAULT_MAX_TOKENS)),
-            request_timeout=self.get_timeout(overrides)
+            api_key=settings["api_key"],
+            base_url=settings["endpoint"],
+            model_name=settings["model"],
+            temperature=settings["temperature"],
+            max_tokens=settings["max_tokens"],
+            request_timeout=settings["timeout"]
         )
 
 class CustomProvider(LLMProviderBase):
@@ -610,17 +689,35 @@ class CustomProvider(LLMProviderBase):
     def get_api_key(self):
         return super().get_api_key() or "not-needed"
     
-    def get_llm_instance(self, overrides) -> BaseChatModel:
+    def remember_overrides(self, overrides) -> None:
+        """Keeps the endpoint, API key and model of the last request as this provider's configuration."""
         self.config["endpoint"] = overrides.get("endpoint", self.get_base_url())
         self.config["api_key"] = overrides.get("api_key", self.get_api_key())
         self.config["model"] = overrides.get("model", self.get_current_model())
+
+    def resolve_overrides(self, overrides) -> Dict[str, Any]:
+        settings = super().resolve_overrides(overrides)
+        # Empty values fall back like the configuration they are remembered in
+        settings["endpoint"] = settings["endpoint"] or self.get_default_endpoint()
+        settings["api_key"] = settings["api_key"] or "not-needed"
+        settings["model"] = settings["model"] or "custom-model"
+        return settings
+
+    def get_cached_llm_instance(self, overrides) -> BaseChatModel:
+        # The configuration follows every request, including those served by a cached client
+        self.remember_overrides(overrides)
+        return super().get_cached_llm_instance(overrides)
+
+    def get_llm_instance(self, overrides) -> BaseChatModel:
+        self.remember_overrides(overrides)
+        settings = self.resolve_overrides(overrides)
         return ChatOpenAI(
-            base_url=self.get_base_url(),
-            api_key=self.get_api_key(),
-            model_name=self.get_current_model() or "custom-model",
-            temperature=overrides.get("temperature", self.config.get("temperature", DEFAULT_TEMPERATURE)),
-            max_tokens=overrides.get("max_tokens", self.config.get("max_tokens", DEFAULT_MAX_TOKENS)),
-            request_timeout=self.get_timeout(overrides)
+            base_url=settings["endpoint"],
+            api_key=settings["api_key"],
+            model_name=settings["model"],
+            temperature=settings["temperature"],
+            max_tokens=settings["max_tokens"],
+            request_timeout=settings["timeout"]
         )
 
 class WW_Aggregator:
@@ -631,6 +728,8 @@ class WW_Aggregator:
         self._settings = None
         self._model_cache = {}  # New: Shared cache for model details
         self._model_cache_timestamps = {}  # New: Timestamps for cache expiration
+        self._llm_cache = OrderedDict()  # Configured LLM clients, least recently used first
+        self._llm_cache_lock = threading.Lock()
     
     def create_provider(self, provider_name: str, config: Dict[str, Any] = None) -> Optional[LLMProviderBase]:
         """Create a new provider instance."""
@@ -695,7 +794,23 @@ class WW_Aggregator:
                 del self._model_cache_timestamps[provider_name]
         return None
 
-import threading
+    def cache_llm(self, key: tuple, llm: Union[LLM, BaseChatModel]) -> Union[LLM, BaseChatModel]:
+        """Cache an LLM client for reuse and return the client cached under the key."""
+        with self._llm_cache_lock:
+            # Another thread may have created a client for the same settings meanwhile
+            llm = self._llm_cache.setdefault(key, llm)
+            self._llm_cache.move_to_end(key)
+            while len(self._llm_cache) > LLM_CLIENT_CACHE_SIZE:
+                self._llm_cache.popitem(last=False)
+        return llm
+
+    def get_cached_llm(self, key: tuple) -> Optional[Union[LLM, BaseChatModel]]:
+        """Retrieve the cached LLM client for a set of settings."""
+        with self._llm_cache_lock:
+            llm = self._llm_cache.get(key)
+            if llm is not None:
+                self._llm_cache.move_to_end(key)
+            return llm
 
 class LLMAPIAggregator:
     """Main class for the LLM API Aggregator."""
@@ -734,7 +849,7 @@ class LLMAPIAggregator:
         if overrides.get("model") in [None, "Default Model"]:
             overrides["model"] = provider.get_current_model()
         
-        llm = provider.get_llm_instance(overrides)
+        llm = provider.get_cached_llm_instance(overrides)
         
         if conversation_history:
             from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
@@ -789,7 +904,7 @@ class LLMAPIAggregator:
             overrides["model"] = provider.get_current_model()
 
         try:
-            llm = provider.get_llm_instance(overrides)
+            llm = provider.get_cached_llm_instance(overrides)
         except ValueError as e:
             raise ValueError(f"Failed to initialize LLM: {e}")
         
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+import os
+import atexit
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+def write_file_atomic(path: str, data: str, durable: bool = False) -> None:
+    """
+    Write text to a temporary file next to path and rename it into place.
+    If durable is set, the data has reached the disk when this returns.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(data)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+def append_file(path: str, data: str) -> None:
+    """Append text to path and make sure it has reached the disk."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+class _PendingOperation:
+    __slots__ = ("path", "data", "action", "on_error")
+
+    def __init__(self, path: Optional[str], data: Optional[str], action: Optional[Callable] = None,
+                 on_error: Optional[Callable] = None):
+        self.path = path
+        self.data = data  # None means the file is to be removed
+        self.action = action  # Arbitrary background job instead of a file operation
+        self.on_error = on_error  # Called with the exception if the operation fails
+
+class PersistenceQueue:
+    """
+    Write-behind queue that performs project file writes on a background thread.
+
+    Writes are keyed so that a newer write with the same key replaces one that
+    has not reached the disk yet; the superseded path is reported back to the
+    caller. Until an operation has completed, read() and exists() answer from
+    the queue, so callers see their own writes immediately.
+
+    A failed operation calls its own on_error callback and then every error
+    listener with (path, error message), on the queue's thread.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # key -> _PendingOperation
+        self._by_path = {}  # normalized path -> latest queued or running operation
+        self._active = None
+        self._thread = None
+        self._appends = itertools.count()
+        self._error_listeners = []
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def _enqueue(self, key: str, operation: _PendingOperation) -> Optional[str]:
+        superseded = None
+        with self._cond:
+            previous = self._pending.pop(key, None)
+            if previous is not None and previous.path is not None:
+                previous_path = self._normalize(previous.path)
+                if self._by_path.get(previous_path) is previous:
+                    del self._by_path[previous_path]
+                if operation.path is not None and previous_path != self._normalize(operation.path):
+                    superseded = previous.path
+            self._pending[key] = operation
+            if operation.path is not None:
+                self._by_path[self._normalize(operation.path)] = operation
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="PersistenceQueue", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return superseded
+
+    def write(self, path: str, data: str, key: Optional[str] = None,
+              on_error: Optional[Callable] = None) -> Optional[str]:
+        """
+        Queue an atomic write of data to path.
+
+        Parameters:
+            path (str): The file to write.
+            data (str): The full text content of the file.
+            key (str, optional): Coalescing key; defaults to the path itself.
+            on_error (callable, optional): Called with the exception if the write fails.
+
+        Returns:
+            The path of a pending write that was dropped in favour of this one, if any.
+        """
+        return self._enqueue(key or self._normalize(path), _PendingOperation(path, data, on_error=on_error))
+
+    def remove(self, path: str) -> None:
+        """Queue the removal of a file, ordered after any writes already queued."""
+        self._enqueue("remove:" + self._normalize(path), _PendingOperation(path, None))
+
+    def append(self, path: str, data: str) -> None:
+        """Queue text to be appended to path. Appends are never coalesced and keep their order."""
+        self._enqueue(f"append:{next(self._appends)}", _PendingOperation(None, None, lambda: append_file(path, data)))
+
+    def call(self, key: str, action: Callable) -> None:
+        """
+        Queue a job to run on the background thread after the operations already queued.
+        A pending job with the same key is replaced.
+        """
+        self._enqueue("call:" + key, _PendingOperation(None, None, action))
+
+    def add_error_listener(self, listener: Callable) -> None:
+        """Register a callable to be told (path, error message) about every failed operation."""
+        with self._cond:
+            self._error_listeners.append(listener)
+
+    def remove_error_listener(self, listener: Callable) -> None:
+        with self._cond:
+            if listener in self._error_listeners:
+                self._error_listeners.remove(listener)
+
+    def read(self, path: str) -> Optional[str]:
+        """Return the queued content of path, or None if no write to it is pending."""
+        with self._cond:
+            operation = self._by_path.get(self._normalize(path))
+            return operation.data if operation is not None else None
+
+    def exists(self, path: str) -> bool:
+        """Return whether path exists once all queued operations have completed."""
+        with self._cond:
+            operation = self._by_path.get(self._normalize(path))
+            if operation is not None:
+                return operation.data is not None
+        return os.path.exists(path)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued operation has reached the disk. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and self._active is None, timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                _, operation = self._pending.popitem(last=False)
+                self._active = operation
+            try:
+                if operation.action is not None:
+                    operation.action()
+                elif operation.data is None:
+                    if os.path.exists(operation.path):
+                        os.remove(operation.path)
+                else:
+                    write_file_atomic(operation.path, operation.data)
+            except Exception as e:
+                print(f"Error writing {operation.path or 'project data'} in background: {e}")
+                self._report_failure(operation, e)
+            finally:
+                with self._cond:
+                    self._active = None
+                    if operation.path is not None:
+                        path = self._normalize(operation.path)
+                        if self._by_path.get(path) is operation:
+                            del self._by_path[path]
+                    self._cond.notify_all()
+
+    def _report_failure(self, operation: _PendingOperation, error: Exception) -> None:
+        with self._cond:
+            listeners = list(self._error_listeners)
+        callbacks = [lambda: operation.on_error(error)] if operation.on_error is not None else []
+        callbacks += [lambda listener=listener: listener(operation.path, str(error)) for listener in listeners]
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error reporting a failed background write: {e}")
+
+WWPersistenceQueue = PersistenceQueue()
+atexit.register(WWPersistenceQueue.flush)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import os
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Optional
+from .persistence_queue import WWPersistenceQueue
+from .autosave_index import content_digest, split_revision_header, UUID_HEADER, PROTECTED_HEADER
+
+try:
+    from PyQt5.QtGui import QGuiApplication, QTextDocument
+except ImportError:
+    QGuiApplication = None
+    QTextDocument = None
+
+CACHE_PREFIX = "plaintext_"  # Cached texts are plaintext_<digest>.txt files in the project folder
+MAX_CACHED_TEXTS = 512
+
+_BLOCK_TAGS = {"p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "li", "tr", "blockquote", "pre", "table", "ul", "ol"}
+_SKIPPED_TAGS = {"head", "style", "script", "title"}
+
+class _TextExtractor(HTMLParser):
+    """Approximates QTextDocument.toPlainText() for use where no Qt application is running."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self.current = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self.skip += 1
+        elif tag in _BLOCK_TAGS:
+            self._end_block()
+        elif tag == "br":
+            self.current.append("\u2028")  # Line separator, kept apart from newlines in the markup
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self.skip = max(0, self.skip - 1)
+        elif tag in _BLOCK_TAGS:
+            self._end_block()
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.current.append(data)
+
+    def _end_block(self):
+        if self.current:
+            lines = "".join(self.current).split("\u2028")
+            self.blocks.append("\n".join(" ".join(line.split()) for line in lines))
+        self.current = []
+
+    def text(self):
+        self._end_block()
+        return "\n".join(self.blocks)
+
+def _convert(html: str) -> tuple:
+    """Return (plain text, whether Qt did the conversion)."""
+    if QTextDocument is not None and QGuiApplication.instance() is not None:
+        # QTextDocument is reentrant, so a private instance is safe on worker threads
+        doc = QTextDocument()
+        doc.setHtml(html)
+        return doc.toPlainText(), True
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text(), False
+
+class PlainTextCache:
+    """
+    Shared HTML to plain-text conversion with a content-addressed cache.
+
+    Results are keyed by the digest of the HTML, the same digest the autosave
+    index records for every revision, so an unchanged scene is converted only
+    once. Converted text is kept in memory and, when a project folder is given,
+    in plaintext_<digest>.txt files next to the project's revisions, so it
+    survives restarts. These files are the only copy of the plain text on
+    disk; the search index stores digests and reads the text back through
+    lookup().
+    Conversion uses QTextDocument, which never creates a widget and gives the
+    same character positions as the editor; without a running Qt application
+    a plain HTML parser is used instead and its results are not written to
+    disk. Safe to use from worker threads.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_TEXTS):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (digest, converted by Qt) -> text
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_path(project_folder: str, digest: str) -> str:
+        return os.path.join(project_folder, f"{CACHE_PREFIX}{digest}.txt")
+
+    def get(self, html: str, project_folder: Optional[str] = None) -> str:
+        """Return the plain text of stored HTML content, with any UUID and PROTECTED header lines removed."""
+        return self.get_with_digest(html, project_folder)[1]
+
+    def get_with_digest(self, html: str, project_folder: Optional[str] = None) -> tuple:
+        """Return (digest of the content, plain text) for stored HTML content."""
+        if not html:
+            return content_digest(""), ""
+        if html.startswith(UUID_HEADER) or html.startswith(PROTECTED_HEADER):
+            html = split_revision_header(html)[2]
+        digest = content_digest(html)
+        text = self.lookup(project_folder, digest)
+        if text is None:
+            text, qt_used = _convert(html)
+            if project_folder and qt_used:
+                WWPersistenceQueue.write(self.cache_path(project_folder, digest), text)
+            self._remember((digest, qt_used), text)
+        return digest, text
+
+    def lookup(self, project_folder: Optional[str], digest: str) -> Optional[str]:
+        """Return the plain text converted earlier for the content with the given digest, or None."""
+        qt_available = QTextDocument is not None and QGuiApplication.instance() is not None
+        key = (digest, qt_available)
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                return text
+        if not project_folder or not qt_available:
+            return None
+        path = self.cache_path(project_folder, digest)
+        text = WWPersistenceQueue.read(path)
+        if text is None and WWPersistenceQueue.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except OSError as e:
+                print(f"Error reading cached plain text {path}: {e}")
+        if text is not None:
+            self._remember(key, text)
+        return text
+
+    def _remember(self, key: tuple, text: str) -> None:
+        with self._lock:
+            self._entries[key] = text
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, project_folder: str, digest: str) -> None:
+        """Queue the removal of the cached text of a revision that no longer exists."""
+        WWPersistenceQueue.remove(self.cache_path(project_folder, digest))
+
+WWPlainText = PlainTextCache()
+
+def html_to_plain_text(html: str, project_folder: Optional[str] = None) -> str:
+    """Convert stored scene or summary HTML to plain text through the shared cache."""
+    return WWPlainText.get(html, project_folder)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+import os
+import zlib
+import threading
+
+PACK_FILENAME = "revisions.pack"
+COMPRESSION_LEVEL = 9
+MIN_COMPACT_BYTES = 1024 * 1024  # Don't bother compacting packs with less dead space than this
+
+class RevisionPack:
+    """
+    Append-only pack file holding zlib-compressed scene revisions of one project.
+
+    Each revision is stored as a compressed blob addressed by (offset, length);
+    the autosave index keeps those addresses. A blob also records the revision's
+    file name, timestamp and protected flag, so the index can be rebuilt from the
+    pack alone. Blobs of deleted revisions stay in the file until compact()
+    rewrites it with only the live ones.
+    """
+
+    def __init__(self, project_folder: str):
+        self.path = os.path.join(project_folder, PACK_FILENAME)
+        self._lock = threading.Lock()
+
+    def append(self, filename: str, timestamp: float, raw: str, protected: bool = False) -> tuple:
+        """Compress a revision, append it to the pack and return its (offset, length)."""
+        blob = self._encode(filename, timestamp, raw, protected)
+        with self._lock:
+            with open(self.path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+        return offset, len(blob)
+
+    def read(self, offset: int, length: int, filename: str = None) -> str:
+        """
+        Return the revision stored at the given location.
+        Raises ValueError if a file name is given and the blob there belongs to another file.
+        """
+        with self._lock:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                blob = f.read(length)
+        stored_name, _, _, raw = self._split_record(zlib.decompress(blob))
+        if filename is not None and stored_name != filename:
+            raise ValueError(f"Blob at offset {offset} holds {stored_name}, not {filename}")
+        return raw
+
+    @staticmethod
+    def _encode(filename: str, timestamp: float, raw: str, protected: bool) -> bytes:
+        record = f"{filename}\t{timestamp}\t{int(protected)}\n{raw}"
+        return zlib.compress(record.encode("utf-8"), COMPRESSION_LEVEL)
+
+    @staticmethod
+    def _split_record(data: bytes) -> tuple:
+        header, _, raw = data.decode("utf-8").partition("\n")
+        fields = header.split("\t")
+        # Blobs written before the protected flag was stored have only two fields
+        protected = len(fields) > 2 and fields[2] == "1"
+        return fields[0], float(fields[1]), protected, raw
+
+    def scan(self):
+        """Yield (offset, length, filename, timestamp, protected, raw) for every blob in the pack, live or dead."""
+        with self._lock:
+            try:
+                with open(self.path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                return
+        offset = 0
+        while offset < len(data):
+            decompressor = zlib.decompressobj()
+            try:
+                record = decompressor.decompress(memoryview(data)[offset:])
+                filename, timestamp, protected, raw = self._split_record(record)
+            except (zlib.error, ValueError, IndexError, UnicodeDecodeError) as e:
+                print(f"Error reading revision pack {self.path} at offset {offset}: {e}")
+                return
+            length = len(data) - offset - len(decompressor.unused_data)
+            yield offset, length, filename, timestamp, protected, raw
+            offset += length
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def needs_compaction(self, live_bytes: int) -> bool:
+        """Return whether dead blobs take up more space than the live ones."""
+        dead_bytes = self.size() - live_bytes
+        return dead_bytes > MIN_COMPACT_BYTES and dead_bytes > live_bytes
+
+    def compact(self, locations: list, rename=None) -> list:
+        """
+        Rewrite the pack keeping only the blobs at the given (offset, length) locations.
+        If rename is given, the file name stored with each blob is replaced by rename(file name).
+
+        Returns:
+            The new locations, in the same order as the ones passed in.
+        """
+        temp_path = self.path + ".tmp"
+        new_locations = []
+        with self._lock:
+            with open(self.path, "rb") as src, open(temp_path, "wb") as dst:
+                for offset, length in locations:
+                    src.seek(offset)
+                    blob = src.read(length)
+                    if rename is not None:
+                        filename, timestamp, protected, raw = self._split_record(zlib.decompress(blob))
+                        blob = self._encode(rename(filename), timestamp, raw, protected)
+                    new_locations.append((dst.tell(), len(blob)))
+                    dst.write(blob)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(temp_path, self.path)
+        return new_locations
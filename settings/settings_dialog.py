@@ -79,6 +79,11 @@ class SettingsDialog(QDialog):
         self.enable_autosave_checkbox = QCheckBox(_("Enable Auto-Save"))
         self.enable_autosave_checkbox.stateChanged.connect(self.mark_unsaved_changes)
         layout.addRow(self.enable_autosave_checkbox)
+
+        self.compress_backups_checkbox = QCheckBox(_("Compress Backup History"))
+        self.compress_backups_checkbox.setToolTip(_("Keep only the latest version of each scene as a file and store older backups compressed in a single pack file"))
+        self.compress_backups_checkbox.stateChanged.connect(self.mark_unsaved_changes)
+        layout.addRow(self.compress_backups_checkbox)
         
         self.show_quote_checkbox = QCheckBox(_("Show Random Quotes"))
         self.show_quote_checkbox.stateChanged.connect(self.mark_unsaved_changes)
@@ -311,6 +316,7 @@ class SettingsDialog(QDialog):
         self.tabs.setTabText(2, _("Providers"))
         self.fast_tts_checkbox.setText(_("Fast Text to Speech"))
         self.enable_autosave_checkbox.setText(_("Enable Auto-Save"))
+        self.compress_backups_checkbox.setText(_("Compress Backup History"))
         self.show_quote_checkbox.setText(_("Show Random Quotes"))
         self.enable_debug_logging_checkbox.setText(_("Enable Debug Logging"))
         self.language_label.setText(_("Language"))
@@ -335,6 +341,7 @@ class SettingsDialog(QDialog):
         """Loads the settings values into the UI elements."""
         self.fast_tts_checkbox.setChecked(self.general_settings["fast_tts"])
         self.enable_autosave_checkbox.setChecked(self.general_settings["enable_autosave"])
+        self.compress_backups_checkbox.setChecked(self.general_settings.get("compress_backups", False))
         self.enable_debug_logging_checkbox.setChecked(self.general_settings.get("enable_debug_logging", False))
         index = self.language_combobox.findText(self.general_settings["language"])
         if index >= 0:
@@ -354,6 +361,7 @@ class SettingsDialog(QDialog):
         """Saves the current UI settings to the JSON file."""
         self.general_settings["fast_tts"] = self.fast_tts_checkbox.isChecked()
         self.general_settings["enable_autosave"] = self.enable_autosave_checkbox.isChecked()
+        self.general_settings["compress_backups"] = self.compress_backups_checkbox.isChecked()
         self.general_settings["show_random_quote"] = self.show_quote_checkbox.isChecked()
         self.general_settings["enable_debug_logging"] = self.enable_debug_logging_checkbox.isChecked()
         self.general_settings["language"] = self.language_combobox.currentText()
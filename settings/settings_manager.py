@@ -22,6 +22,8 @@ class SettingsManager:
         "general": {
             "fast_tts": False,
             "enable_autosave": False,
+            "compress_backups": False,
+            "scene_cache_mb": 64,
             "language": "en",
             "enable_debug_logging": False
         },
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import os
+from typing import List, Optional, Tuple
+from .persistence_queue import WWPersistenceQueue, append_file
+from .plain_text import html_to_plain_text
+
+HISTORY_FILENAME = "word_counts.tsv"
+
+def history_path(project_folder: str) -> str:
+    return os.path.join(project_folder, HISTORY_FILENAME)
+
+def record_word_count(project_folder: str, uuid: Optional[str], content: str, timestamp: float) -> None:
+    """
+    Queue a line with the word count of a newly saved scene revision for the project's history.
+
+    Each line holds the save time, the scene UUID and the number of words, separated by tabs.
+    The words are counted on the persistence queue's thread, after the revision itself was written.
+    """
+    path = history_path(project_folder)
+
+    def append():
+        words = len(html_to_plain_text(content, project_folder).split())
+        append_file(path, f"{int(timestamp)}\t{uuid or ''}\t{words}\n")
+
+    WWPersistenceQueue.call(f"words:{path}:{timestamp}:{uuid}", append)
+
+def read_word_count_history(project_folder: str) -> Optional[List[Tuple[float, str, int]]]:
+    """
+    Return the recorded (save time, scene UUID, word count) entries of a project, oldest first.
+
+    Returns:
+        The entries, or None if no history has been recorded for the project yet.
+    """
+    path = history_path(project_folder)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        print(f"Error reading word count history {path}: {e}")
+        return None
+    entries = []
+    for line in lines:
+        fields = line.split("\t")
+        try:
+            entries.append((float(fields[0]), fields[1], int(fields[2])))
+        except (IndexError, ValueError):
+            continue  # A line cut short by a crash
+    entries.sort(key=lambda entry: entry[0])
+    return entries
@@ -0,0 +1,68 @@
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+from settings import autosave_manager
+from settings.persistence_queue import WWPersistenceQueue
+from settings.plain_text import WWPlainText, CACHE_PREFIX
+
+
+class FakeApplication:
+    @staticmethod
+    def instance():
+        return True
+
+
+class FakeTextDocument:
+    """Stands in for QTextDocument so the converted text is written to the project folder."""
+
+    def setHtml(self, html):
+        self.html = html
+
+    def toPlainText(self):
+        return re.sub(r"<[^>]+>", "", self.html).strip()
+
+
+class RenameProjectFolderTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        patcher = mock.patch.multiple("settings.plain_text", QGuiApplication=FakeApplication,
+                                      QTextDocument=FakeTextDocument)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        WWPersistenceQueue.flush()
+        WWPlainText._entries.clear()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_rename_keeps_cached_conversions_and_subfolders(self):
+        filepath = autosave_manager.save_scene("Old", ["Act", "Chapter", "Scene"], "uuid-1", "<p>Hello there</p>")
+        WWPersistenceQueue.flush()
+        old_folder = os.path.join("Projects", "Old")
+        cached = [name for name in os.listdir(old_folder) if name.startswith(CACHE_PREFIX)]
+        self.assertEqual(len(cached), 1)
+        # Compendium images are kept in a subfolder of the project
+        os.mkdir(os.path.join(old_folder, "images"))
+        with open(os.path.join(old_folder, "images", "cover.png"), "wb") as f:
+            f.write(b"png")
+
+        new_folder = os.path.join("Projects", "New")
+        autosave_manager.rename_project_folder(old_folder, new_folder, "Old", "New")
+
+        self.assertFalse(os.path.exists(old_folder))
+        self.assertTrue(os.path.isfile(os.path.join(new_folder, cached[0])))
+        self.assertTrue(os.path.isfile(os.path.join(new_folder, "images", "cover.png")))
+        renamed = os.path.join(new_folder, "New" + os.path.basename(filepath)[len("Old"):])
+        self.assertTrue(os.path.isfile(renamed))
+        latest = autosave_manager.get_latest_autosave_path("New", ["Act", "Chapter", "Scene"])
+        self.assertEqual(os.path.normpath(latest), os.path.normpath(renamed))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+analysis_highlighter.py
+
+Paints the results of the text analysis onto an editor through a QSyntaxHighlighter,
+so the highlights never touch the document's own formatting and only the blocks
+that are on screen are re-rendered when the shown issue types change.
+"""
+
+from bisect import bisect_left
+from PyQt5.QtGui import QSyntaxHighlighter, QTextBlockUserData
+from PyQt5.QtCore import QPoint
+
+class SpanIndex:
+    """(start, end) spans sorted by start, looked up by the range of text they overlap."""
+
+    def __init__(self, spans=()):
+        self.spans = sorted((start, end) for start, end in spans if end > start)
+        self.starts = [start for start, _ in self.spans]
+        # No span starts further than this before a range it overlaps
+        self.max_length = max((end - start for start, end in self.spans), default=0)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def overlapping(self, start, end):
+        """Return the spans that overlap start..end."""
+        result = []
+        index = bisect_left(self.starts, start - self.max_length)
+        while index < len(self.spans) and self.starts[index] < end:
+            if self.spans[index][1] > start:
+                result.append(self.spans[index])
+            index += 1
+        return result
+
+    def shift(self, position, removed, added):
+        """
+        Move the spans along with an edit of the text, the way character formats would move:
+        text inserted inside a span extends it, removed text shrinks it.
+        """
+        edit_end = position + removed
+        delta = added - removed
+        spans = []
+        for start, end in self.spans:
+            if start >= position:
+                start = start + delta if start >= edit_end else position + added
+            if end > position:
+                end = end + delta if end >= edit_end else position
+            spans.append((start, end))
+        self.__init__(spans)
+
+class BlockGeneration(QTextBlockUserData):
+    """Records which highlighting settings a block was last rendered with."""
+
+    def __init__(self, generation):
+        super().__init__()
+        self.generation = generation
+
+class AnalysisHighlighter(QSyntaxHighlighter):
+    """
+    Highlights analysis results in a QTextEdit.
+
+    The results are given as layers of (name, SpanIndex, QTextCharFormat), painted in order so a
+    later layer wins where spans overlap. Only the layers whose names are enabled are shown.
+    Changing the layers or the enabled names re-renders the visible blocks right away; the other
+    blocks are re-rendered when they are scrolled into view.
+    """
+
+    def __init__(self, text_edit):
+        super().__init__(None)
+        self.text_edit = text_edit
+        self.layers = []
+        self.enabled = set()
+        self.generation = 0
+        document = text_edit.document()
+        # Connected before setDocument, so the spans have moved before the edited blocks are re-highlighted
+        document.contentsChange.connect(self.shift_spans)
+        self.setDocument(document)
+        scroll_bar = text_edit.verticalScrollBar()
+        scroll_bar.valueChanged.connect(self.refresh_visible_blocks)
+        scroll_bar.rangeChanged.connect(self.refresh_visible_blocks)
+
+    def set_layers(self, layers):
+        self.layers = layers
+        self.generation += 1
+        self.refresh_visible_blocks()
+
+    def set_enabled(self, names):
+        self.enabled = set(names)
+        self.generation += 1
+        self.refresh_visible_blocks()
+
+    def shift_spans(self, position, removed, added):
+        for _, index, _ in self.layers:
+            index.shift(position, removed, added)
+
+    def highlightBlock(self, text):
+        self.setCurrentBlockUserData(BlockGeneration(self.generation))
+        block_start = self.currentBlock().position()
+        block_end = block_start + len(text)
+        for name, index, char_format in self.layers:
+            if name not in self.enabled:
+                continue
+            for start, end in index.overlapping(block_start, block_end):
+                start = max(start, block_start)
+                self.setFormat(start - block_start, min(end, block_end) - start, char_format)
+
+    def refresh_visible_blocks(self, *_):
+        """Re-render the blocks in the viewport that were rendered with older settings."""
+        viewport = self.text_edit.viewport()
+        block = self.text_edit.cursorForPosition(QPoint(0, 0)).block()
+        last = self.text_edit.cursorForPosition(QPoint(viewport.width(), viewport.height())).block()
+        while block.isValid():
+            data = block.userData()
+            if not isinstance(data, BlockGeneration) or data.generation != self.generation:
+                self.rehighlightBlock(block)
+            if block == last:
+                break
+            block = block.next()
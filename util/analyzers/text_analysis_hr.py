@@ -11,7 +11,7 @@ import threading
 import re
 from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtWidgets import QMessageBox
-from util.base_text_analysis import BaseTextAnalysis
+from util.base_text_analysis import BaseTextAnalysis, load_model
 
 # Tooltip translations in Croatian
 TOOLTIP_TRANSLATIONS = {
@@ -122,7 +122,7 @@ class CroatianTextAnalysis(BaseTextAnalysis, QObject):
         """
         try:
             spacy.cli.download('hr_core_news_sm')
-            self.nlp = spacy.load('hr_core_news_sm')
+            self.nlp = load_model('hr_core_news_sm')
             self.model_loaded.emit()
         except Exception as e:
             print(f"Error during model download: {e}")
@@ -11,7 +11,7 @@ import spacy.cli
 import threading
 from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtWidgets import QMessageBox
-from util.base_text_analysis import BaseTextAnalysis
+from util.base_text_analysis import BaseTextAnalysis, load_model
 import re
 
 # Tooltip translations in Italian for Italian text analysis.
@@ -128,7 +128,7 @@ class ItalianTextAnalysis(BaseTextAnalysis, QObject):
         """
         try:
             spacy.cli.download('it_core_news_sm')
-            self.nlp = spacy.load('it_core_news_sm')
+            self.nlp = load_model('it_core_news_sm')
             self.model_loaded.emit()
         except Exception as e:
             print(f"Error during model download: {e}")
@@ -10,7 +10,7 @@ import spacy.cli
 import threading
 from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtWidgets import QMessageBox
-from util.base_text_analysis import BaseTextAnalysis
+from util.base_text_analysis import BaseTextAnalysis, load_model
 import re
 import math
 
@@ -120,7 +120,7 @@ class DutchTextAnalysis(BaseTextAnalysis, QObject):
         """
         try:
             spacy.cli.download('nl_core_news_sm')
-            self.nlp = spacy.load('nl_core_news_sm')
+            self.nlp = load_model('nl_core_news_sm')
             self.model_loaded.emit()
         except Exception as e:
             print(f"Error during model download: {e}")
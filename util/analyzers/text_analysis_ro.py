@@ -14,7 +14,7 @@ import threading
 import re
 from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtWidgets import QMessageBox
-from util.base_text_analysis import BaseTextAnalysis
+from util.base_text_analysis import BaseTextAnalysis, load_model
 
 # Romanian tooltip translations
 TOOLTIP_TRANSLATIONS = {
@@ -139,7 +139,7 @@ class RomanianTextAnalysis(BaseTextAnalysis, QObject):
         """
         try:
             spacy.cli.download('ro_core_news_sm')
-            self.nlp = spacy.load('ro_core_news_sm')
+            self.nlp = load_model('ro_core_news_sm')
             self.model_loaded.emit()
         except Exception as e:
             print(f"Error during model download: {e}")
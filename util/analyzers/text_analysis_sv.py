@@ -11,7 +11,7 @@ import threading
 import re
 from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtWidgets import QMessageBox
-from util.base_text_analysis import BaseTextAnalysis
+from util.base_text_analysis import BaseTextAnalysis, load_model
 
 TOOLTIP_TRANSLATIONS = {
     "complex": """
@@ -120,7 +120,7 @@ class SwedishTextAnalysis(BaseTextAnalysis, QObject):
         """
         try:
             spacy.cli.download('sv_core_news_sm')
-            self.nlp = spacy.load('sv_core_news_sm')
+            self.nlp = load_model('sv_core_news_sm')
             self.model_loaded.emit()
         except Exception as e:
             print(f"Error during model download: {e}")
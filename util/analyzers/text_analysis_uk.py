@@ -10,7 +10,7 @@ import spacy.cli
 import threading
 from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtWidgets import QMessageBox
-from util.base_text_analysis import BaseTextAnalysis
+from util.base_text_analysis import BaseTextAnalysis, load_model
 import re
 
 # Ukrainian tooltip translations
@@ -121,7 +121,7 @@ class UkrainianTextAnalysis(BaseTextAnalysis, QObject):
         """
         try:
             spacy.cli.download('uk_core_news_sm')
-            self.nlp = spacy.load('uk_core_news_sm')
+            self.nlp = load_model('uk_core_news_sm')
             self.model_loaded.emit()
         except Exception as e:
             print(f"Помилка під час завантаження моделі: {e}")
@@ -11,7 +11,7 @@ import threading
 import math
 from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtWidgets import QMessageBox
-from util.base_text_analysis import BaseTextAnalysis
+from util.base_text_analysis import BaseTextAnalysis, load_model
 import re
 
 TOOLTIP_TRANSLATIONS = {
@@ -120,7 +120,7 @@ class ChineseTextAnalysis(BaseTextAnalysis, QObject):
         """
         try:
             spacy.cli.download('zh_core_web_sm')
-            self.nlp = spacy.load('zh_core_web_sm')
+            self.nlp = load_model('zh_core_web_sm')
             self.model_loaded.emit()
         except Exception as e:
             print(f"Error during model download: {e}")
@@ -7,28 +7,120 @@ Language-specific data is provided by the respective language modules.
 """
 
 import spacy
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, OrderedDict
+import hashlib
 import re
+import threading
+
+DOC_CACHE_SIZE = 8  # Parsed documents kept in memory, across all languages
+PARAGRAPH_CACHE_SIZE = 2000  # Analyzed paragraphs kept per language for the incremental analysis
+
+_models = {}  # model name -> loaded spaCy pipeline, shared by every analysis in the process
+_models_lock = threading.Lock()
+_model_load_locks = {}  # model name -> lock held while that model loads
+
+_doc_cache = OrderedDict()  # (model name, disabled components, text digest) -> spaCy Doc
+_doc_cache_lock = threading.Lock()
+
+# Pipeline components only some detectors need -> those detectors; the components are
+# skipped while parsing when none of their detectors is enabled
+OPTIONAL_COMPONENTS = {
+    "ner": {"pronoun_clarity"}
+}
+
+# Results that only depend on the sentences they were found in, so they can be collected per paragraph
+LOCAL_RESULT_KEYS = ("sentence_analysis", "weak_formulations", "passive_voice", "nonstandard_speech",
+                     "filter_words", "telling_not_showing", "weak_verbs", "pronoun_clarity")
+
+def load_model(model_name):
+    """
+    Returns the spaCy pipeline of a model, loading it only the first time it is asked for in this process.
+    Raises OSError like spacy.load if the model isn't installed.
+    """
+    with _models_lock:
+        nlp = _models.get(model_name)
+        if nlp is not None:
+            return nlp
+        load_lock = _model_load_locks.setdefault(model_name, threading.Lock())
+    # Other models stay available while this one loads; a second caller waits for the first load
+    with load_lock:
+        with _models_lock:
+            nlp = _models.get(model_name)
+        if nlp is None:
+            nlp = spacy.load(model_name)
+            with _models_lock:
+                _models[model_name] = nlp
+    return nlp
+
+def is_model_loaded(model_name):
+    """Returns whether load_model would return the model right away."""
+    with _models_lock:
+        return model_name in _models
+
+def split_paragraphs(text):
+    """Returns the (start, end) offsets of the paragraphs of the text that aren't blank."""
+    spans = []
+    para_start = 0
+    separators = [(sep.start(), sep.end()) for sep in re.finditer(r'\n\s*\n', text)]
+    for para_end, next_start in separators + [(len(text), len(text))]:
+        # The same pieces re.split would return, tracked by offset
+        if text[para_start:para_end].strip():
+            spans.append((para_start, para_end))
+        para_start = next_start
+    return spans
 
 class BaseTextAnalysis:
     def __init__(self, model_name, language_data):
         self.model_name = model_name
         self.language_data = language_data
         self.nlp = None
+        self._paragraph_cache = OrderedDict()  # (paragraph digest, target grade, disabled components) -> results
+        self._paragraph_cache_lock = threading.Lock()
+
+    def parse(self, text, disable=()):
+        """
+        Returns the spaCy Doc of the text, parsing it only if it isn't cached yet.
+        All detectors share this Doc, so a text is parsed once however many of them run.
+        The pipeline components in disable are skipped.
+        """
+        key = (self.model_name, tuple(disable), hashlib.sha1(text.encode("utf-8")).hexdigest())
+        with _doc_cache_lock:
+            doc = _doc_cache.get(key)
+            if doc is not None:
+                _doc_cache.move_to_end(key)
+                return doc
+        doc = self.nlp(text, disable=list(disable))
+        with _doc_cache_lock:
+            _doc_cache[key] = doc
+            while len(_doc_cache) > DOC_CACHE_SIZE:
+                _doc_cache.popitem(last=False)
+        return doc
 
     def initialize(self):
         """Initializes the spaCy model for the selected language."""
         if self.nlp is not None:
             return True
         try:
-            self.nlp = spacy.load(self.model_name)
+            self.nlp = load_model(self.model_name)
             return True
         except OSError:
             return False
 
-    def analyze_text(self, text, target_grade):
+    def disabled_components(self, detectors=None):
+        """
+        Returns the pipeline components that none of the given detectors needs, sorted by name.
+        Detectors are named like the analysis options of the GUI; None means all of them.
+        """
+        if detectors is None or self.nlp is None:
+            return ()
+        detectors = set(detectors)
+        return tuple(sorted(component for component, users in OPTIONAL_COMPONENTS.items()
+                            if component in self.nlp.pipe_names and not users & detectors))
+
+    def analyze_text(self, text, target_grade, doc=None):
         """Analyzes the text at the sentence level. This method can be overridden by language-specific subclasses."""
-        doc = self.nlp(text)
+        if doc is None:
+            doc = self.parse(text)
         annotated_sentences = []
         for sent in doc.sents:
             sent_text = sent.text.strip()
@@ -81,9 +173,10 @@ class BaseTextAnalysis:
         spans.sort(key=lambda span: span[0])
         return spans
 
-    def detect_nonstandard_speech_verbs(self, text):
+    def detect_nonstandard_speech_verbs(self, text, doc=None):
         """Detects non-standard speech verbs."""
-        doc = self.nlp(text)
+        if doc is None:
+            doc = self.parse(text)
         standard_verbs = self.language_data.get("standard_speech_verbs", {"say", "ask"})
         speech_verbs = self.language_data.get("speech_verbs", {"say", "ask"})
         spans = []
@@ -128,6 +221,10 @@ class BaseTextAnalysis:
 
     def detect_overused_words(self, text, doc, threshold=3, window_size=1000, ignore_common=True):
         """Detects overused words."""
+        return self._overused_words(self._word_positions(doc, ignore_common), threshold, window_size)
+
+    def _word_positions(self, doc, ignore_common=True):
+        """Collects the (start, end, text) occurrences of each word the overused words check counts."""
         common_words = self.language_data.get("common_words", set())
         word_positions = defaultdict(list)
         for token in doc:
@@ -135,17 +232,23 @@ class BaseTextAnalysis:
                 continue
             if token.is_alpha and len(token.text) > 2:
                 word_positions[token.lower_].append((token.idx, token.idx + len(token.text), token.text))
+        return word_positions
+
+    def _overused_words(self, word_positions, threshold=3, window_size=1000):
         results = []
         for word, positions in word_positions.items():
             if len(positions) >= threshold:
-                processed_positions = set()
-                for i, (start, end, text) in enumerate(positions):
-                    if start in processed_positions:
-                        continue
-                    window_occurrences = sum(1 for pos, unused, unused in positions if abs(pos - start) <= window_size)
+                # Positions are in document order, so the occurrences within window_size of each
+                # one form a range whose bounds only ever move forward
+                low = high = 0
+                for start, end, unused in positions:
+                    while positions[low][0] < start - window_size:
+                        low += 1
+                    while high < len(positions) and positions[high][0] <= start + window_size:
+                        high += 1
+                    window_occurrences = high - low
                     if window_occurrences >= threshold:
                         results.append((start, end, word, window_occurrences))
-                        processed_positions.add(start)
         return results
 
     def check_pronoun_clarity(self, doc):
@@ -171,34 +274,41 @@ class BaseTextAnalysis:
         dialogue_chars = sum(match.end() - match.start() for match in dialogue_matches)
         total_chars = len(text)
         dialogue_ratio = dialogue_chars / total_chars if total_chars > 0 else 0
-        paragraphs = re.split(r'\n\s*\n', text)
         dialogue_heavy_paragraphs = []
-        for para in paragraphs:
-            if not para.strip():
-                continue
-            para_start = text.find(para)
-            para_end = para_start + len(para)
-            para_dialogue_chars = sum(
-                min(match.end(), para_end) - max(match.start(), para_start)
-                for match in dialogue_matches
-                if max(match.start(), para_start) < min(match.end(), para_end)
-            )
-            para_ratio = para_dialogue_chars / len(para) if len(para) > 0 else 0
-            if para_ratio > 0.7 and len(para) > 100:
+        first_match = 0  # The first dialogue match that doesn't end before the current paragraph
+        for para_start, para_end in split_paragraphs(text):
+            para_length = para_end - para_start
+            while first_match < len(dialogue_matches) and dialogue_matches[first_match].end() <= para_start:
+                first_match += 1
+            para_dialogue_chars = 0
+            index = first_match
+            while index < len(dialogue_matches) and dialogue_matches[index].start() < para_end:
+                match = dialogue_matches[index]
+                para_dialogue_chars += min(match.end(), para_end) - max(match.start(), para_start)
+                index += 1
+            para_ratio = para_dialogue_chars / para_length if para_length > 0 else 0
+            if para_ratio > 0.7 and para_length > 100:
                 dialogue_heavy_paragraphs.append((para_start, para_end))
         return dialogue_ratio, dialogue_heavy_paragraphs
 
     def detect_repeated_sentence_starts(self, doc, threshold=3):
         """Detects repeated sentence starters."""
-        sentence_starters = []
-        starter_positions = defaultdict(list)
+        return self._repeated_starts(self._sentence_starters(doc), threshold)
+
+    def _sentence_starters(self, doc):
+        """Collects the (starter, start, end) of each sentence that starts with a content word."""
+        starters = []
         for sent in doc.sents:
             first_word = next((token for token in sent if token.is_alpha and not token.is_stop), None)
             if first_word:
-                starter = first_word.lemma_.lower()
-                sentence_starters.append(starter)
-                starter_positions[starter].append((sent.start_char, first_word.idx + len(first_word.text)))
-        starter_counts = Counter(sentence_starters)
+                starters.append((first_word.lemma_.lower(), sent.start_char, first_word.idx + len(first_word.text)))
+        return starters
+
+    def _repeated_starts(self, starters, threshold=3):
+        starter_counts = Counter(starter for starter, unused, unused in starters)
+        starter_positions = defaultdict(list)
+        for starter, start, end in starters:
+            starter_positions[starter].append((start, end))
         results = []
         for starter, positions in starter_positions.items():
             if starter_counts[starter] >= threshold:
@@ -206,30 +316,20 @@ class BaseTextAnalysis:
                     results.append((start, end, starter))
         return results
 
-    def comprehensive_analysis(self, text, target_grade=8):
-        """Performs a comprehensive analysis of the text."""
-        if not self.nlp:
-            raise RuntimeError(f"spaCy model for {self.model_name} has not been loaded.")
-        doc = self.nlp(text)
-        sentence_analysis = self.analyze_text(text, target_grade)
+    def _local_analysis(self, text, doc, target_grade):
+        """Runs the checks whose results only depend on the sentences they are found in."""
+        sentence_analysis = self.analyze_text(text, target_grade, doc)
         results = {
             "sentence_analysis": sentence_analysis,
             "weak_formulations": [],
             "passive_voice": [],
-            "nonstandard_speech": self.detect_nonstandard_speech_verbs(text),
+            "nonstandard_speech": self.detect_nonstandard_speech_verbs(text, doc),
             "filter_words": [],
             "telling_not_showing": [],
             "weak_verbs": [],
-            "overused_words": self.detect_overused_words(text, doc),
-            "pronoun_clarity": self.check_pronoun_clarity(doc),
-            "dialogue_ratio": 0.0,
-            "dialogue_heavy_sections": [],
-            "repeated_sentence_starts": self.detect_repeated_sentence_starts(doc)
+            "pronoun_clarity": self.check_pronoun_clarity(doc)
         }
-        dialogue_ratio, dialogue_heavy_sections = self.analyze_dialogue_balance(text)
-        results["dialogue_ratio"] = dialogue_ratio
-        results["dialogue_heavy_sections"] = dialogue_heavy_sections
-        
+
         for sent_data in sentence_analysis:
             sent_doc = sent_data["doc"]
             sent_start = sent_data["start"]
@@ -247,3 +347,76 @@ class BaseTextAnalysis:
                 results["weak_verbs"].append((sent_start + start, sent_start + end, construction, verb_type))
         
         return results
+
+    def comprehensive_analysis(self, text, target_grade=8, detectors=None):
+        """
+        Performs a comprehensive analysis of the text.
+        If detectors are given, pipeline components only the other detectors need are skipped,
+        which leaves the results of those other detectors less accurate.
+        """
+        if not self.nlp:
+            raise RuntimeError(f"spaCy model for {self.model_name} has not been loaded.")
+        doc = self.parse(text, self.disabled_components(detectors))
+        results = self._local_analysis(text, doc, target_grade)
+        results["overused_words"] = self.detect_overused_words(text, doc)
+        results["repeated_sentence_starts"] = self.detect_repeated_sentence_starts(doc)
+        results["dialogue_ratio"], results["dialogue_heavy_sections"] = self.analyze_dialogue_balance(text)
+        return results
+
+    def analyze_paragraph(self, paragraph, target_grade, disable=()):
+        """
+        Returns the results of one paragraph with offsets relative to its start,
+        analyzing it only if the same paragraph wasn't analyzed before.
+        """
+        key = (hashlib.sha1(paragraph.encode("utf-8")).hexdigest(), target_grade, tuple(disable))
+        with self._paragraph_cache_lock:
+            cached = self._paragraph_cache.get(key)
+            if cached is not None:
+                self._paragraph_cache.move_to_end(key)
+                return cached
+        # Paragraphs are parsed on their own, they would only push whole texts out of the shared cache
+        doc = self.nlp(paragraph, disable=list(disable))
+        results = self._local_analysis(paragraph, doc, target_grade)
+        # The sentence spans would keep the whole Doc alive for as long as the paragraph is cached
+        results["sentence_analysis"] = [{name: value for name, value in sentence.items() if name != "doc"}
+                                        for sentence in results["sentence_analysis"]]
+        results["word_positions"] = dict(self._word_positions(doc))
+        results["sentence_starters"] = self._sentence_starters(doc)
+        with self._paragraph_cache_lock:
+            self._paragraph_cache[key] = results
+            while len(self._paragraph_cache) > PARAGRAPH_CACHE_SIZE:
+                self._paragraph_cache.popitem(last=False)
+        return results
+
+    def incremental_analysis(self, text, target_grade=8, detectors=None):
+        """
+        Performs the same analysis as comprehensive_analysis paragraph by paragraph, re-analyzing
+        only the paragraphs that changed since they were last seen. The checks that look across
+        paragraphs (overused words, repeated sentence starts, dialogue balance) run on the merged
+        paragraph results. Sentences are split within paragraphs, so results can differ slightly
+        from a whole-text analysis where the model would join sentences across a paragraph break.
+        """
+        if not self.nlp:
+            raise RuntimeError(f"spaCy model for {self.model_name} has not been loaded.")
+        disable = self.disabled_components(detectors)
+        results = {key: [] for key in LOCAL_RESULT_KEYS}
+        word_positions = defaultdict(list)
+        starters = []
+        for para_start, para_end in split_paragraphs(text):
+            paragraph = self.analyze_paragraph(text[para_start:para_end], target_grade, disable)
+            # Re-base the paragraph's offsets onto the whole text
+            for sentence in paragraph["sentence_analysis"]:
+                results["sentence_analysis"].append(dict(sentence, start=sentence["start"] + para_start,
+                                                         end=sentence["end"] + para_start))
+            for key in LOCAL_RESULT_KEYS[1:]:
+                results[key].extend((start + para_start, end + para_start) + tuple(rest)
+                                    for start, end, *rest in paragraph[key])
+            for word, positions in paragraph["word_positions"].items():
+                word_positions[word].extend((start + para_start, end + para_start, word_text)
+                                            for start, end, word_text in positions)
+            starters.extend((starter, start + para_start, end + para_start)
+                            for starter, start, end in paragraph["sentence_starters"])
+        results["overused_words"] = self._overused_words(word_positions)
+        results["repeated_sentence_starts"] = self._repeated_starts(starters)
+        results["dialogue_ratio"], results["dialogue_heavy_sections"] = self.analyze_dialogue_balance(text)
+        return results
@@ -2,12 +2,34 @@ from PyQt5.QtWidgets import (QDialog, QHBoxLayout, QVBoxLayout, QGridLayout,
                             QLineEdit, QPushButton, QMessageBox, QApplication, 
                             QTextEdit, QCheckBox, QLabel, QGroupBox)
 from PyQt5.QtGui import QTextCursor, QColor, QTextDocument, QTextFormat
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QPoint
+import re
+from bisect import bisect_left, bisect_right
+
+def find_all_matches(text, search_text, case_sensitive=False, whole_word=False):
+    """
+    Find every occurrence of search_text in text in a single pass.
+
+    Whole words follow QTextDocument.FindWholeWords: the match may not be
+    preceded or followed by a letter, digit or underscore.
+
+    Returns:
+        A list of (start, end) offsets in document order.
+    """
+    if not search_text:
+        return []
+    pattern = re.escape(search_text)
+    if whole_word:
+        pattern = r"(?<!\w)" + pattern + r"(?!\w)"
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return [match.span() for match in re.finditer(pattern, text, flags)]
 
 class FindDialog(QDialog):
-    def __init__(self, editor, parent=None):
+    def __init__(self, editor, parent=None, base_selections=None):
         super().__init__(parent)
         self.editor = editor
+        # Returns the editor's own extra selections (e.g. spelling errors), kept under the find highlights
+        self.base_selections = base_selections or (lambda: [])
         self.setWindowTitle("Find")
         self.setModal(False)  # The dialog is non-modal
         self.lastSearch = ""  # Remember last search
@@ -75,27 +97,91 @@ class FindDialog(QDialog):
         self.setLayout(self.mainLayout)
         
         # Initialize state variables
-        self.all_matches = []  # List of all found matches
+        self.all_matches = []  # (start, end) offsets of all found matches
         self.current_match_index = -1  # Index of current match
         self.search_results_count = 0  # Count of search results
+        self.current_selection = None  # Highlight of the current match
+        self._match_cache_key = None  # (search text, match case, whole words) of all_matches
+        
+        # Matches are recomputed only after the text changes; highlights follow the viewport
+        self.editor.textChanged.connect(self.invalidate_matches)
+        self.editor.verticalScrollBar().valueChanged.connect(self.refresh_highlights)
+        self.editor.horizontalScrollBar().valueChanged.connect(self.refresh_highlights)
+        self.case_sensitive.toggled.connect(self.refresh_highlights)
+        self.whole_word.toggled.connect(self.refresh_highlights)
     
     def reset_results(self):
         """Reset results when search text changes"""
         self.resultsLabel.setText("No search performed")
         
+    def invalidate_matches(self):
+        """Forget the cached matches after the text has changed."""
+        self._match_cache_key = None
+        if self.highlight_all.isChecked() and self.isVisible():
+            self.refresh_highlights()
+    
+    def find_matches(self, search_text):
+        """Return the (start, end) offsets of all occurrences, scanning the text only when needed."""
+        key = (search_text, self.case_sensitive.isChecked(), self.whole_word.isChecked())
+        if key != self._match_cache_key:
+            self.all_matches = find_all_matches(self.editor.toPlainText(), search_text,
+                                                case_sensitive=key[1], whole_word=key[2])
+            self._match_cache_key = key
+        return self.all_matches
+    
+    def visible_range(self):
+        """Return the (first, last) document positions shown in the editor's viewport."""
+        viewport = self.editor.viewport()
+        first = self.editor.cursorForPosition(QPoint(0, 0)).position()
+        last = self.editor.cursorForPosition(QPoint(viewport.width(), viewport.height())).position()
+        return first, last
+    
+    def apply_highlights(self):
+        """Show the visible occurrences (when highlighting all) and the current match."""
+        extraSelections = list(self.base_selections())
+        search_text = self.search_field.text()
+        if self.highlight_all.isChecked() and search_text:
+            matches = self.find_matches(search_text)
+            first, last = self.visible_range()
+            # Only matches overlapping the viewport get a selection, however long the text is
+            starts = [start for start, _ in matches]
+            lo = max(0, bisect_left(starts, first) - 1)
+            hi = bisect_right(starts, last)
+            document = self.editor.document()
+            bg_color = QColor(255, 255, 0, 100)
+            for start, end in matches[lo:hi]:
+                if end < first:
+                    continue
+                match_cursor = QTextCursor(document)
+                match_cursor.setPosition(start)
+                match_cursor.setPosition(end, QTextCursor.KeepAnchor)
+                selection = QTextEdit.ExtraSelection()
+                selection.cursor = match_cursor
+                selection.format.setBackground(bg_color)
+                selection.format.setForeground(Qt.black)
+                extraSelections.append(selection)
+        if self.current_selection is not None:
+            extraSelections.append(self.current_selection)
+        self.editor.setExtraSelections(extraSelections)
+    
+    def refresh_highlights(self, _=None):
+        """Rebuild the highlights after scrolling or a change of the text or the search options."""
+        # The dialog is kept around after it was closed; its highlights are gone then
+        if self.highlight_all.isChecked() and self.isVisible():
+            self.apply_highlights()
+        
     def highlight_found_text(self, cursor=None):
         """Highlight the currently found text"""
         if cursor is None:
             cursor = self.editor.textCursor()
         
-        extraSelections = []
         selection = QTextEdit.ExtraSelection()
         selection.cursor = cursor
         # Set highlighting (yellow background, black text)
         selection.format.setBackground(Qt.yellow)
         selection.format.setForeground(Qt.black)
-        extraSelections.append(selection)
-        self.editor.setExtraSelections(extraSelections)
+        self.current_selection = selection
+        self.apply_highlights()
         
         # Force immediate update of the view
         self.editor.viewport().update()
@@ -105,52 +191,12 @@ class FindDialog(QDialog):
         self.update_results_label(1)
 
     def highlight_all_occurrences(self, search_text):
-        """Highlight all occurrences of the search text."""
+        """Highlight all occurrences of the search text that are visible in the editor."""
         if not search_text:
             return
         
-        self.all_matches = []
-        extraSelections = []
-        
-        # Save the current cursor position
-        current_cursor = self.editor.textCursor()
-        saved_position = current_cursor.position()
-        
-        # Move to the beginning of the document
-        cursor = self.editor.textCursor()
-        cursor.movePosition(QTextCursor.Start)
-        self.editor.setTextCursor(cursor)
-        
-        # Set search options
-        flags = QTextDocument.FindFlags()
-        if self.case_sensitive.isChecked():
-            flags |= QTextDocument.FindCaseSensitively
-        if self.whole_word.isChecked():
-            flags |= QTextDocument.FindWholeWords
-        
-        # Iteratively find all occurrences
-        counter = 0
-        while self.editor.find(search_text, flags):
-            counter += 1
-            match_cursor = self.editor.textCursor()
-            self.all_matches.append(match_cursor)
-            
-            selection = QTextEdit.ExtraSelection()
-            selection.cursor = match_cursor
-            
-            # Different colors for different occurrences
-            bg_color = QColor(255, 255, 0, 100)
-            selection.format.setBackground(bg_color)
-            selection.format.setForeground(Qt.black)
-            extraSelections.append(selection)
-        
-        # Restore cursor position
-        cursor = self.editor.textCursor()
-        cursor.setPosition(saved_position)
-        self.editor.setTextCursor(cursor)
-        
-        # Set highlighting
-        self.editor.setExtraSelections(extraSelections)
+        counter = len(self.find_matches(search_text))
+        self.apply_highlights()
         
         # Update result status
         self.update_results_label(counter)
@@ -171,48 +217,14 @@ class FindDialog(QDialog):
         if checked and search_text:
             self.highlight_all_occurrences(search_text)
         else:
-            # Clear all highlights
-            self.editor.setExtraSelections([])
+            # Clear all highlights but the current match
+            self.apply_highlights()
     
     def count_occurrences(self, search_text):
         """Count all occurrences of the search text without changing selection"""
         if not search_text:
             return 0
-            
-        # Save the current cursor position and selection
-        current_cursor = self.editor.textCursor()
-        saved_position = current_cursor.position()
-        had_selection = current_cursor.hasSelection()
-        selection_start = current_cursor.selectionStart()
-        selection_end = current_cursor.selectionEnd()
-        
-        # Move to the beginning of the document
-        temp_cursor = QTextCursor(self.editor.document())
-        temp_cursor.movePosition(QTextCursor.Start)
-        
-        # Set search options
-        flags = QTextDocument.FindFlags()
-        if self.case_sensitive.isChecked():
-            flags |= QTextDocument.FindCaseSensitively
-        if self.whole_word.isChecked():
-            flags |= QTextDocument.FindWholeWords
-            
-        # Count occurrences
-        count = 0
-        while not temp_cursor.isNull() and not temp_cursor.atEnd():
-            temp_cursor = self.editor.document().find(search_text, temp_cursor, flags)
-            if not temp_cursor.isNull():
-                count += 1
-                
-        # Restore original cursor position and selection
-        restore_cursor = QTextCursor(self.editor.document())
-        restore_cursor.setPosition(saved_position)
-        if had_selection:
-            restore_cursor.setPosition(selection_start)
-            restore_cursor.setPosition(selection_end, QTextCursor.KeepAnchor)
-        self.editor.setTextCursor(restore_cursor)
-        
-        return count
+        return len(self.find_matches(search_text))
     
     def find_next(self):
         """Find the next occurrence of text."""
@@ -314,19 +326,21 @@ class FindDialog(QDialog):
     def clear_search(self):
         """Clear search field and highlights"""
         self.search_field.clear()
-        self.editor.setExtraSelections([])
+        self.editor.setExtraSelections(list(self.base_selections()))
         self.resultsLabel.setText("No search performed")
         self.all_matches = []
+        self._match_cache_key = None
         self.current_match_index = -1
+        self.current_selection = None
         
         # Focus the search field
         self.search_field.setFocus()
     
-    def closeEvent(self, event):
-        """Handle dialog close event."""
-        # Clear highlights when dialog is closed
-        self.editor.setExtraSelections([])
-        event.accept()
+    def hideEvent(self, event):
+        """Remove the find highlights when the dialog is closed or hidden."""
+        self.current_selection = None
+        self.editor.setExtraSelections(list(self.base_selections()))
+        super().hideEvent(event)
 
 
 # For testing and demonstration
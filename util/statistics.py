@@ -22,11 +22,18 @@ from PyQt5.QtWidgets import (
     QGridLayout, QMessageBox
 )
 from PyQt5.QtGui import QPainter
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtChart import QChart, QChartView, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis, QLineSeries
 
 from settings.theme_manager import ThemeManager
 from compendium.compendium_manager import CompendiumManager
+from compendium.mention_matcher import MentionMatcher
+from settings.plain_text import html_to_plain_text
+from settings.autosave_index import get_autosave_index, content_digest, split_revision_header
+from settings.persistence_queue import WWPersistenceQueue
+from settings.word_count_history import read_word_count_history
+from .statistics_cache import StatisticsCache
+from .statistics_analysis import analyze_scenes
 
 # Import text analysis functionality
 # from text_analysis import nlp, comprehensive_analysis
@@ -54,18 +61,25 @@ class ProjectStatistics:
         self.compendium_manager = None
         self.compendium_data = {}
         self.scene_contents = {}
+        self.scene_hashes = {}
         self.scene_metadata = {}
         self.word_counts = {}
         self.analysis_results = {}
+        self.pending_analysis = {}  # scene_id -> content of the scenes still to be analyzed
         self.character_mentions = defaultdict(list)
         self.location_mentions = defaultdict(list)
         self.custom_mentions = defaultdict(list)
         self.word_count_history = []
+        self.cache = None
         
-    def load_data(self):
+    def load_data(self, analyze=True):
         """
         Load all project data needed for statistics analysis.
         
+        Args:
+            analyze (bool): Whether to also analyze the scenes that changed since the last time.
+                If False they are left in pending_analysis for analyze_pending.
+        
         Returns:
             bool: True if data was loaded successfully, False otherwise
         """
@@ -84,16 +98,29 @@ class ProjectStatistics:
         self.compendium_manager = CompendiumManager(self.project_name)
         self.compendium_data = self.compendium_manager.load_data()
         
+        # Revisions are taken from the autosave index, which also knows the ones moved into the revision pack
+        autosave_index = get_autosave_index(self.project_path)
+        revisions = {revision['file']: revision for revision in autosave_index.all_revisions()}
+        self.cache = StatisticsCache(self.project_path)
+        
         # Updated: Look for HTML files, excluding those ending with Summary_<timestamp>.html
         scene_files = [
-            f for f in os.listdir(self.project_path)
+            f for f in list(revisions) + [f for f in files_in_dir if f not in revisions]
             if f.endswith('.html') and not f.rsplit('-', 1)[-1].startswith('Summary_')
         ]
         self.logger.debug(f"Found {len(scene_files)} potential scene files after excluding Summary files")
 
+        # Word counts saved since the history file was started are read from it, not from the revisions
+        WWPersistenceQueue.flush(timeout=5)
+        recorded_history = read_word_count_history(self.project_path) or []
+        recorded_since = int(recorded_history[0][0]) if recorded_history else None
+        
+        parsed = []  # (file name, file path, revision, metadata, timestamp)
+        latest = {}  # scene_id -> index into parsed of its newest revision
         for scene_file in scene_files:
             try:
                 file_path = os.path.join(self.project_path, scene_file)
+                revision = revisions.get(scene_file)
                 
                 # Try to extract metadata from the filename
                 try:
@@ -106,25 +133,10 @@ class ProjectStatistics:
                         'act': 'Unknown',
                         'chapter': 'Unknown',
                         'scene': 'Unknown',
-                        'timestamp': os.path.getmtime(file_path),
+                        'timestamp': revision['timestamp'] if revision else os.path.getmtime(file_path),
                         'filename': scene_file
                     }
                 
-                # Read file content and extract text from HTML using BeautifulSoup
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(html_content, 'html.parser')
-                content = soup.get_text()
-                self.logger.debug(f"Successfully extracted {len(content)} characters from {scene_file}")
-                
-                # Store content and metadata
-                self.scene_contents[metadata['id']] = content
-                self.scene_metadata[metadata['id']] = metadata
-                
-                # Calculate basic word count
-                self.word_counts[metadata['id']] = len(content.split())
-                
                 # Add to history based on timestamp (if string, parse, otherwise use as is)
                 if isinstance(metadata['timestamp'], str):
                     try:
@@ -137,27 +149,69 @@ class ProjectStatistics:
                 else:
                     timestamp = datetime.datetime.fromtimestamp(metadata['timestamp'])
                 
-                self.word_count_history.append({
-                    'date': timestamp.strftime('%Y-%m-%d'),
-                    'time': timestamp.strftime('%H:%M:%S'),
-                    'scene_id': metadata['id'],
-                    'act': metadata['act'],
-                    'chapter': metadata['chapter'],
-                    'scene': metadata['scene'],
-                    'word_count': len(content.split())
-                })
+                # The newest revision of each scene provides its content, metadata and word count
+                if metadata['id'] not in latest or parsed[latest[metadata['id']]][4] <= timestamp:
+                    latest[metadata['id']] = len(parsed)
+                parsed.append((scene_file, file_path, revision, metadata, timestamp))
+            except Exception as e:
+                self.logger.error(f"Error processing scene file {scene_file}: {e}")
+        
+        newest = set(latest.values())
+        uuid_metadata = {}  # Scene UUID -> metadata of its newest revision, for the recorded history
+        for position, (scene_file, file_path, revision, metadata, timestamp) in enumerate(parsed):
+            if revision and revision.get('uuid'):
+                uuid_metadata[revision['uuid']] = metadata
+            saved_at = int(revision['timestamp'] if revision else timestamp.timestamp())
+            in_history_file = recorded_since is not None and saved_at >= recorded_since
+            if position not in newest and in_history_file:
+                continue  # Nothing to read for a revision the history file already covers
+            try:
+                # Word counts of unchanged revisions come from the cache; only new ones are read and converted
+                content_hash = revision.get('hash') if revision else None
+                word_count = self.cache.word_count(scene_file, content_hash) if content_hash else None
+                content = None
+                if word_count is None:
+                    html_content = split_revision_header(autosave_index.read_raw(file_path))[2]
+                    content_hash = content_digest(html_content)
+                    content = html_to_plain_text(html_content, self.project_path)
+                    word_count = len(content.split())
+                    self.cache.set_word_count(scene_file, content_hash, word_count)
+                    self.logger.debug(f"Successfully extracted {len(content)} characters from {scene_file}")
+                
+                if position in newest:
+                    # Only the newest revision of each scene is needed as text
+                    if content is None:
+                        content = html_to_plain_text(autosave_index.read_raw(file_path), self.project_path)
+                    self.scene_metadata[metadata['id']] = metadata
+                    self.word_counts[metadata['id']] = word_count
+                    self.scene_contents[metadata['id']] = content
+                    self.scene_hashes[metadata['id']] = content_hash
                 
+                if not in_history_file:
+                    self.word_count_history.append(self._history_entry(timestamp, metadata, word_count))
             except Exception as e:
                 self.logger.error(f"Error processing scene file {scene_file}: {e}")
+        self.cache.retain(scene_files, self.scene_hashes.values())
+        
+        for saved_at, uuid_val, word_count in recorded_history:
+            metadata = uuid_metadata.get(uuid_val, {
+                'id': uuid_val, 'act': 'Unknown', 'chapter': 'Unknown', 'scene': 'Unknown'
+            })
+            self.word_count_history.append(
+                self._history_entry(datetime.datetime.fromtimestamp(saved_at), metadata, word_count))
         
         self.logger.debug(f"Successfully loaded {len(self.scene_contents)} scenes")
         
         # Sort word count history by timestamp
-        self.word_count_history.sort(key=lambda x: datetime.datetime.strptime(f"{x['date']} {x['time']}", '%Y-%m-%d %H:%M:%S'))
+        self.word_count_history.sort(key=lambda x: x['timestamp'])
         
         if self.scene_contents:
             try:
                 self._process_scene_data()
+                if analyze:
+                    results, _ = self.analyze_pending()
+                    self.merge_analysis(results)
+                self.cache.save()
                 return True
             except Exception as e:
                 self.logger.error(f"Error processing scene data: {e}")
@@ -166,6 +220,19 @@ class ProjectStatistics:
             self.logger.error("No scene data was loaded!")
             return False
    
+    def _history_entry(self, timestamp, metadata, word_count):
+        """Build a word count history entry for a save at the given datetime."""
+        return {
+            'timestamp': timestamp.timestamp(),
+            'date': timestamp.strftime('%Y-%m-%d'),
+            'time': timestamp.strftime('%H:%M:%S'),
+            'scene_id': metadata['id'],
+            'act': metadata['act'],
+            'chapter': metadata['chapter'],
+            'scene': metadata['scene'],
+            'word_count': word_count
+        }
+    
     def _parse_scene_filename(self, filename):
         """
         Parse a scene filename to extract metadata.
@@ -249,9 +316,7 @@ class ProjectStatistics:
         self.location_mentions = defaultdict(list)
         self.custom_mentions = defaultdict(list)
         self.analysis_results = {}
-
-        # Lazy import to avoid circular import issues:
-        from .text_analysis import comprehensive_analysis
+        self.pending_analysis = {}
 
         # Extract categories from compendium if available
         characters = {}
@@ -287,54 +352,87 @@ class ProjectStatistics:
                 else:
                     custom_categories[category_name] = entries
                     
+        # One matcher over the names of all categories
+        matcher = MentionMatcher(list(characters) + list(locations) +
+                                 [name for entries in custom_categories.values() for name in entries])
+
         # Process each scene
         for scene_id, content in self.scene_contents.items():
-            # Run text analysis
+            # Use the text analysis of unchanged scenes; the others are analyzed by analyze_pending
+            content_hash = self.scene_hashes.get(scene_id)
+            cached = self.cache.analysis(content_hash) if self.cache and content_hash else None
+            if cached is not None:
+                self.analysis_results[scene_id] = cached
+            else:
+                self.pending_analysis[scene_id] = content
+
+            # Count the mentions of all compendium entries in one pass over the scene
             try:
-                self.analysis_results[scene_id] = comprehensive_analysis(content)
+                mention_counts = matcher.counts(content)
             except Exception as e:
-                self.logger.error(f"Error analyzing scene {scene_id}: {e}")
-                self.analysis_results[scene_id] = {}
+                self.logger.error(f"Error counting compendium mentions: {e}")
+                mention_counts = {}
 
             # Find character mentions
-            if characters:
-                try:
-                    for char_name in characters:
-                        if char_name.lower() in content.lower():
-                            mention_count = content.lower().count(char_name.lower())
-                            self.character_mentions[char_name].append({
-                                'scene_id': scene_id,
-                                'count': mention_count
-                            })
-                except Exception as e:
-                    self.logger.error(f"Error processing character mentions: {e}")
+            for char_name in characters:
+                if mention_counts.get(char_name):
+                    self.character_mentions[char_name].append({
+                        'scene_id': scene_id,
+                        'count': mention_counts[char_name]
+                    })
 
             # Find location mentions
-            if locations:
-                try:
-                    for loc_name in locations:
-                        if loc_name.lower() in content.lower():
-                            mention_count = content.lower().count(loc_name.lower())
-                            self.location_mentions[loc_name].append({
-                                'scene_id': scene_id,
-                                'count': mention_count
-                            })
-                except Exception as e:
-                    self.logger.error(f"Error processing location mentions: {e}")
+            for loc_name in locations:
+                if mention_counts.get(loc_name):
+                    self.location_mentions[loc_name].append({
+                        'scene_id': scene_id,
+                        'count': mention_counts[loc_name]
+                    })
 
             # Find custom category mentions
-            try:
-                for category_name, entries in custom_categories.items():
-                    for entry_name in entries:
-                        if entry_name.lower() in content.lower():
-                            mention_count = content.lower().count(entry_name.lower())
-                            self.custom_mentions[category_name].append({
-                                'entry': entry_name,
-                                'scene_id': scene_id,
-                                'count': mention_count
-                            })
-            except Exception as e:
-                self.logger.error(f"Error processing custom category mentions: {e}")
+            for category_name, entries in custom_categories.items():
+                for entry_name in entries:
+                    if mention_counts.get(entry_name):
+                        self.custom_mentions[category_name].append({
+                            'entry': entry_name,
+                            'scene_id': scene_id,
+                            'count': mention_counts[entry_name]
+                        })
+    
+    def analyze_pending(self, progress_callback=None, is_cancelled=None):
+        """
+        Run the text analysis of the scenes in pending_analysis, in parallel where worthwhile.
+        Safe to call from a worker thread; the results are applied by merge_analysis.
+        
+        Args:
+            progress_callback (callable, optional): Called with (scenes done, scene count)
+            is_cancelled (callable, optional): Returns True once the analysis should stop
+            
+        Returns:
+            tuple: (scene ids mapped to analysis summaries, whether every scene was analyzed)
+        """
+        if not self.pending_analysis:
+            return {}, True
+        return analyze_scenes(dict(self.pending_analysis), progress_callback, is_cancelled)
+    
+    def merge_analysis(self, results):
+        """
+        Add analysis results to analysis_results and the statistics cache.
+        
+        Args:
+            results (dict): Scene ids mapped to analysis summaries, None for failed analyses
+        """
+        for scene_id, summary in results.items():
+            self.pending_analysis.pop(scene_id, None)
+            if summary is None:
+                self.analysis_results[scene_id] = {}
+                continue
+            self.analysis_results[scene_id] = summary
+            content_hash = self.scene_hashes.get(scene_id)
+            if self.cache and content_hash:
+                self.cache.set_analysis(content_hash, summary)
+        if self.cache:
+            self.cache.save()
     
     def get_word_count_stats(self):
         """
@@ -418,10 +516,7 @@ class ProjectStatistics:
         total_words = 0
         
         # Sort history by date and time
-        sorted_history = sorted(
-            self.word_count_history,
-            key=lambda x: datetime.datetime.strptime(f"{x['date']} {x['time']}", '%Y-%m-%d %H:%M:%S')
-        )
+        sorted_history = sorted(self.word_count_history, key=lambda x: x['timestamp'])
         
         for entry in sorted_history:
             words_added = entry['word_count'] - total_words if entry['word_count'] > total_words else 0
@@ -790,6 +885,32 @@ class StatisticsChart(QChartView):
         axis_x.setLabelsAngle(-45)
 
 
+class AnalysisWorker(QThread):
+    """Worker thread that analyzes the scenes a ProjectStatistics still has pending."""
+    progress_signal = pyqtSignal(int, int)  # scenes done, scene count
+    finished_signal = pyqtSignal(dict, bool)  # results, completed
+
+    def __init__(self, statistics):
+        super().__init__()
+        self.statistics = statistics
+        self.is_cancelled = False
+        self.results = {}
+
+    def run(self):
+        try:
+            self.results, completed = self.statistics.analyze_pending(
+                progress_callback=self.progress_signal.emit,
+                is_cancelled=lambda: self.is_cancelled
+            )
+        except Exception as e:
+            logging.getLogger("StatsViewer").error(f"Error analyzing scenes: {e}")
+            completed = False
+        self.finished_signal.emit(self.results, completed)
+
+    def cancel(self):
+        self.is_cancelled = True
+
+
 class StatisticsDialog(QDialog):
     def __init__(self, project_path, parent=None):
         super().__init__(parent)
@@ -797,6 +918,7 @@ class StatisticsDialog(QDialog):
         self.project_name = os.path.basename(self.project_path)
         self.statistics = ProjectStatistics(project_path)
         self.logger = logging.getLogger("StatsViewer")
+        self.analysis_worker = None
 
         self.setWindowTitle(f"Statistics - {self.project_name}")
         # Enable minimize and maximize buttons on the dialog
@@ -866,8 +988,16 @@ class StatisticsDialog(QDialog):
         close_button = QPushButton("Close")
         close_button.clicked.connect(self.accept)
         
+        # Progress of the text analysis running in the background
+        self.analysis_label = QLabel("")
+        self.cancel_analysis_button = QPushButton("Cancel Analysis")
+        self.cancel_analysis_button.clicked.connect(self.cancel_analysis)
+        self.cancel_analysis_button.hide()
+        
         button_layout.addWidget(export_button)
         button_layout.addStretch()
+        button_layout.addWidget(self.analysis_label)
+        button_layout.addWidget(self.cancel_analysis_button)
         button_layout.addWidget(close_button)
         
         layout.addLayout(button_layout)
@@ -1148,8 +1278,10 @@ class StatisticsDialog(QDialog):
     
     def load_data(self):
         """Load project data and update the UI."""
-        # Load statistics data using the ProjectStatistics instance
-        success = self.statistics.load_data()
+        self.cancel_analysis()
+        
+        # Load statistics data using the ProjectStatistics instance; changed scenes are analyzed afterwards
+        success = self.statistics.load_data(analyze=False)
         if not success:
             QMessageBox.warning(self, "Load Error", "Failed to load project statistics.")
             return
@@ -1161,6 +1293,51 @@ class StatisticsDialog(QDialog):
         self.update_locations_tab()
         self.update_text_quality_tab()
         self.update_compendium_tab()
+        
+        if self.statistics.pending_analysis:
+            self.start_analysis()
+    
+    def start_analysis(self):
+        """Analyze the changed scenes in the background and update the text quality tab when done."""
+        self.analysis_label.setText(f"Analyzing scenes: 0/{len(self.statistics.pending_analysis)}")
+        self.cancel_analysis_button.show()
+        self.analysis_worker = AnalysisWorker(self.statistics)
+        self.analysis_worker.progress_signal.connect(self.on_analysis_progress)
+        self.analysis_worker.finished_signal.connect(self.on_analysis_finished)
+        self.analysis_worker.start()
+    
+    def on_analysis_progress(self, done, total):
+        if self.analysis_worker is None or self.sender() is not self.analysis_worker:
+            return
+        self.analysis_label.setText(f"Analyzing scenes: {done}/{total}")
+    
+    def on_analysis_finished(self, results, completed):
+        if self.analysis_worker is None or self.sender() is not self.analysis_worker:
+            return  # A cancelled worker; cancel_analysis already took its results
+        self.analysis_worker.wait()
+        self.analysis_worker = None
+        self.cancel_analysis_button.hide()
+        # Scenes analyzed before a cancellation are kept
+        self.statistics.merge_analysis(results)
+        self.analysis_label.setText("" if completed else "Analysis cancelled")
+        self.update_text_quality_tab()
+    
+    def cancel_analysis(self):
+        """Stop the background analysis, keeping the scenes it has finished."""
+        worker = self.analysis_worker
+        if worker is None:
+            return
+        self.analysis_worker = None
+        worker.cancel()
+        worker.wait()
+        self.statistics.merge_analysis(worker.results)
+        self.cancel_analysis_button.hide()
+        self.analysis_label.setText("Analysis cancelled")
+    
+    def done(self, result):
+        """Stop the background analysis before the dialog closes."""
+        self.cancel_analysis()
+        super().done(result)
     
     def update_overview_tab(self):
         """Update the overview tab with current statistics."""
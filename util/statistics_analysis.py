@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+statistics_analysis.py
+
+Runs the text analysis behind the project statistics over many scenes,
+spread across worker processes when there are enough scenes to pay for it.
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from .statistics_cache import summarize_analysis
+
+# Every worker process loads its own spaCy model, so a pool only pays off with several scenes per process
+MIN_SCENES_PER_PROCESS = 4
+
+_analysis = None  # The English analysis of this process, loaded on first use
+
+def _get_analysis():
+    global _analysis
+    if _analysis is None:
+        # Lazy import to avoid circular import issues and loading spaCy before it is needed
+        from .text_analysis import EnglishTextAnalysis
+        analysis = EnglishTextAnalysis()
+        if not analysis.initialize():
+            raise RuntimeError("English spaCy model not loaded.")
+        _analysis = analysis
+    return _analysis
+
+def analyze_scene(text):
+    """Analyze one scene and return the summary the statistics keep of it."""
+    return summarize_analysis(_get_analysis().comprehensive_analysis(text))
+
+def worker_count(scene_count, max_workers=None):
+    """Return how many processes to analyze the given number of scenes with; 1 means no pool."""
+    cpus = max_workers or os.cpu_count() or 1
+    return max(1, min(cpus, scene_count // MIN_SCENES_PER_PROCESS))
+
+def analyze_scenes(scenes, progress_callback=None, is_cancelled=None, max_workers=None):
+    """
+    Analyze scenes, in parallel when there are enough of them.
+
+    Args:
+        scenes (dict): Scene ids mapped to their plain text.
+        progress_callback (callable, optional): Called with (scenes done, scene count) after every scene.
+        is_cancelled (callable, optional): Returns True once the remaining scenes should be skipped.
+        max_workers (int, optional): Upper limit for the number of processes; defaults to the CPU count.
+
+    Returns:
+        tuple: (scene ids mapped to analysis summaries or None if the analysis failed,
+                whether every scene was analyzed)
+    """
+    results = {}
+    total = len(scenes)
+    workers = worker_count(total, max_workers)
+    if workers == 1:
+        for scene_id, text in scenes.items():
+            if is_cancelled and is_cancelled():
+                return results, False
+            try:
+                results[scene_id] = analyze_scene(text)
+            except Exception as e:
+                print(f"Error analyzing scene {scene_id}: {e}")
+                results[scene_id] = None
+            if progress_callback:
+                progress_callback(len(results), total)
+        return results, True
+
+    # Spawned rather than forked: the GUI process has threads running that a fork would copy mid-flight
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        pending = {executor.submit(analyze_scene, text): scene_id for scene_id, text in scenes.items()}
+        while pending:
+            # Wake up regularly so a cancellation doesn't wait for the next scene to finish
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            if is_cancelled and is_cancelled():
+                return results, False
+            for future in done:
+                scene_id = pending.pop(future)
+                try:
+                    results[scene_id] = future.result()
+                except Exception as e:
+                    print(f"Error analyzing scene {scene_id}: {e}")
+                    results[scene_id] = None
+            if done and progress_callback:
+                progress_callback(len(results), total)
+        return results, True
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+statistics_cache.py
+
+Persistent cache of the per-revision numbers behind the project statistics,
+so reopening the statistics dialog only reads and analyzes what changed.
+"""
+
+import os
+import json
+import threading
+
+from settings.persistence_queue import WWPersistenceQueue
+
+CACHE_FILENAME = "statistics_cache.json"
+CACHE_VERSION = 1
+
+def summarize_analysis(results):
+    """
+    Reduce a comprehensive_analysis result to what the statistics use and JSON can hold.
+
+    The sentence entries carry spaCy spans, so only their readability grade is kept;
+    the issue lists are plain offsets and are stored as they are.
+    """
+    summary = dict(results)
+    summary["sentence_analysis"] = [{"grade": sentence.get("grade", 0)}
+                                    for sentence in results.get("sentence_analysis", [])]
+    return summary
+
+class StatisticsCache:
+    """
+    Word counts and text analysis results of the revisions in one project folder.
+
+    Word counts are stored per revision file together with the digest of the
+    content they were computed from, and are recomputed if either differs.
+    Analysis results are stored by content digest, so a scene that has not
+    changed since the statistics were last opened is not analyzed again.
+    """
+
+    def __init__(self, project_folder):
+        self.cache_path = os.path.join(project_folder, CACHE_FILENAME)
+        self._revisions = {}  # file name -> {"hash": digest, "words": word count}
+        self._analysis = {}  # digest -> analysis summary
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        raw = WWPersistenceQueue.read(self.cache_path)
+        try:
+            if raw is None and os.path.exists(self.cache_path):
+                with open(self.cache_path, "r", encoding="utf-8") as f:
+                    raw = f.read()
+            data = json.loads(raw) if raw else {}
+        except (OSError, ValueError) as e:
+            print(f"Error loading statistics cache {self.cache_path}: {e}")
+            data = {}
+        if data.get("version") != CACHE_VERSION:
+            return
+        self._revisions = data.get("revisions", {})
+        self._analysis = data.get("analysis", {})
+
+    def word_count(self, filename, content_hash):
+        """Return the cached word count of a revision, or None if it has to be counted."""
+        with self._lock:
+            entry = self._revisions.get(filename)
+            if entry is None or entry.get("hash") != content_hash:
+                return None
+            return entry.get("words")
+
+    def set_word_count(self, filename, content_hash, words):
+        with self._lock:
+            self._revisions[filename] = {"hash": content_hash, "words": words}
+            self._dirty = True
+
+    def analysis(self, content_hash):
+        """Return the cached analysis summary of some content, or None."""
+        with self._lock:
+            return self._analysis.get(content_hash)
+
+    def set_analysis(self, content_hash, summary):
+        with self._lock:
+            self._analysis[content_hash] = summary
+            self._dirty = True
+
+    def retain(self, filenames, content_hashes):
+        """Forget the revisions and contents that are no longer part of the project."""
+        with self._lock:
+            for filename in set(self._revisions) - set(filenames):
+                del self._revisions[filename]
+                self._dirty = True
+            for content_hash in set(self._analysis) - set(content_hashes):
+                del self._analysis[content_hash]
+                self._dirty = True
+
+    def save(self):
+        """Queue the cache file to be rewritten if anything changed since it was loaded."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({"version": CACHE_VERSION, "revisions": self._revisions,
+                               "analysis": self._analysis}, separators=(",", ":"))
+            self._dirty = False
+        WWPersistenceQueue.write(self.cache_path, data)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+text_analysis_benchmark.py
+
+Times the overused words and dialogue balance detectors of BaseTextAnalysis against the
+implementations they replaced, on synthetic texts, and checks both return the same results.
+No spaCy model is needed: the word positions are collected with a regular expression.
+
+Run from the project root with: python -m util.text_analysis_benchmark
+"""
+
+import random
+import re
+import time
+from collections import defaultdict
+
+from .base_text_analysis import BaseTextAnalysis
+from .text_analysis import ENGLISH_DATA
+
+WORD_COUNTS = (20000, 100000)
+VOCABULARY_SIZE = 400
+REPEATS = 3
+
+def make_text(word_count, seed=0):
+    """Returns a text of about word_count words in paragraphs, some of them mostly dialogue."""
+    rng = random.Random(seed)
+    vocabulary = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for unused in range(rng.randint(3, 9)))
+                  for unused in range(VOCABULARY_SIZE)]
+    paragraphs = []
+    written = 0
+    while written < word_count:
+        length = rng.randint(20, 120)
+        words = [rng.choice(vocabulary) for unused in range(length)]
+        if rng.random() < 0.3:
+            paragraphs.append('"' + " ".join(words) + '," she said.')
+        else:
+            paragraphs.append(" ".join(words) + ".")
+        written += length
+    return "\n\n".join(paragraphs)
+
+def word_positions(text, common_words):
+    """Collects the occurrences the overused words check counts, like BaseTextAnalysis._word_positions."""
+    positions = defaultdict(list)
+    for match in re.finditer(r"[^\W\d_]+", text):
+        word = match.group()
+        if len(word) > 2 and word.lower() not in common_words:
+            positions[word.lower()].append((match.start(), match.end(), word))
+    return positions
+
+def old_overused_words(word_positions, threshold=3, window_size=1000):
+    """The overused words check before it kept a window over the sorted positions."""
+    results = []
+    for word, positions in word_positions.items():
+        if len(positions) >= threshold:
+            processed_positions = set()
+            for i, (start, end, text) in enumerate(positions):
+                if start in processed_positions:
+                    continue
+                window_occurrences = sum(1 for pos, unused, unused in positions if abs(pos - start) <= window_size)
+                if window_occurrences >= threshold:
+                    results.append((start, end, word, window_occurrences))
+                    processed_positions.add(start)
+    return results
+
+def old_dialogue_balance(text, language_data):
+    """The dialogue balance check before it tracked paragraph offsets and dialogue matches."""
+    quote_pattern = language_data.get("quote_pattern", r'"[^"]*"')
+    dialogue_matches = list(re.finditer(quote_pattern, text))
+    dialogue_chars = sum(match.end() - match.start() for match in dialogue_matches)
+    total_chars = len(text)
+    dialogue_ratio = dialogue_chars / total_chars if total_chars > 0 else 0
+    paragraphs = re.split(r'\n\s*\n', text)
+    dialogue_heavy_paragraphs = []
+    for para in paragraphs:
+        if not para.strip():
+            continue
+        para_start = text.find(para)
+        para_end = para_start + len(para)
+        para_dialogue_chars = sum(
+            min(match.end(), para_end) - max(match.start(), para_start)
+            for match in dialogue_matches
+            if max(match.start(), para_start) < min(match.end(), para_end)
+        )
+        para_ratio = para_dialogue_chars / len(para) if len(para) > 0 else 0
+        if para_ratio > 0.7 and len(para) > 100:
+            dialogue_heavy_paragraphs.append((para_start, para_end))
+    return dialogue_ratio, dialogue_heavy_paragraphs
+
+def best_time(function, *args):
+    """Returns the result of function(*args) and the shortest of REPEATS run times in seconds."""
+    best = None
+    for unused in range(REPEATS):
+        started = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def run():
+    analysis = BaseTextAnalysis(None, ENGLISH_DATA)
+    for word_count in WORD_COUNTS:
+        text = make_text(word_count)
+        positions = word_positions(text, ENGLISH_DATA["common_words"])
+        old_words, old_words_time = best_time(old_overused_words, positions)
+        new_words, new_words_time = best_time(analysis._overused_words, positions)
+        old_dialogue, old_dialogue_time = best_time(old_dialogue_balance, text, ENGLISH_DATA)
+        new_dialogue, new_dialogue_time = best_time(analysis.analyze_dialogue_balance, text)
+        print(f"{word_count} words: overused words old {old_words_time:.3f}s, new {new_words_time:.3f}s; "
+              f"dialogue balance old {old_dialogue_time:.3f}s, new {new_dialogue_time:.3f}s")
+        if old_words != new_words or old_dialogue != new_dialogue:
+            print(f"  Results differ for {word_count} words")
+
+if __name__ == "__main__":
+    run()
@@ -10,7 +10,7 @@ import spacy.cli
 import threading
 from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtWidgets import QMessageBox
-from .base_text_analysis import BaseTextAnalysis
+from .base_text_analysis import BaseTextAnalysis, load_model
 import re
 
 TOOLTIP_TRANSLATIONS = {
@@ -119,7 +119,7 @@ class SpanishTextAnalysis(BaseTextAnalysis, QObject):
         """
         try:
             spacy.cli.download('es_core_news_sm')
-            self.nlp = spacy.load('es_core_news_sm')
+            self.nlp = load_model('es_core_news_sm')
             self.model_loaded.emit()
         except Exception as e:
             print(f"Error during model download: {e}")
@@ -12,7 +12,6 @@ A PyQt5-based GUI that uses the core analysis module to:
 
 import sys
 import importlib
-import traceback
 import logging
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QTextEdit, QVBoxLayout, QHBoxLayout,
@@ -20,9 +19,12 @@ from PyQt5.QtWidgets import (
     QGroupBox, QGridLayout, QTabWidget, QSplitter, QScrollArea,
     QToolTip
 )
-from PyQt5.QtGui import QTextCursor, QTextCharFormat, QBrush, QColor
+from PyQt5.QtGui import QTextCharFormat, QBrush, QColor
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
-from util.analyzers import text_analysis
+import spacy.cli
+from util.analysis_highlighter import AnalysisHighlighter, SpanIndex
+from util.base_text_analysis import load_model, is_model_loaded
+from settings.settings_manager import WWSettingsManager
 
 # Dictionary of languages and corresponding module names.
 LANGUAGES = {
@@ -114,23 +116,100 @@ COLORS = {
     "repetitive": QColor("#D8BFD8")    # Thistle - Repetitive sentence starts
 }
 
+# Analysis option -> (color, summary statistic, result lists), in the order the highlights are painted.
+HIGHLIGHT_LAYERS = {
+    "complexity": ("complex", "complex_sentences", ["sentence_analysis"]),
+    "weak_formulations": ("weak", "weak_formulations", ["weak_formulations", "passive_voice"]),
+    "speech_verbs": ("nonstandard", "nonstandard_speech", ["nonstandard_speech"]),
+    "filter_words": ("filter", "filter_words", ["filter_words"]),
+    "telling": ("telling", "telling_not_showing", ["telling_not_showing"]),
+    "weak_verbs": ("weak_verb", "weak_verbs", ["weak_verbs"]),
+    "overused": ("overused", "overused_words", ["overused_words"]),
+    "pronoun_clarity": ("pronoun", "pronoun_clarity", ["pronoun_clarity"]),
+    "repetitive": ("repetitive", "repetitive_starts", ["repeated_sentence_starts"])
+}
+
 class ComprehensiveAnalysisWorker(QThread):
     finished = pyqtSignal(dict)
     error = pyqtSignal(Exception)
 
-    def __init__(self, full_text, target_grade, analysis_instance):
+    def __init__(self, full_text, target_grade, analysis_instance, incremental=False, detectors=None):
         super().__init__()
         self.full_text = full_text
         self.target_grade = target_grade
         self.analysis_instance = analysis_instance
+        self.incremental = incremental
+        self.detectors = detectors
 
     def run(self):
         try:
-            results = self.analysis_instance.comprehensive_analysis(self.full_text, self.target_grade)
+            if self.incremental:
+                results = self.analysis_instance.incremental_analysis(self.full_text, self.target_grade, self.detectors)
+            else:
+                results = self.analysis_instance.comprehensive_analysis(self.full_text, self.target_grade, self.detectors)
             self.finished.emit(results)
         except Exception as e:
             self.error.emit(e)
 
+class ModelLoaderWorker(QThread):
+    """Loads the spaCy model of a language in the background, downloading it first if asked to."""
+    progress = pyqtSignal(str, str)  # language, status message
+    loaded = pyqtSignal(str)  # language
+    missing = pyqtSignal(str)  # language whose model isn't installed
+    failed = pyqtSignal(str, str)  # language, error message
+
+    def __init__(self, language, model_name, download=False):
+        super().__init__()
+        self.language = language
+        self.model_name = model_name
+        self.download = download
+
+    def run(self):
+        try:
+            if self.download:
+                self.progress.emit(self.language, f"Downloading {self.language} model...")
+                spacy.cli.download(self.model_name)
+            self.progress.emit(self.language, f"Loading {self.language} model...")
+            load_model(self.model_name)
+            self.loaded.emit(self.language)
+        except OSError as e:
+            if self.download:
+                self.failed.emit(self.language, str(e))
+            else:
+                self.missing.emit(self.language)
+        except (Exception, SystemExit) as e:  # spacy.cli.download exits when the download fails
+            self.failed.emit(self.language, str(e))
+
+_model_loaders = set()  # Running loaders, kept alive even if the window that started them closes
+
+def start_model_loader(language, model_name, download=False):
+    """Starts loading the model of a language in the background and returns the loader."""
+    loader = ModelLoaderWorker(language, model_name, download)
+    _model_loaders.add(loader)
+    loader.finished.connect(lambda: _model_loaders.discard(loader))
+    loader.start()
+    return loader
+
+def create_analysis(language):
+    """Creates the analysis object of a language; its model is not loaded yet."""
+    module = importlib.import_module(f"util.analyzers.{LANGUAGES[language]}")
+    return getattr(module, LANGUAGE_CLASS_MAP[language] + "TextAnalysis")()
+
+def last_used_language():
+    language = WWSettingsManager.get_setting("general", "analysis_language", "English")
+    return language if language in LANGUAGES else "English"
+
+def preload_analysis_model():
+    """Warms up the model of the last used analysis language, so the analysis window opens ready."""
+    language = last_used_language()
+    try:
+        model_name = create_analysis(language).model_name
+    except Exception as e:
+        print(f"Error preparing the text analysis model: {e}")
+        return
+    if not is_model_loaded(model_name):
+        start_model_loader(language, model_name)
+
 class TextAnalysisApp(QWidget):
     def __init__(self, parent=None, initial_text="", save_callback=None):
         super().__init__(parent)
@@ -139,39 +218,23 @@ class TextAnalysisApp(QWidget):
         self.resize(1000, 800)
         self.save_callback = save_callback
         self.analysis_instance = None
-        self.current_language = "English"
+        self.last_analysis = None  # ((text, target grade, analysis instance, incremental, disabled components), results)
+        self.highlight_counts = None  # Analysis option -> number of issues found, for the summary
+        self.dialogue_ratio = 0.0
+        self.current_language = None  # The language selected, whose model may still be loading
+        self.active_language = None  # The language of analysis_instance
+        self.analysis_instances = {}  # language -> analysis object, kept so its paragraph cache survives switching
+        self.analysis_queued = False  # Run the analysis as soon as the model is ready
         
         # Initialize UI first
         self.init_ui()
-        
-        # FORCE ENGLISH INITIALIZATION
-        try:
-            from util.analyzers import text_analysis
-            if text_analysis.initialize():
-                self.analysis_instance = text_analysis.EnglishTextAnalysis()
-                self.current_module = text_analysis
-                
-                # LOAD TOOLTIP TEXTS BEFORE SETTING LANGUAGE IN THE COMBOBOX
-                if hasattr(self.analysis_instance, "get_tooltips"):
-                    current_tooltips = self.analysis_instance.get_tooltips()
-                    self.set_tooltips(current_tooltips)
-                    
-                self.language_combo.setCurrentText("English")
-                self.results_label.setText("English model initialized")
-                
-                # FORCE IMMEDIATE TOOLTIP UPDATE
-                QApplication.processEvents()
-                
-                # SAVE THE MODEL DIRECTLY IN THE INSTANCE
-                if text_analysis.nlp is not None:
-                    self.analysis_instance.nlp = text_analysis.nlp
-                else:
-                    raise RuntimeError("Global English model not loaded")
-                    
-        except Exception as e:
-            print("English init error:", e)
-            self.results_label.setText("Critical error loading English")
-            self.analysis_instance = None
+
+        # The model loads in the background; the window is usable meanwhile
+        language = last_used_language()
+        self.language_combo.blockSignals(True)
+        self.language_combo.setCurrentText(language)
+        self.language_combo.blockSignals(False)
+        self.change_language(language)
 
         self.text_edit.setPlainText(initial_text)
 
@@ -205,6 +268,7 @@ class TextAnalysisApp(QWidget):
         self.text_edit = QTextEdit()
         self.text_edit.setAcceptRichText(True)
         self.text_edit.setMinimumHeight(300)  # Ensure editor is always visible.
+        self.highlighter = AnalysisHighlighter(self.text_edit)
     
         # Bottom section - Controls.
         bottom_widget = QWidget()
@@ -322,123 +386,83 @@ class TextAnalysisApp(QWidget):
         main_layout.addWidget(save_close_button)
         
     def change_language(self, language):
-        """Handles language switching with model state validation."""
+        """Switches the analysis language, loading its model in the background if needed."""
         if language == self.current_language:
             return
+        if language not in LANGUAGES:
+            self.results_label.setText(f"No analysis available for {language}.")
+            return
 
         self.current_language = language
-        module_name = LANGUAGES.get(language)
-        
-        if not module_name:
-            self.revert_to_english()
+        instance = self.analysis_instances.get(language)
+        if instance is None:
+            try:
+                instance = create_analysis(language)
+            except Exception as e:
+                self.handle_language_error(language, str(e))
+                return
+            self.analysis_instances[language] = instance
+
+        if instance.nlp is not None or is_model_loaded(instance.model_name):
+            self.activate_language(language)
             return
+        self.results_label.setText(f"Loading {language} model...")
+        self.connect_loader(start_model_loader(language, instance.model_name))
 
-        try:
-            # Special handling for English
-            if module_name == "text_analysis":
-                from util.analyzers import text_analysis
-                if not text_analysis.initialize():
-                    raise RuntimeError("English model failed to initialize")
-                
-                # Create new instance with proper model injection
-                self.analysis_instance = text_analysis.EnglishTextAnalysis()
-                
-                # Force model reference from global module
-                if text_analysis.nlp is not None:
-                    self.analysis_instance.nlp = text_analysis.nlp
-                    
-                if not hasattr(self.analysis_instance, 'nlp') or self.analysis_instance.nlp is None:
-                    raise RuntimeError("English model reference missing")
-                
-                self.current_module = text_analysis
-                self.language_combo.setCurrentText("English")
-                self.results_label.setText("English model active")
-                
-                # Update tooltip texts for English
-                if hasattr(self.analysis_instance, "get_tooltips"):
-                    self.set_tooltips(self.analysis_instance.get_tooltips())
-                return
+    def connect_loader(self, loader):
+        loader.progress.connect(self.on_model_progress)
+        loader.loaded.connect(self.on_model_loaded)
+        loader.missing.connect(self.on_model_missing)
+        loader.failed.connect(self.handle_language_error)
 
-            # Handling other languages
-            module = importlib.import_module(f"util.analyzers.{module_name}")
-            class_name = LANGUAGE_CLASS_MAP[language] + "TextAnalysis"
-            analysis_class = getattr(module, class_name)
-            new_instance = analysis_class()
-            
-            # Connect model_loaded signal to update tooltips when the model finishes downloading
-            if hasattr(new_instance, 'model_loaded'):
-                new_instance.model_loaded.connect(self.on_model_loaded)
-            
-            # Initialize model; if download is in progress, update instance and exit early
-            if not new_instance.initialize():
-                if getattr(new_instance, 'download_in_progress', False):
-                    self.results_label.setText(f"Downloading {language} model...")
-                    self.analysis_instance = new_instance
-                    return
-                else:
-                    self.revert_to_english()
-                    return
-            
-            # Update references after successful initialization
-            self.analysis_instance = new_instance
-            self.current_module = module
-            self.language_combo.setCurrentText(language)
-            self.results_label.setText(f"{language} model active")
-            
-            # Update tooltips if available
-            if hasattr(new_instance, "get_tooltips"):
-                self.set_tooltips(new_instance.get_tooltips())
+    def on_model_progress(self, language, message):
+        if language == self.current_language:
+            self.results_label.setText(message)
 
-        except Exception as e:
-            print(f"Language switch error: {str(e)}")
-            self.revert_to_english()
+    def on_model_loaded(self, language):
+        """Callback triggered when a model finished loading in the background."""
+        # The user may have picked another language in the meantime
+        if language == self.current_language:
+            self.activate_language(language)
+
+    def on_model_missing(self, language):
+        """Offers to download a model that isn't installed."""
+        if language != self.current_language:
+            return
+        instance = self.analysis_instances[language]
+        if hasattr(instance, "ask_for_download") and instance.ask_for_download():
+            self.connect_loader(start_model_loader(language, instance.model_name, download=True))
+        else:
+            self.handle_language_error(language, f"The model '{instance.model_name}' is not installed.")
+
+    def activate_language(self, language):
+        """Makes the language, whose model is loaded, the one the analysis runs in."""
+        instance = self.analysis_instances[language]
+        if not instance.initialize():  # Instant, the model is loaded already
+            self.handle_language_error(language, "The model could not be initialized.")
+            return
+        self.analysis_instance = instance
+        self.active_language = language
+        self.results_label.setText(f"{language} model active")
+        if hasattr(instance, "get_tooltips"):
+            self.set_tooltips(instance.get_tooltips())
+        WWSettingsManager.set_setting("general", "analysis_language", language)
+        if self.analysis_queued:
+            self.analysis_queued = False
+            self.run_analysis()
 
     def handle_language_error(self, language, error_msg):
-        """Handles errors during language switching"""
+        """Handles errors during language switching by going back to the language that was active."""
+        if language != self.current_language:
+            return
         logging.error(f"Language switch error ({language}): {error_msg}")
-        traceback.print_exc()
-        self.results_label.setText(f"Error loading {language}. Reverting to English.")
-        self.revert_to_english()
-
-    def revert_to_english(self):
-        """Forceful English revert with model verification."""
-        try:
-            from util.analyzers import text_analysis
-            
-            # Reinitialize core English module
-            if not text_analysis.initialize():
-                raise RuntimeError("Core English initialization failed")
-                
-            # Create new instance with model injection
-            self.analysis_instance = text_analysis.EnglishTextAnalysis()
-            
-            # Force model reference from global state
-            if text_analysis.nlp is not None:
-                self.analysis_instance.nlp = text_analysis.nlp
-                
-            # Final verification
-            if not hasattr(self.analysis_instance, 'nlp') or self.analysis_instance.nlp is None:
-                raise RuntimeError("Model reference not propagated")
-                
-            self.current_language = "English"
-            self.language_combo.setCurrentText("English")
-            self.results_label.setText("English model restored")
-            
-            # Update tooltips
-            if hasattr(self.analysis_instance, "get_tooltips"):
-                self.set_tooltips(self.analysis_instance.get_tooltips())
-                
-        except Exception as e:
-            print(f"Critical English revert failure: {str(e)}")
-            self.results_label.setText("Fatal error: English unavailable")
-            self.analysis_instance = None
-                
-    def on_model_loaded(self):
-        """Callback triggered when the model finishes downloading."""
-        # Once the model is loaded, update the tooltips immediately.
-        if hasattr(self.analysis_instance, "get_tooltips"):
-            self.set_tooltips(self.analysis_instance.get_tooltips())
-        self.results_label.setText(f"{self.current_language} model active")
+        self.current_language = self.active_language
+        if self.active_language is not None:
+            self.language_combo.blockSignals(True)
+            self.language_combo.setCurrentText(self.active_language)
+            self.language_combo.blockSignals(False)
+        self.results_label.setText(f"Error loading {language}: {error_msg}")
+        self.analysis_queued = False
 
     def check_module_ready(self, language):
         """Checks if the module is ready. (Not used with the signal/slot approach)"""
@@ -529,6 +553,9 @@ class TextAnalysisApp(QWidget):
         self.analysis_options["repetitive"].setChecked(True)
         layout.addWidget(self.analysis_options["repetitive"])
 
+        for checkbox in self.analysis_options.values():
+            checkbox.toggled.connect(self.apply_enabled_analyses)
+
     def setup_settings_tab(self, layout):
         """Sets up the settings tab with analysis thresholds and interface customization."""
         # Thresholds group.
@@ -550,6 +577,10 @@ class TextAnalysisApp(QWidget):
         self.repetitive_threshold.setFixedWidth(50)
         thresholds_layout.addWidget(self.repetitive_threshold, 2, 1)
         
+        self.incremental_checkbox = QCheckBox("Incremental analysis (re-analyze changed paragraphs only)")
+        self.incremental_checkbox.setChecked(True)
+        thresholds_layout.addWidget(self.incremental_checkbox, 3, 0, 1, 2)
+        
         thresholds_group.setLayout(thresholds_layout)
         layout.addWidget(thresholds_group)
         
@@ -627,6 +658,11 @@ class TextAnalysisApp(QWidget):
         if not full_text:
             self.results_label.setText("Please enter text for analysis.")
             return
+        if self.current_language != self.active_language:
+            # Runs once the model of the selected language has loaded
+            self.analysis_queued = True
+            self.results_label.setText(f"The analysis will start when the {self.current_language} model is ready.")
+            return
         if self.analysis_instance is None or self.analysis_instance.nlp is None:
             self.results_label.setText("The model is not loaded.")
             return
@@ -641,99 +677,63 @@ class TextAnalysisApp(QWidget):
         else:
             target_grade = GENRE_TARGET_GRADES.get(selected_genre, 8)
 
+        # Re-running on unchanged text (e.g. after toggling a checkbox) only redraws the highlights
+        incremental = self.incremental_checkbox.isChecked()
+        # Pipeline components only unchecked options need are skipped while parsing
+        detectors = [key for key, checkbox in self.analysis_options.items() if checkbox.isChecked()]
+        disabled = self.analysis_instance.disabled_components(detectors)
+        analysis_key = (full_text, target_grade, self.analysis_instance, incremental, disabled)
+        if self.last_analysis is not None and self.last_analysis[0] == analysis_key:
+            self.update_highlighting(self.last_analysis[1])
+            return
+
         self.results_label.setText("Analyzing text...")
-        self.worker = ComprehensiveAnalysisWorker(full_text, target_grade, self.analysis_instance)
+        self.worker = ComprehensiveAnalysisWorker(full_text, target_grade, self.analysis_instance, incremental, detectors)
+        self.worker.finished.connect(lambda results: self.remember_analysis(analysis_key, results))
         self.worker.finished.connect(self.update_highlighting)
         self.worker.error.connect(self.handle_error)
         self.worker.start()
 
+    def remember_analysis(self, analysis_key, results):
+        """Keeps the results of the last analysis for the text, target grade and language it was run with."""
+        self.last_analysis = (analysis_key, results)
+
     def update_highlighting(self, results):
         """
         Updates the text highlighting based on the analysis results.
-        Recomputes the enabled analysis options and applies the corresponding text formats.
+        The spans of every analysis option go to the highlighter, which paints the enabled ones.
         """
-        enabled_analyses = {key: checkbox.isChecked() for key, checkbox in self.analysis_options.items()}
-        cursor = self.text_edit.textCursor()
-        formats = {key: QTextCharFormat() for key in COLORS}
-        for issue_type, color in COLORS.items():
-            formats[issue_type].setBackground(QBrush(color))
-        
-        cursor.setPosition(0)
-        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
-        cursor.setCharFormat(QTextCharFormat())
-        
-        stats = {key: 0 for key in ["complex_sentences", "weak_formulations", "nonstandard_speech", "filter_words", "telling_not_showing", "weak_verbs", "overused_words", "pronoun_clarity", "repetitive_starts"]}
-        
-        if enabled_analyses.get("complexity", False):
-            for sent in results["sentence_analysis"]:
-                if sent["complex"]:
-                    cursor.setPosition(sent["start"])
-                    cursor.setPosition(sent["end"], QTextCursor.KeepAnchor)
-                    cursor.mergeCharFormat(formats["complex"])
-                    stats["complex_sentences"] += 1
-        
-        if enabled_analyses.get("weak_formulations", False):
-            for start, end in results["weak_formulations"]:
-                cursor.setPosition(start)
-                cursor.setPosition(end, QTextCursor.KeepAnchor)
-                cursor.mergeCharFormat(formats["weak"])
-                stats["weak_formulations"] += 1
-            for start, end in results["passive_voice"]:
-                cursor.setPosition(start)
-                cursor.setPosition(end, QTextCursor.KeepAnchor)
-                cursor.mergeCharFormat(formats["weak"])
-                stats["weak_formulations"] += 1
-        
-        if enabled_analyses.get("speech_verbs", False):
-            for start, end, unused in results["nonstandard_speech"]:
-                cursor.setPosition(start)
-                cursor.setPosition(end, QTextCursor.KeepAnchor)
-                cursor.mergeCharFormat(formats["nonstandard"])
-                stats["nonstandard_speech"] += 1
-        
-        if enabled_analyses.get("filter_words", False):
-            for start, end, unused in results["filter_words"]:
-                cursor.setPosition(start)
-                cursor.setPosition(end, QTextCursor.KeepAnchor)
-                cursor.mergeCharFormat(formats["filter"])
-                stats["filter_words"] += 1
-        
-        if enabled_analyses.get("telling", False):
-            for start, end, unused in results["telling_not_showing"]:
-                cursor.setPosition(start)
-                cursor.setPosition(end, QTextCursor.KeepAnchor)
-                cursor.mergeCharFormat(formats["telling"])
-                stats["telling_not_showing"] += 1
-        
-        if enabled_analyses.get("weak_verbs", False):
-            for start, end, unused, unused in results["weak_verbs"]:
-                cursor.setPosition(start)
-                cursor.setPosition(end, QTextCursor.KeepAnchor)
-                cursor.mergeCharFormat(formats["weak_verb"])
-                stats["weak_verbs"] += 1
-        
-        if enabled_analyses.get("overused", False):
-            for start, end, unused, unused in results["overused_words"]:
-                cursor.setPosition(start)
-                cursor.setPosition(end, QTextCursor.KeepAnchor)
-                cursor.mergeCharFormat(formats["overused"])
-                stats["overused_words"] += 1
-        
-        if enabled_analyses.get("pronoun_clarity", False):
-            for start, end, unused in results["pronoun_clarity"]:
-                cursor.setPosition(start)
-                cursor.setPosition(end, QTextCursor.KeepAnchor)
-                cursor.mergeCharFormat(formats["pronoun"])
-                stats["pronoun_clarity"] += 1
-        
-        if enabled_analyses.get("repetitive", False):
-            for start, end, unused in results["repeated_sentence_starts"]:
-                cursor.setPosition(start)
-                cursor.setPosition(end, QTextCursor.KeepAnchor)
-                cursor.mergeCharFormat(formats["repetitive"])
-                stats["repetitive_starts"] += 1
-        
-        self.update_results_summary(stats, results["dialogue_ratio"])
+        layers = []
+        self.highlight_counts = {}
+        for option, (color, unused, result_keys) in HIGHLIGHT_LAYERS.items():
+            if option == "complexity":
+                spans = [(sent["start"], sent["end"]) for sent in results["sentence_analysis"] if sent["complex"]]
+            else:
+                spans = [(issue[0], issue[1]) for key in result_keys for issue in results[key]]
+            char_format = QTextCharFormat()
+            char_format.setBackground(QBrush(COLORS[color]))
+            layers.append((option, SpanIndex(spans), char_format))
+            self.highlight_counts[option] = len(spans)
+        self.dialogue_ratio = results["dialogue_ratio"]
+        self.highlighter.set_layers(layers)
+        self.apply_enabled_analyses()
+
+    def apply_enabled_analyses(self, _=None):
+        """Shows the highlights and counts of the checked analysis options, without re-running the analysis."""
+        enabled = [key for key, checkbox in self.analysis_options.items() if checkbox.isChecked()]
+        self.highlighter.set_enabled(enabled)
+        if self.highlight_counts is None:
+            return
+        if self.last_analysis is not None and self.last_analysis[0][2] is self.analysis_instance:
+            skipped = set(self.last_analysis[0][4])
+            if skipped - set(self.analysis_instance.disabled_components(enabled)):
+                # A newly checked option needs a pipeline component the last analysis skipped
+                self.run_analysis()
+                return
+        stats = {stat: 0 for unused, stat, unused in HIGHLIGHT_LAYERS.values()}
+        for option in enabled:
+            stats[HIGHLIGHT_LAYERS[option][1]] = self.highlight_counts[option]
+        self.update_results_summary(stats, self.dialogue_ratio)
 
     def update_results_summary(self, stats, dialogue_ratio):
         """Updates the results summary label with the analysis statistics."""
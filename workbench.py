@@ -11,6 +11,7 @@ from PyQt5.QtCore import Qt, QSize, pyqtSignal
 from project_window.project_window import ProjectWindow
 from settings.settings_dialog import SettingsDialog
 from settings.settings_manager import WWSettingsManager
+from settings.autosave_manager import rename_project_folder
 from settings.theme_manager import ThemeManager
 from project_window import project_settings_manager
 from compendium.enhanced_compendium import EnhancedCompendiumWindow
@@ -259,17 +260,7 @@ class ProjectPostIt(QToolButton):
         self.rename_project_dir_contents(old_dirname, new_dirname, old_name, new_name)
 
     def rename_project_dir_contents(self, old_dirname, new_dirname, old_name, new_name):
-        os.mkdir(new_dirname)
-        for filename in os.listdir(old_dirname):
-            old_path = os.path.join(old_dirname, filename)
-            if filename.startswith(old_name):
-                remainder = filename[len(old_name):]
-                new_filename = new_name + remainder
-                new_path = os.path.join(new_dirname, new_filename)
-            else:
-                new_path = os.path.join(new_dirname, filename)
-            shutil.copy2(old_path, new_path)
-        shutil.rmtree(old_dirname)
+        rename_project_folder(old_dirname, new_dirname, old_name, new_name)
 
     def rename_cover(self, new_name):
         cover = self.project.get("cover")
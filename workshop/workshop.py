@@ -412,7 +412,10 @@ class WorkshopWindow(QDialog):
                 for scene in chapter.get("scenes", []):
                     if scene.get("name", "").lower() == scene_name.lower():
                         hierarchy = [act.get("name"), chapter.get("name"), scene.get("name")]
-                        content = load_latest_autosave(self.project_name, hierarchy, scene)
+                        if self.model is not None:
+                            content = self.model.load_scene_content(hierarchy)
+                        else:
+                            content = load_latest_autosave(self.project_name, hierarchy, scene)
                         return content or f"[No content for scene {scene_name}]"
         return f"[No content for scene {scene_name}]"
 